@@ -6,13 +6,17 @@ import customtkinter
 import threading
 import os
 import sys
+import glob
 import json
+import multiprocessing
 
 import core_logic
+import quota
+import taxonomy_pack
+import wiki_batch
+from identifiers import FLASH_MODEL_NAME, PRO_MODEL_NAME, create_gemini_model, create_identifier
 
 # 가벼운 라이브러리들만
-import wikipediaapi
-import google.generativeai as genai
 import pandas as pd
 from PIL import Image
 
@@ -57,6 +61,97 @@ class App(customtkinter.CTk):
         self.folder_path_label = customtkinter.CTkLabel(self.sidebar_frame, text="선택된 폴더 없음", wraplength=240, font=('', 11))
         self.folder_path_label.grid(row=self.current_grid_row, column=0, columnspan=2, padx=20, pady=10)
         self.current_grid_row += 1
+        self.recursive_var = tkinter.BooleanVar(value=False)
+        self.recursive_checkbox = customtkinter.CTkCheckBox(self.sidebar_frame, text="하위 폴더 포함", variable=self.recursive_var, font=('', 11))
+        self.recursive_checkbox.grid(row=self.current_grid_row, column=0, columnspan=2, padx=20, pady=(0, 10), sticky="w")
+        self.current_grid_row += 1
+        # 일괄 처리: 선택한 폴더의 하위 폴더(예: 날짜별)를 각각 처리하고 마지막에 전체 요약
+        self.batch_var = tkinter.BooleanVar(value=False)
+        self.batch_checkbox = customtkinter.CTkCheckBox(self.sidebar_frame, text="하위 폴더별 일괄 처리", variable=self.batch_var, font=('', 11))
+        self.batch_checkbox.grid(row=self.current_grid_row, column=0, columnspan=2, padx=20, pady=(0, 10), sticky="w")
+        self.current_grid_row += 1
+        # 사전 스캔: EXIF 헤더를 먼저 모두 읽어 촬영 순으로 처리하고 예상 소요 시간 표시
+        self.prescan_var = tkinter.BooleanVar(value=False)
+        self.prescan_checkbox = customtkinter.CTkCheckBox(self.sidebar_frame, text="촬영 순 처리 + 예상 시간", variable=self.prescan_var, font=('', 11))
+        self.prescan_checkbox.grid(row=self.current_grid_row, column=0, columnspan=2, padx=20, pady=(0, 10), sticky="w")
+        self.current_grid_row += 1
+
+        # 출력 방식
+        self.output_mode_choices = {"복사": "copy", "하드링크": "hardlink", "리플링크(CoW)": "reflink", "이동": "move"}
+        self.output_mode_label = customtkinter.CTkLabel(self.sidebar_frame, text="출력 방식:", font=('', 11))
+        self.output_mode_label.grid(row=self.current_grid_row, column=0, padx=(20, 5), pady=(0, 10), sticky="w")
+        self.output_mode_var = tkinter.StringVar(value="복사")
+        self.output_mode_menu = customtkinter.CTkOptionMenu(self.sidebar_frame, values=list(self.output_mode_choices), variable=self.output_mode_var, width=120)
+        self.output_mode_menu.grid(row=self.current_grid_row, column=1, padx=(5, 20), pady=(0, 10), sticky="ew")
+        self.current_grid_row += 1
+
+        # 출력 폴더 구성
+        self.output_layout_choices = {"단일 폴더": "flat", "날짜별": "date", "분류별": "species", "날짜+종별": "date_species"}
+        self.output_layout_label = customtkinter.CTkLabel(self.sidebar_frame, text="폴더 구성:", font=('', 11))
+        self.output_layout_label.grid(row=self.current_grid_row, column=0, padx=(20, 5), pady=(0, 10), sticky="w")
+        self.output_layout_var = tkinter.StringVar(value="단일 폴더")
+        self.output_layout_menu = customtkinter.CTkOptionMenu(self.sidebar_frame, values=list(self.output_layout_choices), variable=self.output_layout_var, width=120)
+        self.output_layout_menu.grid(row=self.current_grid_row, column=1, padx=(5, 20), pady=(0, 10), sticky="ew")
+        self.current_grid_row += 1
+
+        # 식별 백엔드 (ONNX: API 키 없이 로컬 분류 모델로 식별, 고르면 모델과 클래스 목록 파일을 선택)
+        self.backend_choices = {"Gemini": "gemini", "ONNX (로컬)": "onnx"}
+        self.onnx_model_path = None
+        self.onnx_labels_path = None
+        self.backend_label = customtkinter.CTkLabel(self.sidebar_frame, text="식별 백엔드:", font=('', 11))
+        self.backend_label.grid(row=self.current_grid_row, column=0, padx=(20, 5), pady=(0, 10), sticky="w")
+        self.backend_var = tkinter.StringVar(value="Gemini")
+        self.backend_menu = customtkinter.CTkOptionMenu(self.sidebar_frame, values=list(self.backend_choices), variable=self.backend_var, width=120, command=self.on_backend_change)
+        self.backend_menu.grid(row=self.current_grid_row, column=1, padx=(5, 20), pady=(0, 10), sticky="ew")
+        self.current_grid_row += 1
+
+        # 병렬 파이프라인 (디코딩/식별/저장 동시 진행)
+        self.pipeline_var = tkinter.BooleanVar(value=False)
+        self.pipeline_checkbox = customtkinter.CTkCheckBox(self.sidebar_frame, text="병렬 처리 (파이프라인)", variable=self.pipeline_var, command=self.on_pipeline_change, font=('', 11))
+        self.pipeline_checkbox.grid(row=self.current_grid_row, column=0, columnspan=2, padx=20, pady=(0, 10), sticky="w")
+        self.current_grid_row += 1
+
+        # 메모리 절약 모드 (축소 디코딩 + 메모리 예산, 동시에 여러 장을 디코딩하는 파이프라인에서만)
+        self.low_memory_var = tkinter.BooleanVar(value=False)
+        self.low_memory_checkbox = customtkinter.CTkCheckBox(self.sidebar_frame, text="메모리 절약 모드 (1GB)", variable=self.low_memory_var, state="disabled", font=('', 11))
+        self.low_memory_checkbox.grid(row=self.current_grid_row, column=0, columnspan=2, padx=20, pady=(0, 10), sticky="w")
+        self.current_grid_row += 1
+
+        # 피사체 크롭 (새 주변만 잘라서 전송)
+        self.subject_crop_var = tkinter.BooleanVar(value=False)
+        self.subject_crop_checkbox = customtkinter.CTkCheckBox(self.sidebar_frame, text="피사체 영역만 전송", variable=self.subject_crop_var, font=('', 11))
+        self.subject_crop_checkbox.grid(row=self.current_grid_row, column=0, columnspan=2, padx=20, pady=(0, 10), sticky="w")
+        self.current_grid_row += 1
+
+        # 오프라인 모드 (Wikipedia 대신 로컬 분류 자료)
+        self.offline_var = tkinter.BooleanVar(value=False)
+        self.offline_checkbox = customtkinter.CTkCheckBox(self.sidebar_frame, text="오프라인 이름 확정 (Wikipedia 생략)", variable=self.offline_var, font=('', 11))
+        self.offline_checkbox.grid(row=self.current_grid_row, column=0, columnspan=2, padx=20, pady=(0, 10), sticky="w")
+        self.current_grid_row += 1
+
+        # 중복 요청 (응답이 p95보다 늦으면 같은 요청을 한 번 더 보냄)
+        self.hedge_var = tkinter.BooleanVar(value=False)
+        self.hedge_checkbox = customtkinter.CTkCheckBox(self.sidebar_frame, text="느린 요청 중복 전송", variable=self.hedge_var, font=('', 11))
+        self.hedge_checkbox.grid(row=self.current_grid_row, column=0, columnspan=2, padx=20, pady=(0, 10), sticky="w")
+        self.current_grid_row += 1
+
+        # 하루 할당량 (무료 키 한도/Pro 비용 한도에 닿으면 멈추고 남은 사진은 다음 실행에서 이어서)
+        self.quota_var = tkinter.BooleanVar(value=False)
+        self.quota_checkbox = customtkinter.CTkCheckBox(self.sidebar_frame, text="하루 할당량 지키기 (남은 사진은 다음에)", variable=self.quota_var, font=('', 11))
+        self.quota_checkbox.grid(row=self.current_grid_row, column=0, columnspan=2, padx=20, pady=(0, 10), sticky="w")
+        self.current_grid_row += 1
+
+        # 성능 기록 (문제 보고용 cProfile/tracemalloc 결과를 탐조기록 폴더에 저장)
+        self.profile_var = tkinter.BooleanVar(value=False)
+        self.profile_checkbox = customtkinter.CTkCheckBox(self.sidebar_frame, text="성능 기록 저장 (문제 보고용)", variable=self.profile_var, font=('', 11))
+        self.profile_checkbox.grid(row=self.current_grid_row, column=0, columnspan=2, padx=20, pady=(0, 10), sticky="w")
+        self.current_grid_row += 1
+
+        # 단계적 해상도 (저해상도로 먼저 식별, 불확실할 때만 고해상도)
+        self.progressive_var = tkinter.BooleanVar(value=False)
+        self.progressive_checkbox = customtkinter.CTkCheckBox(self.sidebar_frame, text="저해상도 우선 식별", variable=self.progressive_var, font=('', 11))
+        self.progressive_checkbox.grid(row=self.current_grid_row, column=0, columnspan=2, padx=20, pady=(0, 10), sticky="w")
+        self.current_grid_row += 1
 
         # 촬영 지역
         self.location_label = customtkinter.CTkLabel(self.sidebar_frame, text="촬영 지역:", anchor="w")
@@ -103,6 +198,9 @@ class App(customtkinter.CTk):
 
         self.both_radio = customtkinter.CTkRadioButton(self.sidebar_frame, text="둘 다", variable=self.report_format_var, value="both")
         self.both_radio.grid(row=self.current_grid_row, column=0, padx=(20, 5), pady=2, sticky="w")
+        self.webp_var = tkinter.BooleanVar(value=False)
+        self.webp_checkbox = customtkinter.CTkCheckBox(self.sidebar_frame, text="WebP", variable=self.webp_var, font=('', 11))
+        self.webp_checkbox.grid(row=self.current_grid_row, column=1, padx=(5, 20), pady=2, sticky="w")
         self.current_grid_row += 1
 
         # API 키 설정
@@ -149,6 +247,10 @@ class App(customtkinter.CTk):
         self.pro_api_key_entry = customtkinter.CTkEntry(self.premium_content_frame, placeholder_text="Gemini 2.5 Pro API 키 (유료)", show="*")
         self.pro_api_key_entry.grid(row=4, column=0, columnspan=2, padx=15, pady=(0, 5), sticky="ew")
         
+        self.cascade_var = tkinter.BooleanVar(value=False)
+        self.cascade_checkbox = customtkinter.CTkCheckBox(self.premium_content_frame, text="Flash 우선, 불확실할 때만 Pro", variable=self.cascade_var, command=self.on_pro_mode_change, font=('', 11))
+        self.cascade_checkbox.grid(row=6, column=0, columnspan=2, padx=15, pady=(0, 10), sticky="w")
+
         self.pro_key_button_frame = customtkinter.CTkFrame(self.premium_content_frame, fg_color="transparent")
         self.pro_key_button_frame.grid(row=5, column=0, columnspan=2, padx=15, pady=(0, 10), sticky="ew")
         self.save_pro_key_button = customtkinter.CTkButton(self.pro_key_button_frame, text="Pro 키 저장", width=70, command=self.save_pro_api_key)
@@ -383,6 +485,8 @@ class App(customtkinter.CTk):
         """프로 모드 변경 시 처리"""
         if self.pro_mode_var.get():
             self.log_to_status("프리미엄 모드 활성화", "orange")
+        elif self.cascade_var.get():
+            self.log_to_status("단계 모드 활성화 (Flash → Pro)", "orange")
         else:
             self.log_to_status("기본 모드로 변경", "green")
 
@@ -390,7 +494,7 @@ class App(customtkinter.CTk):
         try:
             # Wikipedia API
             self.log_to_status("Wikipedia API 연결 중...")
-            self.app_models['wiki'] = wikipediaapi.Wikipedia('BirdPhotoOrganizer/2.1', 'en')
+            self.app_models['wiki'] = wiki_batch.WikiResolver()
 
             # CSV 데이터베이스
             self.log_to_status("CSV 조류 데이터베이스 로딩 중...")
@@ -407,12 +511,43 @@ class App(customtkinter.CTk):
                     self.log_to_status(f"CSV 로딩 실패: {e}", "red")
                     self.app_models["csv_db"] = None
 
+                # 오프라인 모드용 분류 자료 (설정 폴더의 taxonomy_extra*.csv/json을 추가 자료로 사용)
+                try:
+                    config_folder = self.get_config_folder()
+                    extra = sorted(glob.glob(os.path.join(config_folder, 'taxonomy_extra*.csv')) +
+                                   glob.glob(os.path.join(config_folder, 'taxonomy_extra*.json')))
+                    self.app_models['taxonomy_pack'] = taxonomy_pack.load_or_build(
+                        csv_path, os.path.join(config_folder, taxonomy_pack.PACK_NAME), extra, log=self.log_to_status)
+                except Exception as e:
+                    self.log_to_status(f"분류 자료 준비 실패: {e}", "orange")
+                    self.app_models['taxonomy_pack'] = None
+
             self.log_to_status("준비 완료!", "green")
             self.start_button.configure(state="normal", text="분류 시작")
         except Exception as e:
             self.log_to_status("오류: 초기 로딩 실패", "red")
             tkinter.messagebox.showerror("초기화 오류", str(e))
 
+    def on_pipeline_change(self):
+        """메모리 예산은 파이프라인에서만 의미가 있으므로 파이프라인을 끄면 메모리 절약 모드도 끔"""
+        if self.pipeline_var.get():
+            self.low_memory_checkbox.configure(state="normal")
+        else:
+            self.low_memory_var.set(False)
+            self.low_memory_checkbox.configure(state="disabled")
+
+    def on_backend_change(self, choice):
+        if self.backend_choices.get(choice) != 'onnx':
+            return
+        model_path = filedialog.askopenfilename(title="ONNX 모델 파일", filetypes=[("ONNX 모델", "*.onnx")])
+        labels_path = filedialog.askopenfilename(title="클래스 목록 파일 (클래스 순서대로 학명/영문명/목/과)",
+                                                 filetypes=[("CSV/JSON", "*.csv *.json")]) if model_path else ""
+        if not model_path or not labels_path:
+            self.backend_var.set("Gemini")
+            return
+        self.onnx_model_path, self.onnx_labels_path = model_path, labels_path
+        self.log_to_status(f"ONNX 모델: {os.path.basename(model_path)}")
+
     def select_folder_event(self):
         folder = filedialog.askdirectory()
         if folder:
@@ -427,8 +562,16 @@ class App(customtkinter.CTk):
             tkinter.messagebox.showerror("오류", "사진 폴더를 선택해주세요.")
             return
         
-        # API 키 검증
-        if is_pro_mode:
+        # API 키 검증 (단계 모드는 Flash 키와 Pro 키가 모두 필요, 로컬 백엔드는 재확인용 Pro 키만)
+        backend = self.backend_choices.get(self.backend_var.get(), 'gemini')
+        use_cascade = self.cascade_var.get() and not is_pro_mode
+        pro_api_key = self.pro_api_key_entry.get().strip() if use_cascade else None
+        if use_cascade and not pro_api_key:
+            tkinter.messagebox.showerror("오류", "단계 모드를 사용하려면 Pro API 키를 입력해주세요.")
+            return
+        if backend != 'gemini':
+            api_key = None
+        elif is_pro_mode:
             api_key = self.pro_api_key_entry.get().strip()
             if not api_key:
                 tkinter.messagebox.showerror("오류", "프리미엄 모드를 사용하려면 Pro API 키를 입력해주세요.")
@@ -446,25 +589,56 @@ class App(customtkinter.CTk):
         # v2.1 옵션들 수집
         report_options = {
             'format': self.report_format_var.get(),
-            'thumbnail_size': self.thumb_size_var.get()
+            'thumbnail_size': self.thumb_size_var.get(),
+            'thumbnail_format': 'webp' if self.webp_var.get() else 'jpeg'
         }
 
-        threading.Thread(target=self.run_logic_in_thread, args=(target_folder, api_key, self.location_entry.get(), report_options, is_pro_mode), daemon=True).start()
+        # 처리 방식 옵션들
+        run_options = {
+            'recursive': self.recursive_var.get(),
+            'prescan': self.prescan_var.get(),
+            'output_mode': self.output_mode_choices.get(self.output_mode_var.get(), 'copy'),
+            'output_layout': self.output_layout_choices.get(self.output_layout_var.get(), 'flat'),
+            'pipeline': self.pipeline_var.get(),
+            'memory_budget_mb': 1024 if self.pipeline_var.get() and self.low_memory_var.get() else None,
+            'subject_crop': self.subject_crop_var.get(),
+            'progressive': self.progressive_var.get(),
+            'cascade': use_cascade,
+            'offline': self.offline_var.get(),
+            'hedge': self.hedge_var.get(),
+            'profile': self.profile_var.get(),
+            'quota': self.quota_var.get(),
+            'quota_ledger': os.path.join(self.get_config_folder(), quota.LEDGER_NAME),
+            # 장부 키는 각 모델을 만드는 API 키로 (프리미엄 모드는 기본 모델이 'pro', 단계 모드의 'pro'는 Pro 키)
+            'api_key_ids': {'pro' if is_pro_mode else 'flash': quota.key_id(api_key),
+                            **({'pro': quota.key_id(pro_api_key)} if pro_api_key else {})}
+        }
+
+        threading.Thread(target=self.run_logic_in_thread, args=(target_folder, api_key, self.location_entry.get(), report_options, is_pro_mode, run_options, pro_api_key, self.batch_var.get(), backend), daemon=True).start()
 
-    def run_logic_in_thread(self, target_folder, api_key, location, report_options, is_pro_mode):
+    def run_logic_in_thread(self, target_folder, api_key, location, report_options, is_pro_mode, run_options, pro_api_key=None, batch=False, backend='gemini'):
         try:
-            if is_pro_mode:
+            self.app_models['identifier'] = None
+            self.app_models['gemini'] = None
+            if backend != 'gemini':
+                self.log_to_gui("로컬 식별 모델을 불러옵니다...")
+                self.app_models['identifier'] = create_identifier(backend, self.onnx_model_path, self.onnx_labels_path)
+                self.log_to_gui(f"{self.app_models['identifier'].label} 준비 완료.")
+            elif is_pro_mode:
                 self.log_to_gui("🔥 프리미엄 모드: Gemini 2.5 Pro API를 설정합니다...")
-                genai.configure(api_key=api_key)
-                self.app_models['gemini'] = genai.GenerativeModel('gemini-2.5-pro-preview-06-05') 
+                self.app_models['gemini'] = create_gemini_model(api_key, PRO_MODEL_NAME)
                 self.log_to_gui("Gemini 2.5 Pro API 설정 완료.")
             else:
                 self.log_to_gui("Gemini 2.5 Flash API를 설정합니다...")
-                genai.configure(api_key=api_key)
-                self.app_models['gemini'] = genai.GenerativeModel('models/gemini-2.5-flash-preview-05-20')
+                self.app_models['gemini'] = create_gemini_model(api_key, FLASH_MODEL_NAME)
                 self.log_to_gui("Gemini 2.5 Flash API 설정 완료.")
+            self.app_models['pro_gemini'] = None
+            if pro_api_key:
+                self.log_to_gui("단계 모드: 재확인용 Gemini 2.5 Pro API를 설정합니다...")
+                self.app_models['pro_gemini'] = create_gemini_model(pro_api_key, PRO_MODEL_NAME)
+                self.log_to_gui("Gemini 2.5 Pro API 설정 완료.")
         except Exception as e:
-            self.log_to_gui(f"Gemini API 키 설정 오류: {e}")
+            self.log_to_gui(f"식별 모델 설정 오류: {e}")
             self.start_button.configure(state="normal", text="분류 시작")
             return
 
@@ -473,13 +647,20 @@ class App(customtkinter.CTk):
             "target_folder": target_folder,
             "log_callback": self.log_to_gui,
             "gemini_model": self.app_models.get('gemini'), 
+            "identifier": self.app_models.get('identifier'),
+            "pro_model": self.app_models.get('pro_gemini'),
             "wiki_wiki": self.app_models.get('wiki'),
             "csv_db": self.app_models.get('csv_db'),
+            "taxonomy_pack": self.app_models.get('taxonomy_pack'),
             "report_options": report_options,
-            "is_pro_mode": is_pro_mode
+            "is_pro_mode": is_pro_mode,
+            **run_options
         }
         try:
-            core_logic.process_all_images(config)
+            if batch:
+                core_logic.process_batch(config, core_logic.batch_folders(target_folder))
+            else:
+                core_logic.process_all_images(config)
         except Exception as e:
             self.log_to_gui(f"\n\n치명적인 오류 발생: {e}")
         finally:
@@ -499,5 +680,7 @@ class App(customtkinter.CTk):
             self.update_idletasks()
 
 if __name__ == "__main__":
+    # 파이프라인의 프로세스 풀이 PyInstaller 실행 파일에서도 동작하도록
+    multiprocessing.freeze_support()
     app = App()
     app.mainloop()
\ No newline at end of file
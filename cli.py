@@ -0,0 +1,140 @@
+# 파일 이름: cli.py
+"""
+GUI 없이 실행하는 명령줄 도구입니다. 서버나 여러 컴퓨터에서 같은 NAS 폴더를
+나눠 처리할 때 사용합니다 (`--distributed`: 출력 폴더의 공유 대기열로 사진을 나눠 가짐).
+
+    python cli.py 사진폴더 --api-key 키 [--distributed] [--pipeline] ...
+
+API 키는 `--api-key` 대신 환경 변수 GOOGLE_API_KEY로 줄 수 있습니다.
+"""
+
+from __future__ import annotations
+
+import argparse
+import multiprocessing
+import os
+import sys
+from typing import List
+
+import pandas as pd
+
+import core_logic
+import quota
+import taxonomy_pack
+import wiki_batch
+import work_queue
+from identifiers import BACKENDS, FLASH_MODEL_NAME, PRO_MODEL_NAME, create_gemini_model, create_identifier
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="AI 조류 사진 자동 분류 (명령줄)")
+    parser.add_argument('folder', help="사진 폴더 (--batch이면 날짜별 하위 폴더가 있는 상위 폴더)")
+    parser.add_argument('--api-key', default=os.environ.get('GOOGLE_API_KEY'), help="Google AI API 키 (기본: GOOGLE_API_KEY)")
+    parser.add_argument('--pro-api-key', default=os.environ.get('GOOGLE_PRO_API_KEY'),
+                        help="단계 모드에서 재확인에 쓸 Gemini 2.5 Pro API 키")
+    parser.add_argument('--location', default='South Korea', help="촬영 지역 (기본: South Korea)")
+    parser.add_argument('--backend', choices=BACKENDS, default='gemini',
+                        help="식별 백엔드 (onnx: 로컬 분류 모델, fake: 네트워크 없는 데모용)")
+    parser.add_argument('--onnx-model', help="--backend onnx의 모델 파일 (.onnx)")
+    parser.add_argument('--onnx-labels', help="--backend onnx의 클래스 목록 (클래스 순서대로 학명/영문명/목/과, CSV 또는 JSON)")
+    parser.add_argument('--pro', action='store_true', help="프리미엄 모드 (Gemini 2.5 Pro)")
+    parser.add_argument('--cascade', action='store_true', help="단계 모드 (Flash 우선, 불확실한 사진만 Pro)")
+    parser.add_argument('--offline', action='store_true', help="Wikipedia 대신 로컬 분류 자료로 이름 확정")
+    parser.add_argument('--recursive', action='store_true', help="하위 폴더 포함")
+    parser.add_argument('--prescan', action='store_true', help="EXIF 사전 스캔으로 촬영 순 처리 + 예상 소요 시간 (사진 목록을 먼저 모두 읽음)")
+    parser.add_argument('--batch', action='store_true', help="하위 폴더별 일괄 처리")
+    parser.add_argument('--pipeline', action='store_true', help="단계 파이프라인 (디코딩/식별/저장 동시 실행)")
+    parser.add_argument('--output-mode', choices=core_logic.OUTPUT_MODES, default='copy', help="출력 방식")
+    parser.add_argument('--layout', choices=core_logic.OUTPUT_LAYOUTS, default='flat', help="출력 폴더 구성")
+    parser.add_argument('--report', choices=('html', 'docx', 'both', 'none'), default='html', help="리포트 형식")
+    parser.add_argument('--rate-limit', type=float, help="분당 최대 API 요청 수 (작업자별)")
+    parser.add_argument('--distributed', action='store_true', help="여러 작업자가 공유 대기열로 나눠 처리")
+    parser.add_argument('--worker-id', help="작업자 이름 (기본: 호스트명-프로세스번호)")
+    parser.add_argument('--lease-seconds', type=float, default=work_queue.LEASE_SECONDS,
+                        help=f"임대 만료 시간(초), 이 시간 동안 갱신이 없으면 다른 작업자가 넘겨받음 (기본: {work_queue.LEASE_SECONDS})")
+    parser.add_argument('--quota', action='store_true',
+                        help="하루 할당량 적용 (한도에 닿으면 멈추고 남은 사진은 다음 실행에서 이어서 처리)")
+    parser.add_argument('--daily-requests', type=int, help="기본 모델의 하루 최대 요청 수 (기본: Flash 무료 한도)")
+    parser.add_argument('--daily-budget', type=float, help="Pro 모델의 하루 비용 한도 (USD)")
+    parser.add_argument('--quota-ledger', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config', quota.LEDGER_NAME),
+                        help="사용량 장부 파일 (기본: GUI와 같은 config 폴더)")
+    parser.add_argument('--profile', action='store_true', help="단계별 cProfile/tracemalloc 결과를 탐조기록 폴더에 저장")
+    parser.add_argument('--reprocess', action='store_true', help="이전 실행에서 처리를 마친 변경 없는 사진도 다시 식별")
+    return parser
+
+
+def main(argv: List[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    if not os.path.isdir(args.folder):
+        print(f"폴더를 찾을 수 없습니다: {args.folder}", file=sys.stderr)
+        return 2
+    # Gemini 키는 Gemini로 식별하거나 단계 모드로 Pro 재확인을 할 때만 필요
+    if not args.api_key and (args.backend == 'gemini' or args.cascade):
+        print("Google AI API 키가 필요합니다 (--api-key 또는 GOOGLE_API_KEY).", file=sys.stderr)
+        return 2
+    try:
+        identifier = create_identifier(args.backend, args.onnx_model, args.onnx_labels)
+    except (ValueError, ImportError) as e:
+        print(e, file=sys.stderr)
+        return 2
+
+    csv_db = None
+    pack = None
+    if os.path.exists(taxonomy_pack.DEFAULT_CSV):
+        csv_db = pd.read_csv(taxonomy_pack.DEFAULT_CSV, header=None, encoding='utf-8')
+        if args.offline:
+            pack = taxonomy_pack.load_or_build(taxonomy_pack.DEFAULT_CSV)
+    else:
+        print(f"CSV 파일 없음 ({taxonomy_pack.DEFAULT_CSV}). Wikipedia만 사용합니다.")
+
+    # Gemini 모델 → 그 모델을 만드는 API 키 (할당량 장부도 이 키로 셈; --pro이면 기본 모델 'pro'를 --api-key로 만듦)
+    primary = identifier.name if identifier is not None else ('pro' if args.pro else 'flash')
+    model_keys = {primary: args.api_key} if identifier is None else {}
+    if args.cascade and not args.pro:
+        model_keys['pro'] = args.pro_api_key or args.api_key
+    limits = {}
+    if args.daily_requests:
+        limits[primary] = {'per_day': args.daily_requests}
+    if args.daily_budget is not None:
+        limits.setdefault('pro', {})['daily_cost'] = args.daily_budget
+    if args.quota or limits:
+        os.makedirs(os.path.dirname(args.quota_ledger) or '.', exist_ok=True)
+    config = {
+        "photo_location": args.location,
+        "target_folder": args.folder,
+        "log_callback": print,
+        "gemini_model": create_gemini_model(model_keys[primary], PRO_MODEL_NAME if args.pro else FLASH_MODEL_NAME) if identifier is None else None,
+        "identifier": identifier,
+        "pro_model": create_gemini_model(model_keys['pro'], PRO_MODEL_NAME) if args.cascade and not args.pro else None,
+        "wiki_wiki": wiki_batch.WikiResolver(),
+        "csv_db": csv_db,
+        "taxonomy_pack": pack,
+        "report_options": {'format': args.report},
+        "is_pro_mode": args.pro,
+        'recursive': args.recursive,
+        'prescan': args.prescan,
+        'output_mode': args.output_mode,
+        'output_layout': args.layout,
+        'pipeline': args.pipeline,
+        'cascade': args.cascade,
+        'offline': args.offline,
+        'rate_limit_per_minute': args.rate_limit,
+        'distributed': args.distributed,
+        'worker_id': args.worker_id,
+        'lease_seconds': args.lease_seconds,
+        'profile': args.profile,
+        'skip_unchanged': not args.reprocess,
+        'quota': limits or args.quota,
+        'quota_ledger': args.quota_ledger,
+        'api_key_ids': {model: quota.key_id(key) for model, key in model_keys.items()},
+    }
+    if args.batch:
+        core_logic.process_batch(config, core_logic.batch_folders(args.folder))
+    else:
+        core_logic.process_all_images(config)
+    return 0
+
+
+if __name__ == '__main__':
+    multiprocessing.freeze_support()
+    sys.exit(main())
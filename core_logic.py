@@ -1,18 +1,40 @@
 # 파일 이름: core_logic.py (v2.1 - YOLO 제거, 원본 이미지 직접 사용)
 from __future__ import annotations
 
+import contextlib
+import errno
+import functools
+import hashlib
+import itertools
 import json
+import mmap
+import multiprocessing
 import os
 import re
 import shutil
+import sys
+import threading
 import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, List
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Tuple
 import io
 
 import pandas as pd
 from PIL import Image
 
+import exif_scan
+import identifiers
+import external_sort
+import name_index
+import pipeline
+import profiling
+import quota
+import subject_crop
+import taxonomy_pack
+import wiki_batch
+import work_queue
+
 # ---------------------- 유틸리티 ----------------------
 
 def sanitize_filename(name: str) -> str:
@@ -34,51 +56,485 @@ def get_photo_datetime(img: Image.Image):
         return None
 
 
-def resize_image_for_api(image_path: str, max_size_mb: int = 20) -> bytes:
+def _read_orientation(img: Image.Image) -> int | None:
+    if not hasattr(img, '_getexif'):
+        return None
+    exif = img._getexif()
+    return exif.get(274) if exif else None
+
+
+def apply_exif_orientation(img: Image.Image, orientation: int | None = None) -> Image.Image:
+    """EXIF orientation 값에 맞춰 이미지를 회전 (값을 모르면 이미지에서 읽음)"""
+    if orientation is None:
+        orientation = _read_orientation(img)
+    if orientation == 3:
+        return img.rotate(180, expand=True)
+    if orientation == 6:
+        return img.rotate(270, expand=True)
+    if orientation == 8:
+        return img.rotate(90, expand=True)
+    return img
+
+
+# 메모리 예산 모드에서 API 전송용 이미지를 디코딩할 최대 긴 변 길이
+MEMORY_MODE_MAX_DIMENSION = 3072
+
+
+def resize_image_for_api(image_path: str, max_size_mb: int = 20, max_dimension: int | None = None,
+                         orientation: int | None = None) -> bytes:
     """이미지를 API 전송용으로 리사이즈 (20MB 이하로만 제한)"""
+    return encode_image_for_api(load_image_for_api(image_path, max_dimension, orientation), max_size_mb)
+
+
+def load_image_for_api(image_path: str, max_dimension: int | None = None,
+                       orientation: int | None = None) -> Image.Image:
+    """API 전송용으로 이미지를 열어 회전을 바로잡은 RGB 이미지를 반환
+
+    `max_dimension`을 주면 JPEG 축소 디코딩(draft)으로 긴 변이 그 크기 근처가 되도록
+    처음부터 작게 풀고, 회전/변환도 줄인 이미지에서 하므로 메모리 사용량이 크게 줄어듭니다.
+    `orientation`을 이미 알고 있으면(사전 스캔) EXIF를 다시 파싱하지 않습니다.
+    """
     with Image.open(image_path) as img:
-        # EXIF orientation 처리
-        if hasattr(img, '_getexif'):
-            exif = img._getexif()
-            if exif and 274 in exif:
-                orientation = exif[274]
-                if orientation == 3:
-                    img = img.rotate(180, expand=True)
-                elif orientation == 6:
-                    img = img.rotate(270, expand=True)
-                elif orientation == 8:
-                    img = img.rotate(90, expand=True)
+        if max_dimension:
+            if orientation is None:
+                orientation = _read_orientation(img)
+            img.draft('RGB', (max_dimension, max_dimension))
+            if max(img.size) > max_dimension:
+                img.thumbnail((max_dimension, max_dimension), Image.Resampling.LANCZOS)
+            img = apply_exif_orientation(img, orientation)
+        else:
+            # EXIF orientation 처리
+            img = apply_exif_orientation(img, orientation)
         
         # RGB 변환
         if img.mode != 'RGB':
             img = img.convert('RGB')
+        img.load()
+        return img
+
+
+def encode_image_for_api(img: Image.Image, max_size_mb: int = 20) -> bytes:
+    """JPEG로 인코딩 (품질을 낮춰 가며 `max_size_mb` 이하로 맞춤)"""
+    # 품질을 조정하여 20MB 이하로 만들기
+    quality = 95
+    
+    while quality >= 60:
+        buffer = io.BytesIO()
+        img.save(buffer, format='JPEG', quality=quality, optimize=True)
         
-        # 품질을 조정하여 20MB 이하로 만들기
-        quality = 95
+        # 파일 크기 체크
+        size_mb = len(buffer.getvalue()) / (1024 * 1024)
         
-        while quality >= 60:
-            buffer = io.BytesIO()
-            img.save(buffer, format='JPEG', quality=quality, optimize=True)
-            
-            # 파일 크기 체크
-            size_mb = len(buffer.getvalue()) / (1024 * 1024)
-            
-            if size_mb <= max_size_mb:
-                return buffer.getvalue()
-            
-            quality -= 10
+        if size_mb <= max_size_mb:
+            return buffer.getvalue()
         
-        # 최종적으로 quality 60으로도 안되면 그대로 반환
-        buffer = io.BytesIO()
-        img.save(buffer, format='JPEG', quality=60, optimize=True)
-        return buffer.getvalue()
+        quality -= 10
+    
+    # 최종적으로 quality 60으로도 안되면 그대로 반환
+    buffer = io.BytesIO()
+    img.save(buffer, format='JPEG', quality=60, optimize=True)
+    return buffer.getvalue()
+
+
+def estimate_decode_bytes(image_path: str, max_dimension: int | None = None) -> int:
+    """사진 한 장을 디코딩·변환할 때 필요한 메모리 추정치 (헤더만 읽음)
+
+    축소 디코딩 배율(1/2, 1/4, 1/8)을 반영한 RGB 프레임 크기의 2배
+    (회전/변환 중 사본 하나)로 계산합니다.
+    """
+    try:
+        with Image.open(image_path) as img:
+            width, height = img.size
+    except Exception:
+        return 0
+    if max_dimension:
+        scale = 1
+        while scale < 8 and width // (scale * 2) >= max_dimension and height // (scale * 2) >= max_dimension:
+            scale *= 2
+        width, height = width // scale, height // scale
+    return width * height * 3 * 2
+
+
+def _windows_memory_counters():
+    import ctypes
+    from ctypes import wintypes
+
+    class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+        _fields_ = [('cb', wintypes.DWORD), ('PageFaultCount', wintypes.DWORD),
+                    ('PeakWorkingSetSize', ctypes.c_size_t), ('WorkingSetSize', ctypes.c_size_t),
+                    ('QuotaPeakPagedPoolUsage', ctypes.c_size_t), ('QuotaPagedPoolUsage', ctypes.c_size_t),
+                    ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t), ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+                    ('PagefileUsage', ctypes.c_size_t), ('PeakPagefileUsage', ctypes.c_size_t)]
+
+    counters = PROCESS_MEMORY_COUNTERS()
+    counters.cb = ctypes.sizeof(counters)
+    handle = ctypes.windll.kernel32.GetCurrentProcess()
+    if ctypes.windll.psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+        return counters
+    return None
+
+
+def peak_memory_bytes() -> Dict[str, int]:
+    """프로그램 시작 이후 현재 프로세스와 (종료된) 자식 프로세스의 최대 상주 메모리(RSS)
+
+    운영체제가 주는 프로세스 전체 기간의 최댓값이므로 실행별 값은 `RunMemoryMonitor`로 측정합니다.
+    """
+    if os.name == 'nt':
+        counters = _windows_memory_counters()
+        return {'self': counters.PeakWorkingSetSize if counters else 0, 'children': 0}
+
+    import resource
+    unit = 1 if sys.platform == 'darwin' else 1024  # macOS는 바이트, Linux는 KB 단위
+    return {
+        'self': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * unit,
+        'children': resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * unit,
+    }
+
+
+def current_rss_bytes(pid: int | None = None) -> int | None:
+    """프로세스의 현재 상주 메모리(RSS). 지원하지 않는 환경이면 None
+
+    Linux는 /proc, Windows는 현재 프로세스만 (`pid`를 주면 None) 지원합니다.
+    """
+    if os.name == 'nt':
+        if pid is not None:
+            return None
+        counters = _windows_memory_counters()
+        return counters.WorkingSetSize if counters else None
+    try:
+        with open(f"/proc/{pid or 'self'}/statm", 'rb') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _report_worker_pid(pids):
+    """(디코딩 프로세스 시작 시) 자기 PID를 풀에 알림"""
+    pids.put(os.getpid())
+
+
+class DecodePool(ProcessPoolExecutor):
+    """작업자 프로세스가 시작할 때 PID를 알려 주는 디코딩 프로세스 풀 (메모리 측정용)"""
+
+    def __init__(self, max_workers: int):
+        self._pid_reports = multiprocessing.SimpleQueue()
+        self._pid_lock = threading.Lock()
+        self._worker_pid_set: set = set()
+        super().__init__(max_workers=max_workers, initializer=_report_worker_pid, initargs=(self._pid_reports,))
+
+    def worker_pids(self) -> List[int]:
+        """지금까지 시작한 작업자 프로세스의 PID (종료된 프로세스 포함)"""
+        with self._pid_lock:
+            while not self._pid_reports.empty():
+                self._worker_pid_set.add(self._pid_reports.get())
+            return sorted(self._worker_pid_set)
+
+
+class RunMemoryMonitor:
+    """실행 하나 동안의 최대 상주 메모리를 주기적으로 측정
+
+    `start()` 시점부터 다시 재므로 GUI에서 여러 번 실행하거나 일괄 처리의 다음 폴더가
+    앞선 실행의 최댓값을 물려받지 않습니다. `pool`(DecodePool)을 주면 디코딩
+    프로세스들의 RSS 합도 함께 잽니다. 현재 RSS를 읽을 수 없는 환경이면 `supported`가 False입니다.
+    """
+
+    def __init__(self, pool=None, interval: float = 0.25):
+        self.pool = pool
+        self.interval = interval
+        self.peak = {'self': 0, 'children': 0}
+        self.supported = current_rss_bytes() is not None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _child_pids(self) -> List[int]:
+        return self.pool.worker_pids() if self.pool is not None else []
+
+    def sample(self):
+        own = current_rss_bytes()
+        if own is None:
+            return
+        children = sum(current_rss_bytes(pid) or 0 for pid in self._child_pids())
+        self.peak['self'] = max(self.peak['self'], own)
+        self.peak['children'] = max(self.peak['children'], children)
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def start(self):
+        if not self.supported:
+            return
+        self.peak = {'self': 0, 'children': 0}
+        self.sample()
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> Dict[str, int]:
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+            self.sample()
+        return dict(self.peak)
+
+# --------------------- 폴더 스캔 ---------------------
+
+SOURCE_EXT = ('.jpg', '.jpeg')
+RAW_EXT = ('.orf','.cr2','.cr3','.nef','.arw','.dng','.raf','.rw2')
+OUTPUT_DIR_NAME = 'processed_birds_final'
+
+
+class SourceImage(NamedTuple):
+    path: str               # JPEG 원본 경로
+    raw_path: str | None    # 같은 이름의 RAW 파일 경로 (없으면 None)
+    rel_path: str           # 대상 폴더 기준 상대 경로 (로그 표시용)
+    exif: exif_scan.ExifHeader | None = None  # 사전 스캔한 EXIF 헤더 (없으면 처리 시 읽음)
+
+
+def scan_source_images(src_dir: str, recursive: bool = False) -> Iterator[SourceImage]:
+    """대상 폴더의 JPEG와 짝이 되는 RAW 파일을 차례로 내보내는 제너레이터
+
+    폴더마다 `os.scandir`를 한 번만 호출하고, 그 결과로 대소문자 구분 없는
+    파일명(stem) 색인을 만들어 RAW 짝을 찾으므로 추가 파일 시스템 조회가 없습니다.
+    `recursive`이면 하위 폴더도 탐색하되 출력 폴더와 숨김 폴더는 건너뜁니다.
+    """
+    pending = [src_dir]
+    while pending:
+        directory = pending.pop(0)
+        images = []
+        raw_index: Dict[str, Dict[str, str]] = {}
+        subdirs = []
+        try:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    name = entry.name
+                    if entry.is_dir(follow_symlinks=False):
+                        if recursive and name != OUTPUT_DIR_NAME and not name.startswith('.'):
+                            subdirs.append(entry.path)
+                        continue
+                    stem, ext = os.path.splitext(name)
+                    ext = ext.lower()
+                    if ext in SOURCE_EXT:
+                        images.append(name)
+                    elif ext in RAW_EXT:
+                        raw_index.setdefault(stem.casefold(), {})[ext] = name
+        except OSError:
+            continue
+        
+        for name in sorted(images):
+            raws = raw_index.get(os.path.splitext(name)[0].casefold(), {})
+            raw_name = next((raws[ext] for ext in RAW_EXT if ext in raws), None)
+            path = os.path.join(directory, name)
+            yield SourceImage(
+                path=path,
+                raw_path=os.path.join(directory, raw_name) if raw_name else None,
+                rel_path=os.path.relpath(path, src_dir),
+            )
+        pending.extend(sorted(subdirs))
+
+# --------------------- 파일 출력 ---------------------
+
+# 출력 방식: 복사(기본), 하드링크, 리플링크(copy-on-write 복제), 이동
+OUTPUT_MODES = ('copy', 'hardlink', 'reflink', 'move')
+_FICLONE = 0x40049409  # Linux ioctl (Btrfs, XFS 등)
+
+
+def _reflink(src: str, dst: str):
+    """파일 시스템의 copy-on-write 복제 (지원하지 않으면 OSError)"""
+    if sys.platform.startswith('linux'):
+        import fcntl
+        with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+            try:
+                fcntl.ioctl(fdst.fileno(), _FICLONE, fsrc.fileno())
+            except OSError:
+                fdst.close()
+                os.remove(dst)
+                raise
+    elif sys.platform == 'darwin':
+        import ctypes
+        import ctypes.util
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        if libc.clonefile(os.fsencode(src), os.fsencode(dst), 0) != 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err), dst)
+    else:
+        raise OSError(errno.ENOTSUP, "reflink 미지원 플랫폼", dst)
+    shutil.copystat(src, dst)
+
+
+def place_file(src: str, dst: str, mode: str = 'copy') -> Tuple[str, int]:
+    """출력 방식에 따라 파일을 배치하고 (실제 사용한 방식, 실제로 기록한 바이트 수)를 반환
+
+    하드링크/리플링크가 불가능하면(다른 장치, 미지원 파일 시스템) 복사로,
+    다른 장치로의 이동은 복사 후 삭제로 안전하게 대체합니다.
+    """
+    if mode == 'hardlink':
+        try:
+            try:
+                os.link(src, dst)
+            except FileExistsError:
+                os.remove(dst)
+                os.link(src, dst)
+            return 'hardlink', 0
+        except OSError:
+            pass
+    elif mode == 'reflink':
+        try:
+            if os.path.exists(dst):
+                os.remove(dst)
+            _reflink(src, dst)
+            return 'reflink', 0
+        except OSError:
+            pass
+    elif mode == 'move':
+        try:
+            os.replace(src, dst)
+            return 'move', 0
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+        # 다른 장치: 복사 후 원본 삭제
+        shutil.copy2(src, dst)
+        os.remove(src)
+        return 'move', os.path.getsize(dst)
+    
+    shutil.copy2(src, dst)
+    return 'copy', os.path.getsize(dst)
+
+
+class OutputNameRegistry:
+    """출력 폴더의 파일명을 메모리에서 관리하여 충돌 없는 이름을 발급
+
+    폴더마다 처음 사용할 때 한 번만 목록을 읽고, 이후에는 `os.path.exists`
+    조회 없이 `{base}.jpg`, `{base}_1.jpg`, `{base}_2.jpg` ... 순서로 빈 이름을
+    발급합니다. 이름별 다음 번호를 기억하므로 같은 이름이 몰려도 발급은 O(1)이며,
+    여러 작업 스레드가 동시에 사용해도 같은 이름이 두 번 나가지 않습니다.
+    대소문자만 다른 이름은 같은 이름으로 취급합니다 (Windows/macOS 기준).
+    
+    `claims`(work_queue.NameClaims)를 주면 여러 컴퓨터가 같은 출력 폴더에 쓸 때
+    공유 폴더의 선점 파일로 이름을 확정하며, `owner`(사진)가 이미 선점한 이름은 다시 발급합니다.
+    """
+    
+    def __init__(self, claims=None):
+        self.claims = claims
+        self._names: Dict[str, set] = {}
+        self._next: Dict[Tuple[str, str, str], int] = {}
+        self._lock = threading.Lock()
+    
+    def _dir_names(self, directory: str) -> set:
+        names = self._names.get(directory)
+        if names is None:
+            names = set()
+            try:
+                with os.scandir(directory) as it:
+                    for entry in it:
+                        names.add(entry.name.casefold())
+            except FileNotFoundError:
+                pass
+            self._names[directory] = names
+        return names
+    
+    def reserve(self, directory: str, base_name: str, ext: str = '.jpg', owner: str | None = None) -> str:
+        """`directory` 안에서 아직 쓰이지 않은 파일명을 발급하고 사용 중으로 등록"""
+        with self._lock:
+            names = self._dir_names(directory)
+            key = (directory, base_name.casefold(), ext.casefold())
+            counter = 0 if self.claims else self._next.get(key, 0)
+            while True:
+                candidate = f"{base_name}{ext}" if counter == 0 else f"{base_name}_{counter}{ext}"
+                if self.claims is not None:
+                    # 이전 시도(중단된 작업자 포함)에서 이 사진이 선점한 이름이면 그대로 다시 사용
+                    claimed_by = self.claims.owner(directory, candidate)
+                    if (claimed_by is not None and claimed_by == owner) or (claimed_by is None and candidate.casefold() not in names
+                                                and self.claims.claim(directory, candidate, owner)):
+                        break
+                elif candidate.casefold() not in names:
+                    break
+                counter += 1
+            names.add(candidate.casefold())
+            self._next[key] = counter + 1
+            return candidate
+    
+    def ensure_directory(self, directory: str):
+        """처음 쓰는 폴더만 생성 (이후에는 파일 시스템 조회 없음)"""
+        with self._lock:
+            if directory in self._names:
+                return
+        os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            self._dir_names(directory)
+    
+    def add(self, directory: str, filename: str):
+        """직접 정한 파일명(RAW 짝 등)을 사용 중으로 등록"""
+        with self._lock:
+            self._dir_names(directory).add(filename.casefold())
+
+
+# 출력 폴더 구성: 단일 폴더(기본), 날짜별, 분류(목/과/종)별, 날짜+종별
+OUTPUT_LAYOUTS = ('flat', 'date', 'species', 'date_species')
+UNKNOWN_SEGMENT = '미확인'  # 이름에서 폴더명으로 쓸 글자가 남지 않을 때의 폴더
+
+
+def _path_segment(name: str | None) -> str:
+    """폴더 이름 하나 (문장 부호뿐이거나 '.', '..'처럼 비거나 위로 올라가는 이름은 UNKNOWN_SEGMENT)"""
+    segment = sanitize_filename(name)
+    return segment if segment.strip('.') else UNKNOWN_SEGMENT
+
+
+def output_subdir(layout: str, dt: datetime | None, order: str, family: str, korean: str, common: str) -> str:
+    """출력 구성에 따른 관찰 기록의 하위 폴더 (출력 폴더 기준 상대 경로, 단일 폴더는 '')
+
+    예) date: `2025/06-19`, species: `Passeriformes/Paridae/박새`,
+        date_species: `2025/06-19/박새`
+    """
+    if layout not in OUTPUT_LAYOUTS or layout == 'flat':
+        return ''
+    parts = []
+    if layout in ('date', 'date_species'):
+        parts += [dt.strftime('%Y'), dt.strftime('%m-%d')] if dt else ['날짜미상']
+    if layout in ('species', 'date_species'):
+        if layout == 'species':
+            parts += [_path_segment(order) if order != 'N/A' else '미분류',
+                      _path_segment(family) if family != 'N/A' else '미분류']
+        parts.append(_path_segment(common if (korean or '').startswith('*') else korean))
+    return '/'.join(parts)
+
+
+def observation_relpath(obs_data: Dict) -> str:
+    """관찰 기록 파일의 출력 폴더 기준 상대 경로 (항상 '/' 구분, 빈 폴더 단계는 건너뜀)"""
+    parts = [p for p in (obs_data.get('rel_dir') or '').split('/') if p]
+    return '/'.join(parts + [obs_data['new_filename']])
+
+
+def format_bytes(size: float) -> str:
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if size < 1024:
+            return f"{size:.0f}{unit}" if unit == 'B' else f"{size:.1f}{unit}"
+        size /= 1024
+    return f"{size:.1f}TB"
 
 # ------------------ 외부 데이터 조회 ------------------
 
 def wiki_lookup(wiki, common: str | None, sci: str | None, log):
+    """Wikipedia에서 영문명(없으면 학명)으로 문서를 찾아 한국어/영문 이름을 반환
+
+    `wiki`는 `wiki_batch.WikiResolver`(영문명·학명을 한 요청으로 일괄 조회) 또는
+    `wikipediaapi.Wikipedia`입니다.
+    """
     if not common:
         return None
     log(f"  - Wikipedia에서 '{common}' 검색 중...")
+    if isinstance(wiki, wiki_batch.WikiResolver):
+        found = wiki.resolve([common, sci])
+        info = found.get(common)
+        if info is None and sci:
+            log(f"  - 영문명 실패, 학명 '{sci}'로 재검색...")
+            info = found.get(sci)
+        if info:
+            log(f"  - Wikipedia 찾음: {info['korean_name']} | {info['common_name']}")
+            return info
+        log("  - Wikipedia 결과 없음.")
+        return None
     page = wiki.page(common)
     if not page.exists() and sci:
         log(f"  - 영문명 실패, 학명 '{sci}'로 재검색...")
@@ -92,25 +548,82 @@ def wiki_lookup(wiki, common: str | None, sci: str | None, log):
     return None
 
 
-def csv_lookup(csv_df: pd.DataFrame | None, sci: str | None, log):
+def pack_lookup(pack: taxonomy_pack.TaxonomyPack, common: str | None, sci: str | None, log):
+    """(오프라인) 로컬 분류 자료에서 학명/영문명으로 이름 조회. `wiki_lookup`과 같은 형식으로 반환"""
+    record = pack.lookup(sci, common)
+    if record is None:
+        log("  - 분류 자료에 없음.")
+        return None
+    en = record.get('common_name') or common or record['scientific_name']
+    info = {"korean_name": record.get('korean_name') or f"*{en}", "common_name": en,
+            "scientific_name": record['scientific_name'], "source": '분류 자료'}
+    for key in ('order', 'family'):
+        if record.get(key):
+            info[key] = record[key]
+    log(f"  - 분류 자료 찾음: {info['korean_name']} | {en}")
+    return info
+
+
+# CSV 학명 근사 일치를 받아들일 최대 편집 거리 (0이면 끔, 1까지만 허용)
+FUZZY_MAX_DISTANCE = 0
+
+
+def check_fuzzy_distance(max_distance: int) -> int:
+    """설정한 근사 일치 거리를 확인 (0 또는 1이 아니면 ValueError)"""
+    if not isinstance(max_distance, int) or not 0 <= max_distance <= name_index.MAX_FUZZY_DISTANCE:
+        raise ValueError(f"fuzzy_max_distance는 0(끔) 또는 {name_index.MAX_FUZZY_DISTANCE}이어야 합니다: {max_distance!r} "
+                         f"(같은 속의 종은 두 글자 차이인 경우가 많아 더 큰 거리는 지원하지 않음)")
+    return max_distance
+
+
+def _csv_exact(csv_df: pd.DataFrame, sci: str, log) -> Tuple[str, str] | None:
+    """CSV에서 학명이 정확히 같은(대소문자 무시) 행의 (국명, CSV 학명)"""
+    if "학명" in csv_df.columns and "국명" in csv_df.columns:
+        mask = csv_df["학명"].str.strip().str.lower() == sci.strip().lower()
+        if mask.any():
+            row = csv_df.loc[mask].iloc[0]
+            log("  - CSV 일치 항목 발견! (컬럼명 방식)")
+            return row["국명"], str(row["학명"]).strip()
+    
+    elif len(csv_df.columns) >= 3:
+        sci_col = csv_df.iloc[:, 2].astype(str).str.strip().str.lower()
+        mask = sci_col == sci.strip().lower()
+        if mask.any():
+            row = mask.idxmax()
+            log("  - CSV 일치 항목 발견! (인덱스 방식)")
+            return csv_df.iloc[row, 1], str(csv_df.iloc[row, 2]).strip()
+    return None
+
+
+def csv_lookup(csv_df: pd.DataFrame | None, sci: str | None, log,
+               index: name_index.NameIndex | None = None, max_distance: int = 0):
+    """CSV에서 학명으로 국명 조회
+
+    정확 일치가 없으면 아종 삼명을 이명으로 줄여 다시 찾고(항상), 그래도 없고
+    `index`가 있으면 편집 거리 `max_distance`(0 또는 1) 이하에서 하나뿐인 가장 가까운
+    학명을 찾습니다. 고쳐서 찾은 경우에는 CSV의 학명과 거리를 함께 반환합니다.
+    """
     if csv_df is None or not sci:
         return None
     
     try:
-        if "학명" in csv_df.columns and "국명" in csv_df.columns:
-            mask = csv_df["학명"].str.strip().str.lower() == sci.strip().lower()
-            if mask.any():
-                ko = csv_df.loc[mask, "국명"].iloc[0]
-                log("  - CSV 일치 항목 발견! (컬럼명 방식)")
-                return {"korean_name": ko}
+        found = _csv_exact(csv_df, sci, log)
+        if found:
+            return {"korean_name": found[0]}
+        
+        # 아종 삼명(예: Ardea alba modesta)은 CSV의 이명으로 찾음
+        short = name_index.binomial(sci.strip())
+        if short != ' '.join(sci.split()):
+            found = _csv_exact(csv_df, short, log)
+            if found:
+                log(f"  - 아종 학명을 이명으로 줄여 찾음: '{sci}' → {found[1]}")
+                return {"korean_name": found[0], "scientific_name": found[1], "distance": 0}
         
-        elif len(csv_df.columns) >= 3:
-            sci_col = csv_df.iloc[:, 2].astype(str).str.strip().str.lower()
-            mask = sci_col == sci.strip().lower()
-            if mask.any():
-                ko = csv_df.iloc[mask.idxmax(), 1]
-                log("  - CSV 일치 항목 발견! (인덱스 방식)")
-                return {"korean_name": ko}
+        if index is not None and max_distance > 0:
+            match = index.lookup(sci, max_distance)
+            if match:
+                log(f"  - CSV 근사 일치: '{sci}' → {match.name} (편집 거리 {match.distance})")
+                return {"korean_name": match.korean, "scientific_name": match.name, "distance": match.distance}
         
         log(f"  - CSV에서 '{sci}' 찾지 못함")
         return None
@@ -121,7 +634,8 @@ def csv_lookup(csv_df: pd.DataFrame | None, sci: str | None, log):
 
 # -------------- 이름 보완(위키→CSV→Gemini) --------------
 
-def resolve_names(res: Dict, wiki_info, csv_df, log):
+def resolve_names(res: Dict, wiki_info, csv_df, log, index: name_index.NameIndex | None = None,
+                  max_distance: int = 0):
     common = res.get('common_name') or 'N/A'
     sci    = res.get('scientific_name') or 'N/A'
     order  = res.get('order')  or 'N/A'
@@ -131,21 +645,26 @@ def resolve_names(res: Dict, wiki_info, csv_df, log):
     if wiki_info:
         common = wiki_info.get('common_name', common)
         korean = wiki_info.get('korean_name', korean)
-        src = 'Wikipedia'
+        sci = wiki_info.get('scientific_name', sci)
+        order = wiki_info.get('order', order)
+        family = wiki_info.get('family', family)
+        src = wiki_info.get('source', 'Wikipedia')
         
         if korean.startswith('*'):
             log("  - Wikipedia 한국명 없음, CSV 보완 시도...")
-            csv_info = csv_lookup(csv_df, sci, log)
+            csv_info = csv_lookup(csv_df, sci, log, index, max_distance)
             if csv_info:
                 korean = csv_info['korean_name']
+                sci = csv_info.get('scientific_name', sci)
                 src = 'Wikipedia+CSV'
                 csv_used = True
     
     if not wiki_info or korean == 'N/A' or korean.startswith('*'):
         log("  - CSV에서 직접 조회...")
-        csv_info = csv_lookup(csv_df, sci, log)
+        csv_info = csv_lookup(csv_df, sci, log, index, max_distance)
         if csv_info:
             korean = csv_info['korean_name']
+            sci = csv_info.get('scientific_name', sci)
             if not wiki_info:
                 src = 'CSV'
             else:
@@ -161,84 +680,409 @@ def resolve_names(res: Dict, wiki_info, csv_df, log):
     
     return korean, common, sci, order, family, src, csv_used
 
+# ---------------------- 내용 지문 ----------------------
+FINGERPRINT_INDEX_NAME = 'fingerprint_index.json'
+FINGERPRINT_CHUNK = 8 * 1024 * 1024    # 네트워크 공유 폴더에서도 요청 수가 적도록 큰 단위로 순차 읽기
+MMAP_MIN_BYTES = 16 * 1024 * 1024      # 이보다 큰 파일(RAW 등)은 메모리 매핑으로 복사 없이 해시
+
+
+def content_fingerprint(path: str, chunk_size: int = FINGERPRINT_CHUNK) -> str:
+    """파일 내용의 해시 (이름이 재사용된 다른 사진을 구별하기 위한 지문)
+
+    큰 파일은 mmap으로, 나머지는 재사용하는 버퍼에 큰 단위로 읽어 해시합니다.
+    (읽는 방식과 관계없이 같은 내용이면 같은 값)
+    """
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size >= MMAP_MIN_BYTES:
+            try:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    if hasattr(mmap, 'MADV_SEQUENTIAL'):
+                        mm.madvise(mmap.MADV_SEQUENTIAL)
+                    digest = hashlib.blake2b(digest_size=16)
+                    with memoryview(mm) as view:
+                        for offset in range(0, size, chunk_size):
+                            digest.update(view[offset:offset + chunk_size])
+                    return digest.hexdigest()
+            except (OSError, ValueError):
+                f.seek(0)  # mmap을 지원하지 않는 파일 시스템은 일반 읽기로
+        
+        digest = hashlib.blake2b(digest_size=16)
+        buffer = bytearray(max(1, min(chunk_size, size)))
+        with memoryview(buffer) as view:
+            while True:
+                n = f.readinto(buffer)
+                if not n:
+                    break
+                digest.update(view[:n])
+    return digest.hexdigest()
+
+
+def _record_output_path(out_dir: str, record: Dict) -> str:
+    return os.path.join(out_dir, record.get('rel_dir') or '', record['new_filename'])
+
+
+class FingerprintIndex:
+    """내용 지문 캐시: (경로, 크기, 수정 시각, inode)가 그대로인 파일은 다시 읽지 않음
+
+    `path`를 주면 JSON으로 읽고 저장하여 다음 실행에서도 재사용합니다.
+    `stats`에 캐시 적중/실패 수와 실제로 해시한 바이트 수를 모읍니다.
+    처리를 마친 원본 사진의 내용 키와 관찰 기록도 함께 저장하여(`done`), 다시 실행할 때
+    내용이 바뀌지 않은 사진은 식별하지 않고 이전 기록을 씁니다.
+    """
+    
+    VERSION = 1
+    
+    def __init__(self, path: str | None = None):
+        self.path = path
+        self.entries: Dict[str, List] = {}   # 절대 경로 → [크기, 수정 시각(ns), inode, 지문]
+        self.done: Dict[str, Dict] = {}      # 원본 사진 내용 키(JPEG+RAW 지문) → 관찰 기록 (work_queue.encode_record)
+        self.stats = {'hits': 0, 'misses': 0, 'bytes_hashed': 0}
+        self._dirty = False
+        self._lock = threading.Lock()
+        if path:
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if data.get('version') == self.VERSION:
+                    self.entries = data.get('entries', {})
+                    self.done = data.get('done', {})
+            except (OSError, ValueError):
+                pass
+    
+    def fingerprint(self, path: str, st: os.stat_result | None = None) -> str:
+        st = st or os.stat(path)
+        key = os.path.abspath(path)
+        stamp = [st.st_size, st.st_mtime_ns, st.st_ino]
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry and entry[:3] == stamp:
+                self.stats['hits'] += 1
+                return entry[3]
+        content = content_fingerprint(path)
+        with self._lock:
+            self.entries[key] = stamp + [content]
+            self.stats['misses'] += 1
+            self.stats['bytes_hashed'] += st.st_size
+            self._dirty = True
+        return content
+    
+    def source_key(self, source: SourceImage) -> str:
+        """원본 사진의 내용 키 (JPEG 지문, RAW가 있으면 RAW 지문도 이어 붙임)"""
+        key = self.fingerprint(source.path)
+        if source.raw_path:
+            key += '+' + self.fingerprint(source.raw_path)
+        return key
+    
+    def previous_record(self, key: str, out_dir: str) -> Dict | None:
+        """이전 실행에서 처리를 마친 사진의 관찰 기록 (출력 파일이 사라졌으면 None)"""
+        with self._lock:
+            record = self.done.get(key)
+        if record is None or not os.path.exists(_record_output_path(out_dir, record)):
+            return None
+        return record
+    
+    def mark_done(self, key: str, record: Dict):
+        with self._lock:
+            self.done[key] = record
+            self._dirty = True
+    
+    def prune(self, out_dir: str) -> int:
+        """사라진 파일의 지문과 출력 파일이 사라진 처리 기록을 지움 (지운 수 반환)"""
+        with self._lock:
+            gone = [path for path in self.entries if not os.path.exists(path)]
+            lost = [key for key, record in self.done.items() if not os.path.exists(_record_output_path(out_dir, record))]
+            for path in gone:
+                del self.entries[path]
+            for key in lost:
+                del self.done[key]
+            if gone or lost:
+                self._dirty = True
+        return len(gone) + len(lost)
+    
+    def hit_ratio(self) -> float:
+        total = self.stats['hits'] + self.stats['misses']
+        return self.stats['hits'] / total if total else 0.0
+    
+    def save(self):
+        if not self.path or not self._dirty:
+            return
+        with self._lock:
+            data = {'version': self.VERSION, 'entries': dict(self.entries), 'done': dict(self.done)}
+            self._dirty = False
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+
 # --------------------- 썸네일 이미지 생성 ---------------------
 
-def create_thumbnail_images(observations: List[Dict], out_dir: str, thumbnail_dir: str, log):
-    """원본 이미지의 썸네일들을 생성하여 저장"""
+# 한 번의 디코딩으로 만드는 썸네일 크기들: 이름 → (최대 가로, 최대 세로)
+# '1024'는 사용자용 썸네일, 150/250/400은 HTML 리포트(소형/중형/대형)용,
+# 'word'는 Word 셀(1.5인치 × 150dpi)에 맞춘 가로 225px 이미지입니다.
+THUMBNAIL_VARIANTS = {
+    '1024': (1024, 1024),
+    '400': (400, 400),
+    '250': (250, 250),
+    '150': (150, 150),
+    'word': (225, None),
+}
+THUMBNAIL_QUALITY = {'1024': 90, 'word': 80}
+THUMBNAIL_DEFAULT_QUALITY = 85
+THUMBNAIL_INDEX_NAME = 'thumbnail_index.json'
+
+
+def thumbnail_filename(base_name: str, variant: str, image_format: str = 'jpeg') -> str:
+    """썸네일 파일명 규칙 (1024px는 기존 `_thumb.jpg` 이름 유지, Word용은 항상 JPEG)"""
+    ext = 'webp' if image_format == 'webp' and variant != 'word' else 'jpg'
+    if variant == '1024':
+        return f"{base_name}_thumb.{ext}"
+    return f"{base_name}_thumb_{variant}.{ext}"
+
+
+def _thumbnail_entry_state(entry: Dict | None, src_path: str, thumbnail_dir: str, image_format: str,
+                           fingerprint=None):
+    """썸네일 인덱스 항목의 유효성 판단
+
+    반환값은 (상태, 원본 stat, 내용 지문)이며 상태는 'valid', 'touched'(내용은 같고
+    stat만 바뀜), 'stale' 중 하나입니다. 내용 해시는 stat이 달라졌을 때만 계산합니다.
+    """
+    st = os.stat(src_path)
+    if not entry or entry.get('format') != image_format or not all(
+            os.path.exists(os.path.join(thumbnail_dir, name)) for name in entry.get('variants', {}).values()):
+        return 'stale', st, None
+    if entry.get('size') == st.st_size and entry.get('mtime_ns') == st.st_mtime_ns:
+        return 'valid', st, entry.get('content')
+    content = fingerprint(src_path, st) if fingerprint else content_fingerprint(src_path)
+    if entry.get('size') == st.st_size and entry.get('content') == content:
+        return 'touched', st, content
+    return 'stale', st, content
+
+
+def _remove_thumbnail_files(thumbnail_dir: str, filenames):
+    removed = 0
+    for name in filenames:
+        try:
+            os.remove(os.path.join(thumbnail_dir, name))
+            removed += 1
+        except FileNotFoundError:
+            pass
+    return removed
+
+
+def collect_orphan_thumbnails(index: Dict, out_dir: str, thumbnail_dir: str) -> int:
+    """원본이 사라진 썸네일을 인덱스와 폴더에서 정리하고 삭제한 파일 수를 반환"""
+    removed = 0
+    for relpath in [key for key in index if not os.path.exists(os.path.join(out_dir, key))]:
+        removed += _remove_thumbnail_files(thumbnail_dir, index.pop(relpath).get('variants', {}).values())
+    
+    # 인덱스 이전 버전이 남긴 썸네일 중 원본이 없는 것도 정리
+    known = {name for entry in index.values() for name in entry.get('variants', {}).values()}
+    thumb_pattern = re.compile(r'^(?P<base>.+)_thumb(?:_[0-9a-z]+)?\.(?:jpg|webp)$')
+    for dirpath, _, filenames in os.walk(thumbnail_dir):
+        rel_dir = os.path.relpath(dirpath, thumbnail_dir).replace(os.sep, '/')
+        rel_dir = '' if rel_dir == '.' else rel_dir
+        for name in filenames:
+            m = thumb_pattern.match(name)
+            rel_name = f"{rel_dir}/{name}" if rel_dir else name
+            if not m or rel_name in known:
+                continue
+            if not os.path.exists(os.path.join(out_dir, rel_dir, f"{m.group('base')}.jpg")):
+                removed += _remove_thumbnail_files(thumbnail_dir, [rel_name])
+    return removed
+
+
+def _load_thumbnail_index(thumbnail_dir: str) -> Dict:
+    try:
+        with open(os.path.join(thumbnail_dir, THUMBNAIL_INDEX_NAME), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_thumbnail_index(thumbnail_dir: str, index: Dict):
+    path = os.path.join(thumbnail_dir, THUMBNAIL_INDEX_NAME)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, path)
+
+
+def build_thumbnail_pyramid(src_path: str, thumbnail_dir: str, base_name: str, image_format: str = 'jpeg',
+                            rel_dir: str = '') -> Dict[str, str]:
+    """원본을 한 번만 디코딩하여 모든 크기의 썸네일을 생성하고 {크기: 상대 경로}를 반환"""
+    variants = {}
+    os.makedirs(os.path.join(thumbnail_dir, rel_dir), exist_ok=True)
+    with Image.open(src_path) as img:
+        # JPEG는 축소 디코딩으로 필요한 최대 크기 근처까지만 풀기
+        img.draft('RGB', THUMBNAIL_VARIANTS['1024'])
+        img = apply_exif_orientation(img)
+        if img.mode != 'RGB':
+            img = img.convert('RGB')
+        
+        # 큰 크기부터 차례로 줄여 나가며 저장 (각 단계는 바로 앞 결과에서 축소)
+        resized_images = {}
+        current = img
+        for variant, (max_w, max_h) in THUMBNAIL_VARIANTS.items():
+            if max_h is None:
+                # Word용: 가로 기준으로만 맞춤 (1024 썸네일에서 축소)
+                source = resized_images['1024']
+                if source.width > max_w:
+                    height = max(1, round(source.height * max_w / source.width))
+                    resized = source.resize((max_w, height), Image.Resampling.LANCZOS)
+                else:
+                    resized = source
+            else:
+                resized = current.copy()
+                resized.thumbnail((max_w, max_h), Image.Resampling.LANCZOS)
+                current = resized
+            resized_images[variant] = resized
+            
+            filename = thumbnail_filename(base_name, variant, image_format)
+            if rel_dir:
+                filename = f"{rel_dir}/{filename}"
+            quality = THUMBNAIL_QUALITY.get(variant, THUMBNAIL_DEFAULT_QUALITY)
+            save_format = 'WEBP' if filename.endswith('.webp') else 'JPEG'
+            resized.save(os.path.join(thumbnail_dir, filename), save_format, quality=quality)
+            variants[variant] = filename
+    return variants
+
+
+def create_thumbnail_images(observations: Iterable[Dict], out_dir: str, thumbnail_dir: str, log,
+                            image_format: str = 'jpeg', workers: int = 1,
+                            fingerprints: FingerprintIndex | None = None):
+    """원본 이미지의 썸네일 세트를 생성하여 저장
+
+    썸네일 유효성은 파일 존재 여부가 아니라 원본의 크기, 수정 시각, 내용 지문으로
+    판단하여 `thumbnail_index.json`에 기록하고, 바뀐 원본만 다시 만듭니다.
+    원본이 사라진 썸네일은 정리합니다. 썸네일 파일명은 `thumbnail_filename` 규칙을 따르므로
+    리포트 생성기는 기록의 파일명으로 찾습니다 (`observations`는 정렬 스트림이어도 됨).
+    출력 폴더 구성(`obs['rel_dir']`)을 그대로 따라 썸네일 폴더에도 같은 하위 폴더를 만듭니다.
+    `workers`가 2 이상이면 썸네일을 여러 스레드에서 동시에 만듭니다.
+    `fingerprints`를 주면 내용 지문을 그 캐시에서 얻습니다.
+    """
     if not observations:
         return
     
     os.makedirs(thumbnail_dir, exist_ok=True)
     log(f"  - 썸네일 이미지 생성 중... ({thumbnail_dir})")
     
+    index = _load_thumbnail_index(thumbnail_dir)
+    fingerprint = fingerprints.fingerprint if fingerprints is not None else (lambda path, st=None: content_fingerprint(path))
     saved_count = 0
+    reused_count = 0
+    # 새로 만들어야 하는 원본 → (원본 경로, stat, 내용 지문, 파일명, 하위 폴더)
+    pending: Dict[str, Tuple] = {}
     
     for obs_data in observations:
-        new_filename = obs_data['new_filename']
+        relpath = observation_relpath(obs_data)
+        
+        # 같은 원본을 이미 만들기로 했으면 건너뜀
+        if relpath in pending:
+            continue
         
         # 처리된 폴더에서 원본 이미지 찾기
-        src_path = os.path.join(out_dir, new_filename)
+        src_path = os.path.join(out_dir, relpath)
         
         if not os.path.exists(src_path):
-            log(f"    - 파일을 찾을 수 없음: {new_filename}")
+            log(f"    - 파일을 찾을 수 없음: {relpath}")
             continue
-            
-        # 썸네일 파일명 생성
-        base_name = os.path.splitext(new_filename)[0]
-        thumb_filename = f"{base_name}_thumb.jpg"
-        thumb_path = os.path.join(thumbnail_dir, thumb_filename)
         
-        # 이미 썸네일 파일이 존재하면 건너뛰기
-        if os.path.exists(thumb_path):
+        entry = index.get(relpath)
+        try:
+            state, st, content = _thumbnail_entry_state(entry, src_path, thumbnail_dir, image_format, fingerprint)
+        except OSError as e:
+            log(f"    - 원본 확인 실패 ({relpath}): {e}")
             continue
-
+        
+        if state != 'stale':
+            # 같은 원본(내용 지문 일치)으로 만든 썸네일이 모두 있으면 재사용
+            if state == 'touched':
+                entry.update(size=st.st_size, mtime_ns=st.st_mtime_ns)
+            reused_count += 1
+        else:
+            pending[relpath] = (src_path, st, content, os.path.splitext(obs_data['new_filename'])[0],
+                                obs_data.get('rel_dir', ''))
+    
+    def build(relpath):
+        src_path, st, content, base_name, rel_dir = pending[relpath]
+        variants = build_thumbnail_pyramid(src_path, thumbnail_dir, base_name, image_format, rel_dir)
+        if content is None:
+            content = fingerprint(src_path, st)
+        return variants, content
+    
+    # 썸네일 만들기 (여러 작업자면 동시에, 결과는 아래에서 순서대로 반영)
+    if workers > 1 and len(pending) > 1:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {relpath: executor.submit(build, relpath) for relpath in pending}
+        results = {relpath: future.result for relpath, future in futures.items()}
+    else:
+        results = {relpath: functools.partial(build, relpath) for relpath in pending}
+    
+    for relpath, get_result in results.items():
         try:
-            with Image.open(src_path) as img:
-                # EXIF orientation 처리
-                if hasattr(img, '_getexif'):
-                    exif = img._getexif()
-                    if exif and 274 in exif:
-                        orientation = exif[274]
-                        if orientation == 3:
-                            img = img.rotate(180, expand=True)
-                        elif orientation == 6:
-                            img = img.rotate(270, expand=True)
-                        elif orientation == 8:
-                            img = img.rotate(90, expand=True)
-                
-                # 썸네일 생성 (가로세로 비율 유지)
-                img.thumbnail((1024, 1024), Image.Resampling.LANCZOS)
-                img.save(thumb_path, 'JPEG', quality=90)
-            
-            saved_count += 1
-            log(f"    - 저장: {thumb_filename}")
-                
+            variants, content = get_result()
         except Exception as e:
-            log(f"    - 썸네일 생성 실패 ({new_filename}): {e}")
+            log(f"    - 썸네일 생성 실패 ({relpath}): {e}")
+            continue
+        st = pending[relpath][1]
+        # 형식이 바뀌어 더 이상 쓰지 않는 이전 썸네일 파일 삭제
+        entry = index.get(relpath)
+        if entry:
+            _remove_thumbnail_files(thumbnail_dir, set(entry.get('variants', {}).values()) - set(variants.values()))
+        index[relpath] = {
+            'size': st.st_size,
+            'mtime_ns': st.st_mtime_ns,
+            'content': content,
+            'format': image_format,
+            'variants': variants,
+        }
+        saved_count += 1
+        log(f"    - 저장: {variants['1024']} 외 {len(variants) - 1}개 크기")
     
-    log(f"  - 썸네일 이미지 생성 완료: {saved_count}개")
+    removed_count = collect_orphan_thumbnails(index, out_dir, thumbnail_dir)
+    
+    try:
+        _save_thumbnail_index(thumbnail_dir, index)
+    except OSError as e:
+        log(f"  - 썸네일 인덱스 저장 실패: {e}")
+    
+    log(f"  - 썸네일 이미지 생성 완료: {saved_count}개 (재사용 {reused_count}개, 정리 {removed_count}개)")
 
 # --------------------- 로그 생성 ---------------------
 
-def create_logs(log_dir: str, obs: List[Dict], src_dir: str, log):
+def observation_sort_key(o: Dict):
+    """시간순 정렬 키 (촬영 시각이 없는 기록은 맨 뒤, 같은 시각이면 파일 경로 순)"""
+    return (o['datetime'] is None, o['datetime'] or datetime.min, observation_relpath(o))
+
+
+def create_logs(log_dir: str, obs, src_dir: str, log):
+    """텍스트 로그 생성
+
+    `obs`는 시간순으로 정렬된 기록(리스트 또는 `ExternalSorter`)이며,
+    시간순 로그는 한 건씩 흘려 쓰므로 기록 수와 무관하게 메모리를 적게 씁니다.
+    """
     if not obs:
         log("- 로그를 생성할 기록이 없습니다.")
         return
     
     os.makedirs(log_dir, exist_ok=True)
-    uniq = {o['scientific_name'] for o in obs if o['scientific_name'] != 'N/A'}
+    uniq_map = {}
+    for o in obs:
+        if o['scientific_name'] != 'N/A':
+            uniq_map.setdefault(o['scientific_name'], o)
 
     # 시간순 로그
     with open(os.path.join(log_dir,'log_chronological.txt'),'w',encoding='utf-8') as f:
         f.write('='*50+'\n시간순 자동 탐조 기록\n'+'='*50+'\n')
         f.write(f"기록 생성: {datetime.now():%Y-%m-%d %H:%M:%S}\n대상 폴더: {os.path.abspath(src_dir)}\n")
-        f.write(f"처리 사진: {len(obs)}개\n관찰 종: {len(uniq)}종\n"+'='*50+'\n\n')
+        f.write(f"처리 사진: {len(obs)}개\n관찰 종: {len(uniq_map)}종\n"+'='*50+'\n\n')
         for o in obs:
             ts = o['datetime'].strftime('%Y-%m-%d %H:%M:%S') if o['datetime'] else '시간 정보 없음'
-            f.write(f"▶ {ts}\n  - 국명: {o['korean_name']}\n  - 영문명: {o['common_name']}\n  - 학명: {o['scientific_name']}\n  - 분류: {o['taxonomy_str']}\n  - 파일: {o['new_filename']}\n"+'-'*50+'\n')
+            f.write(f"▶ {ts}\n  - 국명: {o['korean_name']}\n  - 영문명: {o['common_name']}\n  - 학명: {o['scientific_name']}\n  - 분류: {o['taxonomy_str']}\n  - 파일: {observation_relpath(o)}\n"+'-'*50+'\n')
 
     # 분류학적 체크리스트
-    uniq_map = {o['scientific_name']:o for o in obs if o['scientific_name']!='N/A'}
     sorted_obs = sorted(uniq_map.values(), key=lambda x:(x['taxonomy'].get('order','zzz'),x['taxonomy'].get('family','zzz')))
     with open(os.path.join(log_dir,'log_taxonomic.txt'),'w',encoding='utf-8') as f:
         f.write('='*50+'\n분류학적 체크리스트\n'+'='*50+'\n')
@@ -252,205 +1096,876 @@ def create_logs(log_dir: str, obs: List[Dict], src_dir: str, log):
     
     log("  - 텍스트 로그 파일 생성 완료.")
 
+# -------------------- 사진 처리 단계 --------------------
+
+# 예상 소요 시간 계산용 장당 처리 시간(초): 기본(Flash) / 프리미엄(Pro)
+ETA_SECONDS_PER_PHOTO = {False: 4.0, True: 8.0}
+# 다시 실행할 때 변경 여부를 한 번에 확인하는 사진 수 (스캔과 처리 사이에 쌓이는 최대 장수)
+UNCHANGED_CHECK_CHUNK = 256
+
+
+def prescan_sources(sources: Iterator[SourceImage], log, workers: int = 8,
+                    burst_gap: float = 2.0) -> Tuple[List[SourceImage], List[List[SourceImage]]]:
+    """EXIF 헤더만 병렬로 읽어 촬영 시각 순으로 정렬하고 연속 촬영 묶음을 구함
+
+    촬영 시각이 없는 사진은 뒤쪽에 경로 순으로 둡니다.
+    """
+    sources = list(sources)
+    headers = exif_scan.prescan((s.path for s in sources), workers)
+    sources = [s._replace(exif=headers[s.path]) for s in sources]
+    sources.sort(key=lambda s: (s.exif.datetime is None, s.exif.datetime or datetime.min, s.rel_path))
+    bursts = exif_scan.group_bursts(sources, lambda s: s.exif.datetime, burst_gap)
+    
+    dated = sum(1 for s in sources if s.exif.datetime)
+    log(f"사전 스캔: {len(sources)}장 (촬영 시각 있음 {dated}장), "
+        f"연속 촬영 묶음 {sum(1 for b in bursts if len(b) > 1)}개")
+    return sources, bursts
+
+
+def skip_unchanged_sources(sources: Iterable[SourceImage], fingerprints: FingerprintIndex, out_dir: str,
+                           on_unchanged: Callable[[Dict], None], workers: int = 8,
+                           chunk_size: int = UNCHANGED_CHECK_CHUNK) -> Iterator[Tuple[SourceImage, str]]:
+    """원본 내용 키를 `chunk_size`장씩 병렬로 구해 처리할 사진만 (사진, 키)로 차례로 내보냄
+
+    이전 실행에서 처리를 마쳤고 출력 파일도 남아 있는 사진은 내보내지 않고 그 기록을
+    `on_unchanged`로 넘깁니다. 폴더 전체를 목록으로 만들지 않으므로 스캔과 함께 흘려 씁니다.
+    """
+    sources = iter(sources)
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        while True:
+            chunk = list(itertools.islice(sources, chunk_size))
+            if not chunk:
+                return
+            for source, key in zip(chunk, executor.map(fingerprints.source_key, chunk)):
+                record = fingerprints.previous_record(key, out_dir)
+                if record is None:
+                    yield source, key
+                else:
+                    on_unchanged(record)
+
+
+def prepare_photo(source: SourceImage, max_dimension: int | None = None, crop: bool = False) -> Dict:
+    """(디코딩 단계) 촬영 시각을 읽고 API 전송용 JPEG 바이트를 만듦
+
+    `crop`이면 피사체 영역을 찾아 여백을 둔 크롭만 보내고, 찾지 못하면 전체 프레임을 보냅니다.
+    파이프라인 모드에서는 프로세스 풀에서 실행되므로 pickle 가능한 값만 반환합니다.
+    """
+    if source.exif is not None and source.exif.orientation is not None:
+        dt, orientation = source.exif.datetime, source.exif.orientation
+    else:
+        # 사전 스캔을 하지 않았거나 헤더를 읽지 못함: 이전처럼 PIL로 촬영 시각과 회전 정보를 읽음
+        with Image.open(source.path) as im:
+            dt = get_photo_datetime(im)
+        orientation = None
+    img = load_image_for_api(source.path, max_dimension, orientation)
+    area_ratio = 1.0
+    if crop:
+        found = subject_crop.find_subject(img)
+        if found:
+            img = img.crop(found.box)
+            area_ratio = found.area_ratio
+    return {'datetime': dt, 'image_data': encode_image_for_api(img), 'crop_ratio': area_ratio}
+
+
+def build_prompt(location: str, dt: datetime | None) -> str:
+    if dt:
+        month_day = dt.strftime("%B %d")
+        date_context = f" on {month_day}"
+        seasonal_hint = f" Consider the seasonal migration patterns and breeding cycles typical for this time of year ({month_day})."
+    else:
+        date_context = ""
+        seasonal_hint = ""
+    
+    # 프롬프트 생성
+    '''
+    prompt_with_date = (f"Act as an expert ornithologist specializing in the avifauna of {location}. "
+          f"The following is an image of a bird taken in {location}{date_context}."
+          f"{seasonal_hint} "
+          "Respond in JSON with 'common_name','scientific_name','order','family'. If uncertain set nulls.")
+    '''
+    return (f"Bird ID for {location}{date_context}. {seasonal_hint} "
+"Key factors: overall shape (jizz), body proportions, size relative to environment. "
+"JSON: {'common_name':'name','scientific_name':'species','order':'order','family':'family','confidence':0.0-1.0}")
+
+
+# 단계적 해상도: 작은 이미지로 먼저 식별하고 결과가 불확실할 때만 다음 단계로 (None = 원본 해상도)
+RESOLUTION_TIERS = (768, 1536, None)
+
+
+# 모델 단계 (Flash로 먼저 식별하고 불확실한 사진만 Pro로 재확인)
+# 예상 비용 계산용 100만 토큰당 가격 (USD, 입력/출력, 목록에 없는 백엔드는 0)
+MODEL_PRICING = {'flash': (0.30, 2.50), 'pro': (1.25, 10.00)}
+# 식별 요청 하나의 기본 시한(초): 멈춘 요청 하나가 전체 실행을 붙잡지 않도록
+REQUEST_DEADLINE = 120
+# 로컬 분류 모델(ONNX 등)이 파이프라인 모드에서 한 번에 추론할 최대 사진 수
+IDENTIFY_BATCH_SIZE = 16
+# Gemini가 스스로 밝힌 확신도가 이보다 낮으면 불확실한 결과로 봄
+CASCADE_CONFIDENCE = 0.6
+
+
+def tier_label(dimension: int | None) -> str:
+    return f"{dimension}px" if dimension else "원본"
+
+
+def identify_photo(run: Dict, source: SourceImage, prepared: Dict, log) -> Dict | None:
+    """(식별 단계) Gemini 식별 → Wikipedia/CSV 이름 보완. 식별 실패 시 None
+
+    해상도 단계가 여러 개이면 Gemini가 이름을 내지 못했거나, Wikipedia 결과와
+    어긋나거나, 이름 검증에 실패했거나, 확신도가 낮을 때 다음 해상도로 다시 디코딩하여
+    재시도합니다. 마지막 해상도에서도 불확실하고 Pro 모델이 있으면 Pro로 한 번 더 확인합니다.
+    """
+    crop_ratio = prepared.get('crop_ratio', 1.0)
+    if crop_ratio < 1.0:
+        log(f"  - 피사체 영역만 전송 (원본 면적의 {crop_ratio:.0%})")
+        with run['lock']:
+            run['cropped_count'] += 1
+            run['cropped_area'] += crop_ratio
+    
+    tiers = run['resolution_tiers']
+    tier = 0
+    model = run['primary_model']
+    fallback = None
+    while True:
+        try:
+            ident, reason = _identify_once(run, model, prepared, log)
+        except quota.QuotaExceeded as e:
+            if model == run['primary_model']:
+                raise
+            # 재확인 모델만 한도에 닿았으면 앞 모델의 결과를 그대로 사용
+            log(f"  - {e}: 재확인 생략")
+            return fallback
+        if model == run['primary_model']:
+            with run['lock']:
+                run['tier_stats'][tier]['attempts'] += 1
+                if reason is None:
+                    run['tier_stats'][tier]['resolved'] += 1
+        if reason is None:
+            return ident
+        detail = f" ({reason})" if ident else ""
+        if tier + 1 < len(tiers):
+            tier += 1
+            log(f"  - {tier_label(tiers[tier])} 해상도로 재시도{detail}")
+            prepared = dict(prepared, **run['redecode'](source, tiers[tier]))
+        elif model != 'pro' and 'pro' in run['models']:
+            model = 'pro'
+            fallback = ident
+            log(f"  - {run['models']['pro'].label}로 재확인{detail}")
+        else:
+            return ident
+
+
+def _usage_cost(model: str, results: List[Dict]) -> Tuple[int, int, float]:
+    """결과들의 토큰 사용량 합계와 예상 비용 (USD)"""
+    tokens_in = sum((r.get('usage') or (0, 0))[0] for r in results)
+    tokens_out = sum((r.get('usage') or (0, 0))[1] for r in results)
+    price_in, price_out = MODEL_PRICING.get(model, (0.0, 0.0))
+    return tokens_in, tokens_out, (tokens_in * price_in + tokens_out * price_out) / 1_000_000
+
+
+def _quota_hedge_call(scheduler: quota.QuotaScheduler, model: str):
+    """중복(hedged) 요청도 할당량을 허가받고 장부에 기록하도록 감싸는 함수 (HedgedIdentifier의 hedge_call)"""
+    def call(send):
+        scheduler.acquire(model)  # 한도에 닿으면 QuotaExceeded → 중복 요청을 보내지 않음
+        try:
+            results = send()
+        except Exception:
+            scheduler.record(model)  # 실패한 요청도 한도에 포함
+            raise
+        scheduler.record(model, *_usage_cost(model, results))
+        return results
+    return call
+
+
+def _record_model_call(run: Dict, model: str, result: Dict, seconds: float):
+    """모델별 호출 수, 지연 시간, 토큰 사용량과 예상 비용 누적"""
+    tokens_in, tokens_out, cost = _usage_cost(model, [result])
+    if run['quota'] is not None:
+        run['quota'].record(model, tokens_in, tokens_out, cost)
+    with run['lock']:
+        stats = run['model_stats'].setdefault(model, {'calls': 0, 'seconds': 0.0, 'tokens_in': 0, 'tokens_out': 0, 'cost': 0.0})
+        stats['calls'] += 1
+        stats['seconds'] += seconds
+        stats['tokens_in'] += tokens_in
+        stats['tokens_out'] += tokens_out
+        stats['cost'] += cost
+
+
+def _identify_once(run: Dict, model: str, prepared: Dict, log) -> Tuple[Dict | None, str | None]:
+    """식별 백엔드에 한 번 요청. (식별 결과, 더 높은 해상도/모델로 확인해 볼 이유 또는 None)"""
+    identifier = run['models'][model]
+    prompt_with_date = build_prompt(run['location'], prepared['datetime'])
+    
+    if model == 'pro':
+        log("  - Gemini 2.5 Pro 분석 요청... (프리미엄)")
+    elif model == 'flash':
+        log("  - Gemini 2.5 Flash 분석 요청... (기본)")
+    else:
+        log(f"  - {identifier.label} 분석 요청...")
+    
+    # API 호출 (속도 제한은 여러 스레드·폴더가 함께 사용)
+    if run['rate_limiter'] is not None:
+        run['rate_limiter'].acquire()
+    if run['quota'] is not None:
+        run['quota'].acquire(model)  # 하루 한도에 닿으면 QuotaExceeded
+    started = time.perf_counter()
+    try:
+        res = identifier.identify(identifiers.IdentifyRequest(prepared['image_data'], prompt_with_date))
+    except Exception:
+        if run['quota'] is not None:
+            run['quota'].record(model)  # 실패한 요청도 한도에 포함
+        raise
+    _record_model_call(run, model, res, time.perf_counter() - started)
+    
+    if model == 'flash':
+        log(f"  - API 딜레이 ({run['delay']}초)...")
+        time.sleep(run['delay'])
+    
+    gemini_common = res.get('common_name')
+    gemini_sci = res.get('scientific_name')
+    
+    if not gemini_common and not gemini_sci:
+        failure = "Gemini 식별 실패" if model in ('flash', 'pro') else f"{identifier.label} 식별 실패"
+        log(f"  - {failure}")
+        return None, failure
+    
+    if run['taxonomy_pack'] is not None:
+        wiki_info = pack_lookup(run['taxonomy_pack'], gemini_common, gemini_sci, log)
+    else:
+        wiki_info = wiki_lookup(run['wiki'], gemini_common, gemini_sci, log)
+    korean, common, sci, order, family, src, csv_used = resolve_names(res, wiki_info, run['csv_df'], log,
+                                                                  run['name_index'], run['fuzzy_max_distance'])
+    
+    log(f"  - 최종 출처: {src}")
+    log(f"  - 최종 결과: {korean} | {common} ({sci})")
+    
+    reason = None
+    confidence = res.get('confidence')
+    if src == 'Gemini (검증 실패)':
+        reason = "이름 검증 실패"
+    elif wiki_info and wiki_info['common_name'].casefold() not in {
+            (gemini_common or '').casefold(), (gemini_sci or '').casefold()}:
+        reason = f"Gemini와 {wiki_info.get('source', 'Wikipedia')} 결과 불일치"
+    elif isinstance(confidence, (int, float)) and confidence < run['cascade_confidence']:
+        reason = f"낮은 확신도 {confidence:.2f}"
+    
+    return {
+        'korean_name': korean,
+        'common_name': common,
+        'scientific_name': sci,
+        'order': order,
+        'family': family,
+        'source': src,
+        'csv_used': csv_used,
+    }, reason
+
+
+def store_photo(run: Dict, source: SourceImage, prepared: Dict, ident: Dict, log) -> Dict:
+    """(저장 단계) 파일명을 정해 JPG/RAW를 출력 폴더에 배치하고 관찰 기록을 반환"""
+    dt = prepared['datetime']
+    korean, common = ident['korean_name'], ident['common_name']
+    order, family = ident['order'], ident['family']
+    output_mode = run['output_mode']
+    name_registry = run['name_registry']
+    
+    # 파일명 생성 및 저장
+    date_prefix = dt.strftime('%Y%m%d_%H%M%S_') if dt else ""
+    if not korean.startswith('*'):
+        base_name = f"{date_prefix}{sanitize_filename(korean)}_{sanitize_filename(common)}"
+    else:
+        base_name = f"{date_prefix}{sanitize_filename(common)}"
+    
+    # 출력 폴더 구성에 따른 하위 폴더
+    rel_dir = output_subdir(run['output_layout'], dt, order, family, korean, common)
+    dest_dir = os.path.join(run['out_dir'], rel_dir) if rel_dir else run['out_dir']
+    name_registry.ensure_directory(dest_dir)
+    
+    # 중복 방지 (출력 폴더 목록을 한 번만 읽은 이름 대장에서 발급)
+    new_fname = name_registry.reserve(dest_dir, base_name, '.jpg', owner=source.rel_path)
+    new_path = os.path.join(dest_dir, new_fname)
+    
+    placed = [(source.path, new_path)]
+    # RAW 파일 (스캔 단계에서 짝지어 둔 파일)
+    if source.raw_path:
+        ext = os.path.splitext(source.raw_path)[1].lower()
+        raw_new_name = f"{os.path.splitext(new_fname)[0]}{ext}"
+        name_registry.add(dest_dir, raw_new_name)
+        placed.append((source.raw_path, os.path.join(dest_dir, raw_new_name)))
+    
+    # 출력 방식에 따라 복사/링크/이동
+    for kind, (src_path, dst_path) in zip(('JPG', 'RAW'), placed):
+        used_mode, written = place_file(src_path, dst_path, output_mode)
+        with run['lock']:
+            run['bytes_written'] += written
+            run['fallback_count'] += used_mode != output_mode
+        shown = os.path.relpath(dst_path, run['out_dir'])
+        log(f"  >> {kind} 저장: {shown}" + (f" ({used_mode})" if used_mode != 'copy' else ""))
+    
+    # 관찰 기록
+    return {
+        'datetime': dt,
+        'new_filename': new_fname,
+        'rel_dir': rel_dir,
+        'common_name': common,
+        'korean_name': korean,
+        'scientific_name': ident['scientific_name'],
+        'taxonomy': {"order": order, "family": family},
+        'taxonomy_str': f"목: {order}, 과: {family}",
+        'csv_used': ident['csv_used']
+    }
+
 # -------------------- 메인 함수 --------------------
 
-def process_all_images(cfg: Dict):
+def create_shared_resources(cfg: Dict) -> Dict:
+    """여러 폴더를 처리할 때 한 번만 만들어 함께 쓰는 자원
+
+    식별 모델(요청 시한 작업자 포함), 분류 자료와 학명 색인, 출력 이름 등록부,
+    API 속도 제한, 파이프라인 디코딩 프로세스 풀. 다 쓰면 `close_shared_resources`로 정리합니다.
+    (Wikipedia 이름 캐시는 cfg['wiki_wiki'] 조회기가 가지고 있으므로 그대로 공유됨)
+    """
+    csv_df = cfg.get('csv_db')
+    is_pro_mode = cfg.get('is_pro_mode', False)
+    fuzzy_max_distance = check_fuzzy_distance(cfg.get('fuzzy_max_distance', FUZZY_MAX_DISTANCE))
+    
+    # 오프라인 모드: Wikipedia 대신 로컬 분류 자료 (없으면 CSV로 즉석에서 만듦)
+    pack = None
+    if cfg.get('offline', False):
+        pack = cfg.get('taxonomy_pack')
+        if pack is None:
+            pack = taxonomy_pack.TaxonomyPack.from_dataframe(csv_df) if csv_df is not None else taxonomy_pack.TaxonomyPack()
+
+    # 식별 모델: 기본은 Flash 또는 Pro 하나, 단계 모드면 Flash 다음에 Pro
+    # (cfg['identifier']로 다른 백엔드를 주면 그것을 먼저 쓰고, 단계 모드면 Pro로 재확인)
+    request_deadline = cfg.get('request_deadline', REQUEST_DEADLINE)
+    identifier = cfg.get('identifier') or identifiers.GeminiIdentifier(
+        cfg['gemini_model'], 'pro' if is_pro_mode else 'flash', request_deadline)
+    primary_model = identifier.name
+    models = {primary_model: identifier}
+    use_cascade = bool(cfg.get('cascade') and cfg.get('pro_model') and primary_model != 'pro')
+    if use_cascade:
+        models['pro'] = identifiers.GeminiIdentifier(cfg['pro_model'], 'pro', request_deadline)
+    
+    rate_limit = cfg.get('rate_limit_per_minute')
+    
+    # 할당량: 키별 사용량 장부(여러 날에 걸쳐 유지)와 하루 한도
+    scheduler = None
+    if cfg.get('quota'):
+        limits = cfg['quota'] if isinstance(cfg['quota'], dict) else {}
+        scheduler = quota.QuotaScheduler(quota.QuotaLedger(cfg.get('quota_ledger')), limits, cfg.get('api_key_ids'))
+    
+    # 원격 API: 요청 시한과 중복 요청(지연 시간 p95를 넘기면 같은 요청을 한 번 더 보내고 먼저 온 응답 사용)
+    # 할당량을 쓰면 중복 요청도 한 번의 요청으로 허가받고 기록함
+    use_hedge = cfg.get('hedge', False)
+    if request_deadline or use_hedge:
+        models = {key: m if m.batched else identifiers.HedgedIdentifier(
+                      m, request_deadline, use_hedge, min_samples=cfg.get('hedge_min_samples', 20),
+                      hedge_call=_quota_hedge_call(scheduler, key) if scheduler and use_hedge else None)
+                  for key, m in models.items()}
+    # 로컬 배치 추론 백엔드: 파이프라인의 식별 작업자들이 보낸 사진을 모아 identify_batch 한 번으로
+    if cfg.get('pipeline', False):
+        models = {key: identifiers.BatchingIdentifier(m, cfg.get('identify_batch_size', IDENTIFY_BATCH_SIZE)) if m.batched else m
+                  for key, m in models.items()}
+    return {
+        'models': models,
+        'primary_model': primary_model,
+        'use_cascade': use_cascade,
+        'taxonomy_pack': pack,
+        'name_index': name_index.NameIndex.from_dataframe(csv_df) if csv_df is not None and fuzzy_max_distance > 0 else None,
+        'fuzzy_max_distance': fuzzy_max_distance,
+        'name_registry': cfg.get('name_registry') or OutputNameRegistry(),
+        'rate_limiter': pipeline.RateLimiter(rate_limit) if rate_limit else None,
+        'quota': scheduler,
+        'pool': (DecodePool(max_workers=pipeline.resolve_workers(cfg.get('pipeline_workers'))['decode'])
+                 if cfg.get('pipeline', False) else None),
+    }
+
+
+def close_shared_resources(shared: Dict):
+    """모델 작업자와 디코딩 프로세스 풀 정리 (여러 번 불러도 됨)"""
+    for model in shared['models'].values():
+        model.close()
+    if shared['pool'] is not None:
+        shared['pool'].shutdown()
+
+
+def process_all_images(cfg: Dict, shared: Dict | None = None) -> Dict:
+    """대상 폴더 하나를 처리하고 요약(처리 수, 고유 종, 기록량, 모델 사용량)을 반환
+
+    `shared`(create_shared_resources)를 주면 그 자원을 쓰고 닫지 않습니다.
+    처리 중 예외가 나도 직접 만든 공유 자원과 실행 자원(정렬 임시 파일, 분산 임대,
+    메모리 측정 스레드)은 정리합니다.
+    """
+    owns_shared = shared is None
+    if owns_shared:
+        shared = create_shared_resources(cfg)
+    try:
+        with contextlib.ExitStack() as cleanup:
+            return _process_folder(cfg, shared, owns_shared, cleanup)
+    finally:
+        if owns_shared:
+            close_shared_resources(shared)
+
+
+def _process_folder(cfg: Dict, shared: Dict, owns_shared: bool, cleanup: contextlib.ExitStack) -> Dict:
+    """process_all_images의 본체 (실행 자원은 만들 때 `cleanup`에 정리 함수를 등록)"""
     log      = cfg['log_callback']
-    gemini   = cfg['gemini_model']
-    wiki     = cfg['wiki_wiki']
     csv_df   = cfg.get('csv_db')
     report_options = cfg.get('report_options', {})
     is_pro_mode = cfg.get('is_pro_mode', False)
 
     src_dir  = cfg['target_folder']
-    out_dir  = os.path.join(src_dir,'processed_birds_final')
+    out_dir  = os.path.join(src_dir, OUTPUT_DIR_NAME)
     os.makedirs(out_dir, exist_ok=True)
     log_dir  = os.path.join(out_dir,'탐조기록')
 
     DELAY = 0 if not is_pro_mode else 0  # Pro 모드에서는 딜레이 단축
-    RAW_EXT = ('.orf','.cr2','.cr3','.nef','.arw','.dng','.raf','.rw2')
+    recursive = cfg.get('recursive', False)
+    output_mode = cfg.get('output_mode', 'copy')
+    if output_mode not in OUTPUT_MODES:
+        output_mode = 'copy'
+    output_layout = cfg.get('output_layout', 'flat')
+    use_pipeline = cfg.get('pipeline', False)
+    
+    # 메모리 예산 모드: 축소 디코딩 + 동시에 풀어 두는 프레임 수 제한
+    memory_budget_mb = cfg.get('memory_budget_mb')
+    max_dimension = cfg.get('max_decode_dimension', MEMORY_MODE_MAX_DIMENSION) if memory_budget_mb else None
+    use_crop = cfg.get('subject_crop', False)
+    
+    # 해상도 단계 (메모리 예산 모드의 최대 크기를 넘지 않게 맞춤)
+    if cfg.get('progressive', False):
+        tiers = []
+        for dim in cfg.get('resolution_tiers') or RESOLUTION_TIERS:
+            dim = min(dim, max_dimension) if dim and max_dimension else (dim or max_dimension)
+            if dim not in tiers:
+                tiers.append(dim)
+    else:
+        tiers = [max_dimension]
+    decode_fn = functools.partial(prepare_photo, max_dimension=tiers[0], crop=use_crop)
+
+    models = shared['models']
+    primary_model = shared['primary_model']
+    use_cascade = shared['use_cascade']
+    pack = shared['taxonomy_pack']
+    fuzzy_max_distance = shared['fuzzy_max_distance']
+    
+    # 이번 실행의 최대 메모리 (디코딩 프로세스 포함)
+    memory_monitor = RunMemoryMonitor(shared['pool'])
+    memory_monitor.start()
+    cleanup.callback(memory_monitor.stop)
+    
+    # 분산 처리: 여러 컴퓨터의 작업자가 출력 폴더의 공유 대기열로 사진을 나눠 가짐
+    work = None
+    name_registry = shared['name_registry']
+    if cfg.get('distributed', False):
+        queue_dir = os.path.join(out_dir, work_queue.QUEUE_DIR_NAME)
+        work = work_queue.LeaseQueue(queue_dir, cfg.get('worker_id'),
+                                     cfg.get('lease_seconds', work_queue.LEASE_SECONDS), log)
+        cleanup.callback(work.close)
+        name_registry = OutputNameRegistry(work_queue.NameClaims(os.path.join(queue_dir, 'names'), out_dir))
 
-    observations = []
+    # 단계 함수들이 함께 쓰는 실행 상태
+    run = {
+        'models': models,
+        'primary_model': primary_model,
+        'model_stats': {},
+        'cascade_confidence': cfg.get('cascade_confidence', CASCADE_CONFIDENCE),
+        'wiki': cfg['wiki_wiki'],
+        'csv_df': csv_df,
+        'taxonomy_pack': pack,
+        'name_index': shared['name_index'],
+        'fuzzy_max_distance': fuzzy_max_distance,
+        'rate_limiter': shared['rate_limiter'],
+        'quota': shared['quota'],
+        'quota_stopped': None,
+        'location': cfg['photo_location'],
+        'is_pro_mode': is_pro_mode,
+        'delay': DELAY,
+        'out_dir': out_dir,
+        'output_mode': output_mode,
+        'output_layout': output_layout,
+        'name_registry': name_registry,
+        'bytes_written': 0,
+        'fallback_count': 0,
+        'cropped_count': 0,
+        'cropped_area': 0.0,
+        'subject_crop': use_crop,
+        'resolution_tiers': tiers,
+        'tier_stats': [{'attempts': 0, 'resolved': 0} for _ in tiers],
+        # 더 높은 해상도로 다시 디코딩 (파이프라인 모드에서는 디코딩 프로세스 풀과 메모리 예산 사용)
+        'redecode': lambda source, dimension: prepare_photo(source, dimension, use_crop),
+        'lock': threading.Lock(),
+    }
+
+    # 관찰 기록은 만들어지는 대로 시간순 외부 정렬기에 넣음 (리포트와 텍스트 로그가 함께 사용)
+    # 기록 목록을 메모리에 모아 두지 않고 이번 실행의 집계만 따로 셈
+    chronological = external_sort.ExternalSorter(observation_sort_key, cfg.get('sort_run_size', 5000),
+                                                 cfg.get('sort_tmp_dir'))
+    cleanup.callback(chronological.close)
+    counts = {'processed': 0, 'csv_used': 0, 'species': set(), 'unchanged': 0}
+    
+    def record_observation(obs):
+        with run['lock']:
+            chronological.add(obs)
+            counts['processed'] += 1
+            counts['csv_used'] += bool(obs.get('csv_used'))
+            if obs['scientific_name'] != 'N/A':
+                counts['species'].add(obs['scientific_name'])
+    
+    # 프로파일링 (선택): 단계별 cProfile/tracemalloc 결과를 탐조기록/profile_<시각>에 저장
+    profiler = profiling.RunProfiler(log_dir, log, enabled=cfg.get('profile', False))
+    cleanup.callback(profiler.finish)   # 도중에 실패해도 cProfile/tracemalloc을 켜 둔 채로 남기지 않음
     log(f"대상: {os.path.abspath(src_dir)} → 출력: {os.path.abspath(out_dir)}")
     
-    if is_pro_mode:
+    if primary_model not in ('flash', 'pro'):
+        log(f"식별 백엔드: {models[primary_model].label}" + (" (불확실한 사진만 Gemini 2.5 Pro로 재확인)" if use_cascade else ""))
+    elif is_pro_mode:
         log("🔥 프리미엄 모드 활성화: Gemini 2.5 Pro 사용")
         log("  - 약간 향상된 조류 식별 정확도 (차이 미미)")
         log("  - 원본 이미지 직접 분석")
+    elif use_cascade:
+        log("🔀 단계 모드: Gemini 2.5 Flash 우선, 불확실한 사진만 Gemini 2.5 Pro로 재확인")
+        log(f"  - 재확인 기준: 식별 실패, 이름 검증 실패, Wikipedia 불일치, 확신도 {run['cascade_confidence']:.2f} 미만")
     else:
         log("기본 모드: Gemini 2.5 Flash 사용")
         log("  - 충분한 조류 식별 정확도")
         log("  - 원본 이미지 직접 분석")
     
+    if pack is not None:
+        log(f"오프라인 모드: Wikipedia 대신 로컬 분류 자료 사용 ({len(pack)}종)")
     if csv_df is not None:
         log(f"CSV 데이터베이스: 활성화 ({len(csv_df)}개 레코드)")
+        if run['name_index'] is not None:
+            log(f"  - 학명 근사 일치: 편집 거리 {fuzzy_max_distance} 이하 허용 (색인 {len(run['name_index'])}종)")
     else:
         log("CSV 데이터베이스: 비활성화")
 
     # 이미지 처리
-    image_files = [f for f in os.listdir(src_dir) if f.lower().endswith(('.jpg', '.jpeg'))]
-    total_files = len(image_files)
+    if recursive:
+        log("하위 폴더 포함: 활성화")
+    if output_mode != 'copy':
+        log(f"출력 방식: {output_mode}")
+    if output_layout != 'flat':
+        log(f"출력 폴더 구성: {output_layout}")
+    if memory_budget_mb:
+        log(f"메모리 예산 모드: {memory_budget_mb}MB, 디코딩 최대 {max_dimension}px")
+        if not use_pipeline:
+            log("  - 순차 처리는 한 번에 한 장만 디코딩하므로 축소 디코딩만 적용 (예산은 파이프라인 모드에서 사용)")
+    if use_crop:
+        log("피사체 크롭: 활성화 (신뢰도가 낮으면 전체 프레임 전송)")
+    if len(tiers) > 1:
+        log(f"단계적 해상도: {' → '.join(tier_label(t) for t in tiers)}")
+    if work is not None:
+        log(f"분산 처리: 작업자 {work.worker_id}, 임대 {work.lease_seconds:g}초 ({work.queue_dir})")
+    
+    # 내용 지문 캐시 (출력 폴더에 저장, 바뀌지 않은 파일은 다시 읽지 않음)
+    fingerprints = FingerprintIndex(os.path.join(out_dir, FINGERPRINT_INDEX_NAME)) if cfg.get('fingerprint_index', True) else None
+    
+    profiler.start('scan')
+    # 스캔은 제너레이터: 사전 스캔이나 할당량 모드가 아니면 사진 목록을 만들지 않고 찾는 대로 처리
+    sources = scan_source_images(src_dir, recursive)
     
-    for i, fname in enumerate(image_files):
-        src_path = os.path.join(src_dir, fname)
-        log(f"\n- [{i+1}/{total_files}] {fname} 처리 중")
+    # EXIF 헤더 사전 스캔 (선택): 촬영 순 정렬 + 예상 소요 시간 (정렬을 위해 폴더 전체를 목록으로 읽음)
+    bursts = None
+    if cfg.get('prescan', False):
+        sources, bursts = prescan_sources(sources, log, cfg.get('prescan_workers', 8), cfg.get('burst_gap_seconds', 2.0))
+        parallel = pipeline.resolve_workers(cfg.get('pipeline_workers'))['io'] if use_pipeline else 1
+        eta = exif_scan.estimate_seconds(len(sources), ETA_SECONDS_PER_PHOTO[is_pro_mode] + DELAY, parallel)
+        log(f"예상 소요 시간: 약 {exif_scan.format_duration(eta)}")
+    
+    # 할당량 모드: 연속 촬영 묶음마다 한 장 먼저, 이전 실행이 남긴 대기열이 있으면 그 사진만 이어서
+    completed = set()
+    already_done = False   # 일괄 처리가 한도로 멈출 때 이미 끝낸 폴더로 표시된 경우
+    queue_path = os.path.join(out_dir, quota.QUEUE_NAME)
+    if run['quota'] is not None:
+        sources = quota.prioritize_bursts(bursts) if bursts else list(sources)
+        saved = quota.load_queue(queue_path)
+        if saved is not None:
+            order = {rel: i for i, rel in enumerate(saved['pending'])}
+            sources = sorted((s for s in sources if s.rel_path in order), key=lambda s: order[s.rel_path])
+            # 이전 실행들의 관찰 기록도 정렬기에 넣어 리포트를 전체 기록으로 만듦
+            carried = saved.pop('observations', None) or []
+            already_done = not saved['pending'] and not carried
+            for record in carried:
+                chronological.add(work_queue.decode_record(record))
+            del carried
+            log(f"할당량 대기열: 이전 실행({saved.get('saved', '?')})에서 남은 {len(sources)}장부터 이어서 처리")
+        for key in dict.fromkeys(models):
+            log(f"할당량 ({models[key].label}): {run['quota'].describe(key)}")
+    
+    # 다시 실행: 지문 캐시로 원본 내용 키를 구하고, 이전 실행에서 처리를 마친 사진은 그 기록을 씀
+    # (분산 처리에서는 공유 대기열의 완료 표시가 같은 역할을 하므로 사용하지 않음)
+    source_keys = {}   # 처리 중인 사진의 내용 키 (끝나면 지움)
+    if fingerprints is not None and cfg.get('skip_unchanged', True) and work is None:
+        def add_unchanged(record):
+            with run['lock']:
+                chronological.add(work_queue.decode_record(record))
+                counts['unchanged'] += 1
+                if record['scientific_name'] != 'N/A':
+                    counts['species'].add(record['scientific_name'])
         
-        try:
-            # 원본 이미지 정보 추출
-            with Image.open(src_path) as im:
-                dt = get_photo_datetime(im)
-            
-            # 이미지를 API 전송용으로 리사이즈
-            log("  - 이미지 리사이즈 중...")
-            resized_image_data = resize_image_for_api(src_path)
-            
-            # PIL Image 객체로 변환
-            resized_image = Image.open(io.BytesIO(resized_image_data))
-            
-            if dt:
-                month_day = dt.strftime("%B %d")
-                date_context = f" on {month_day}"
-                seasonal_hint = f" Consider the seasonal migration patterns and breeding cycles typical for this time of year ({month_day})."
-            else:
-                date_context = ""
-                seasonal_hint = ""
-            
-            # 프롬프트 생성
-            '''
-            prompt_with_date = (f"Act as an expert ornithologist specializing in the avifauna of {cfg['photo_location']}. "
-                  f"The following is an image of a bird taken in {cfg['photo_location']}{date_context}."
-                  f"{seasonal_hint} "
-                  "Respond in JSON with 'common_name','scientific_name','order','family'. If uncertain set nulls.")
-            '''
-            prompt_with_date = (f"Bird ID for {cfg['photo_location']}{date_context}. {seasonal_hint} "
-"Key factors: overall shape (jizz), body proportions, size relative to environment. "
-"JSON: {'common_name':'name','scientific_name':'species','order':'order','family':'family'}")
-
-            if is_pro_mode:
-                log("  - Gemini 2.5 Pro 분석 요청... (프리미엄)")
-            else:
-                log("  - Gemini 2.5 Flash 분석 요청... (기본)")
-
-            # API 호출
-            response = gemini.generate_content(
-                [prompt_with_date, resized_image],
-                generation_config={"response_mime_type": "application/json"}
-            )
-            
-            if not is_pro_mode:
-                log(f"  - API 딜레이 ({DELAY}초)...")
-                time.sleep(DELAY)
-
-            res = json.loads(response.text)
-            
-            gemini_common = res.get('common_name')
-            gemini_sci = res.get('scientific_name')
-            
-            if not gemini_common and not gemini_sci:
-                log("  - Gemini 식별 실패")
-                continue
-            
-            wiki_info = wiki_lookup(wiki, gemini_common, gemini_sci, log)
-            korean, common, sci, order, family, src, csv_used = resolve_names(res, wiki_info, csv_df, log)
-            
-            log(f"  - 최종 출처: {src}")
-            log(f"  - 최종 결과: {korean} | {common} ({sci})")
-            
-            taxonomy_str = f"목: {order}, 과: {family}"
-            taxonomy_dict = {"order": order, "family": family}
-            
-        except Exception as e:
-            log(f"  ! 분석 오류: {e}")
-            continue
+        def changed_sources(keyed):
+            for source, key in keyed:
+                source_keys[source.rel_path] = key
+                yield source
         
-        try:
-            # 파일명 생성 및 저장
-            date_prefix = dt.strftime('%Y%m%d_%H%M%S_') if dt else ""
-            if not korean.startswith('*'):
-                base_name = f"{date_prefix}{sanitize_filename(korean)}_{sanitize_filename(common)}"
-            else:
-                base_name = f"{date_prefix}{sanitize_filename(common)}"
-            
-            new_fname = f"{base_name}.jpg"
-            new_path = os.path.join(out_dir, new_fname)
-            
-            # 중복 방지
-            counter = 1
-            while os.path.exists(new_path):
-                new_fname = f"{base_name}_{counter}.jpg"
-                new_path = os.path.join(out_dir, new_fname)
-                counter += 1
-            
-            # JPG 복사
-            shutil.copy2(src_path, new_path)
-            log(f"  >> JPG 저장: {new_fname}")
-            
-            # RAW 파일 찾아서 복사
-            base_fname = os.path.splitext(fname)[0]
-            for ext in RAW_EXT:
-                raw_path = os.path.join(src_dir, f"{base_fname}{ext}")
-                if os.path.exists(raw_path):
-                    raw_new_name = f"{os.path.splitext(new_fname)[0]}{ext}"
-                    raw_new_path = os.path.join(out_dir, raw_new_name)
-                    shutil.copy2(raw_path, raw_new_path)
-                    log(f"  >> RAW 저장: {raw_new_name}")
-                    break
+        keyed = skip_unchanged_sources(sources, fingerprints, out_dir, add_unchanged, cfg.get('prescan_workers', 8),
+                                       UNCHANGED_CHECK_CHUNK)
+        cleanup.callback(keyed.close)
+        sources = changed_sources(keyed)
+        if run['quota'] is not None:
+            sources = list(sources)   # 할당량 모드는 남은 사진 목록을 저장해야 하므로 미리 목록으로
+    planned = sources if run['quota'] is not None else []
+    
+    def finish(source, obs=None):
+        if run['quota'] is not None:
+            completed.add(source.rel_path)
+        key = source_keys.pop(source.rel_path, None)
+        if obs is not None and key is not None:
+            fingerprints.mark_done(key, work_queue.encode_record(obs))
+        if work is not None:
+            work.complete(source.rel_path, work_queue.encode_record(obs) if obs else None)
+    
+    def give_up(source):
+        source_keys.pop(source.rel_path, None)
+        if work is not None:
+            work.release(source.rel_path)
+    
+    if work is not None:
+        # 처리할 차례가 된 사진만 하나씩 임대 (끝났거나 다른 작업자가 처리 중인 사진은 건너뜀)
+        sources = work.take(sources, key=lambda source: source.rel_path)
+    
+    profiler.start('identify')
+    if use_pipeline:
+        # 디코딩(프로세스) → 식별(I/O 스레드) → 저장(쓰기 스레드) 단계 파이프라인
+        def item_log(source):
+            return lambda msg: log(f"  [{source.rel_path}] {msg.strip()}")
+        
+        def identify_stage(source, prepared):
+            try:
+                ident = identify_photo(run, source, prepared, item_log(source))
+            except quota.QuotaExceeded as e:
+                # 한도 도달: 새 사진 투입을 멈추고 이 사진은 남은 대기열로
+                give_up(source)
+                if run['quota_stopped'] is None:
+                    run['quota_stopped'] = e
+                    staged.stop()
+                return None
+            except Exception:
+                give_up(source)
+                raise
+            if ident is None:
+                finish(source)
+            return ident
+        
+        def write_stage(source, prepared, ident):
+            try:
+                obs = store_photo(run, source, prepared, ident, item_log(source))
+            except Exception:
+                give_up(source)
+                raise
+            record_observation(obs)
+            finish(source, obs)
+        
+        budget = pipeline.MemoryBudget(memory_budget_mb * 1024 * 1024) if memory_budget_mb else None
+        # 로컬 배치 추론 백엔드: 한 배치만큼의 사진이 동시에 식별 단계에 모이도록 작업자와 대기열 크기를 맞춤
+        stage_workers, queue_size = cfg.get('pipeline_workers'), cfg.get('pipeline_queue_size', 8)
+        if models[primary_model].batched:
+            batch_size = cfg.get('identify_batch_size', IDENTIFY_BATCH_SIZE)
+            stage_workers = {'io': batch_size, **(stage_workers or {})}
+            queue_size = cfg.get('pipeline_queue_size', batch_size)
+        staged = pipeline.StagedPipeline(
+            decode_fn, identify_stage, write_stage, log,
+            workers=stage_workers,
+            queue_size=queue_size,
+            label=lambda source: source.rel_path,
+            budget=budget,
+            cost_fn=lambda source: estimate_decode_bytes(source.path, max_dimension),
+            pool=shared['pool'],
+        )
+        run['redecode'] = lambda source, dimension: staged.decode(
+            functools.partial(prepare_photo, max_dimension=dimension, crop=use_crop), source,
+            estimate_decode_bytes(source.path, dimension) if budget else 0)
+        staged.run(sources)
+    else:
+        for i, source in enumerate(sources):
+            log(f"\n- [{i+1}] {source.rel_path} 처리 중")
             
-            # 관찰 기록 추가
-            observations.append({
-                'datetime': dt,
-                'new_filename': new_fname,
-                'common_name': common,
-                'korean_name': korean,
-                'scientific_name': sci,
-                'taxonomy': taxonomy_dict,
-                'taxonomy_str': taxonomy_str,
-                'csv_used': csv_used
-            })
+            try:
+                # 이미지를 API 전송용으로 리사이즈
+                log("  - 이미지 리사이즈 중...")
+                prepared = decode_fn(source)
+                ident = identify_photo(run, source, prepared, log)
+                if ident is None:
+                    finish(source)
+                    continue
+            except quota.QuotaExceeded as e:
+                give_up(source)
+                run['quota_stopped'] = e
+                break
+            except Exception as e:
+                log(f"  ! 분석 오류: {e}")
+                give_up(source)
+                continue
             
-        except Exception as e:
-            log(f"  ! 파일 처리 오류: {e}")
+            try:
+                obs = store_photo(run, source, prepared, ident, log)
+                record_observation(obs)
+                finish(source, obs)
+            except Exception as e:
+                log(f"  ! 파일 처리 오류: {e}")
+                give_up(source)
+    
+    # 디코딩 프로세스 풀과 모델은 리포트 전에 미리 정리 (process_all_images에서 다시 닫아도 무방)
+    if owns_shared:
+        memory_monitor.sample()   # 디코딩 프로세스가 끝나기 전에 한 번 더 측정
+        close_shared_resources(shared)
+    
+    # 할당량으로 멈췄으면 남은 사진을 대기열에 저장 (다음 실행에서 이어서 처리)
+    make_reports = True
+    if run['quota'] is not None:
+        if run['quota_stopped'] is not None:
+            remaining = [s.rel_path for s in planned if s.rel_path not in completed]
+            try:
+                quota.save_queue(queue_path, remaining, (work_queue.encode_record(o) for o in chronological))
+                log(f"\n⏸️  할당량 도달로 중단: {run['quota_stopped']}. "
+                    f"남은 {len(remaining)}장은 다음 실행에서 이어서 처리합니다.")
+            except OSError as e:
+                log(f"\n⏸️  할당량 도달로 중단: {run['quota_stopped']} (대기열 저장 실패: {e})")
+        else:
+            quota.clear_queue(queue_path)
+        if already_done:
+            log("할당량 대기열: 이전 실행에서 이미 처리를 마친 폴더입니다.")
+            make_reports = False
+    
+    # 분산 처리: 리포트와 로그는 모든 사진이 끝난 뒤 한 작업자가 전체 기록으로 만듦
+    if work is not None:
+        work.close()
+        pending = work.pending()
+        ws = work.stats
+        log(f"\n분산 처리: 이 작업자 {ws['completed']}장 완료, 만료 임대 인수 {ws['taken_over']}장, "
+            f"건너뜀 {ws['skipped_done']}장(완료) / {ws['skipped_busy']}장(다른 작업자 처리 중)")
+        if pending:
+            log(f"  - 끝나지 않은 사진 {len(pending)}장 (다른 작업자가 처리 중이거나 오류로 반납됨): "
+                "리포트는 모두 끝난 뒤의 작업자가 만듭니다.")
+            make_reports = False
+        elif work.claim_report():
+            # 이 작업자의 기록 대신 모든 작업자의 기록을 정렬기에 넣음
+            chronological.close()
+            chronological.extend(work_queue.decode_record(r) for r in work.records())
+            log(f"  - 모든 사진 완료: 전체 기록 {len(chronological)}개로 리포트를 만듭니다.")
+        else:
+            log("  - 다른 작업자가 이미 리포트를 만들었습니다.")
+            make_reports = False
+    
+    bytes_written = run['bytes_written']
+    fallback_count = run['fallback_count']
     
     # ==================== v2.1 시각적 리포트 ====================
     
-    if observations and report_options.get('format') != 'none':
-        log(f"\n🎨 시각적 리포트 생성 중...")
+    if make_reports:
+        if chronological and report_options.get('format') != 'none':
+            log(f"\n🎨 시각적 리포트 생성 중...")
         
-        # 썸네일 이미지 생성
-        thumbnail_dir = os.path.join(out_dir, 'thumbnail_images')
-        log("- 썸네일 이미지 생성 중...")
-        create_thumbnail_images(observations, out_dir, thumbnail_dir, log)
+            # 썸네일 이미지 생성 (파이프라인 모드에서는 쓰기 작업자 수만큼 병렬)
+            thumbnail_dir = os.path.join(out_dir, 'thumbnail_images')
+            log("- 썸네일 이미지 생성 중...")
+            profiler.start('thumbnails')
+            thumb_workers = pipeline.resolve_workers(cfg.get('pipeline_workers'))['write'] if use_pipeline else 1
+            create_thumbnail_images(chronological, out_dir, thumbnail_dir, log,
+                                    report_options.get('thumbnail_format', 'jpeg'), thumb_workers, fingerprints)
+    
+        # 시간순 정렬 스트림 (기록이 많으면 임시 파일로 나눠 정렬한 것을 병합)
+        profiler.start('reports')
+        if chronological and report_options.get('format') != 'none':
+            try:
+                import visual_report
+                visual_report.create_visual_reports(chronological, out_dir, src_dir, report_options, cfg['photo_location'], log)
+            except ImportError:
+                log("  - visual_report.py 모듈을 찾을 수 없습니다. 시각적 리포트를 건너뜁니다.")
+            except Exception as e:
+                log(f"  - 시각적 리포트 생성 오류: {e}")
         
+        # 기존 텍스트 로그 생성
+        profiler.start('logs')
+        create_logs(log_dir, chronological, src_dir, log)
+    chronological.close()
+    
+    if fingerprints is not None:
+        fingerprints.prune(out_dir)
         try:
-            import visual_report
-            visual_report.create_visual_reports(observations, out_dir, src_dir, report_options, cfg['photo_location'], log)
-        except ImportError:
-            log("  - visual_report.py 모듈을 찾을 수 없습니다. 시각적 리포트를 건너뜁니다.")
-        except Exception as e:
-            log(f"  - 시각적 리포트 생성 오류: {e}")
+            fingerprints.save()
+        except OSError as e:
+            log(f"  - 내용 지문 캐시 저장 실패: {e}")
     
-    # 기존 텍스트 로그 생성
-    create_logs(log_dir, observations, src_dir, log)
+    profiler.stop()
     
     # 최종 통계
-    csv_count = sum(1 for o in observations if o.get('csv_used'))
-    unique_species = len(set(o['scientific_name'] for o in observations if o['scientific_name'] != 'N/A'))
+    processed = counts['processed']
+    csv_count = counts['csv_used']
+    unique_species = len(counts['species'])
     
     log(f"\n🎉 처리 완료!")
-    if is_pro_mode:
+    if primary_model not in ('flash', 'pro'):
+        log(f"  - 사용 모드: {models[primary_model].label}" + (" → Gemini 2.5 Pro" if use_cascade else ""))
+    elif is_pro_mode:
         log(f"  - 사용 모드: 프리미엄 (Gemini 2.5 Pro)")
+    elif use_cascade:
+        log(f"  - 사용 모드: 단계 (Gemini 2.5 Flash → Pro)")
     else:
         log(f"  - 사용 모드: 기본 (Gemini 2.5 Flash)")
-    log(f"  - 총 처리: {len(observations)}개")
+    if pack is None and isinstance(run['wiki'], wiki_batch.WikiResolver):
+        wiki_stats = run['wiki'].stats
+        log(f"  - Wikipedia 요청: {wiki_stats['round_trips']}회 (이름 {wiki_stats['titles']}개, "
+            f"캐시 적중 {wiki_stats['cache_hits']}회, 실패 {wiki_stats['errors']}회)")
+    for key, model in run['models'].items():
+        stats = run['model_stats'].get(key)
+        if stats:
+            log(f"  - {model.label}: {stats['calls']}회 호출, 평균 {stats['seconds'] / stats['calls']:.1f}초, "
+                f"토큰 {stats['tokens_in']:,}/{stats['tokens_out']:,}, 예상 비용 ${stats['cost']:.4f}")
+        if isinstance(model, identifiers.BatchingIdentifier) and model.stats['batches']:
+            bs = model.stats
+            log(f"    · {model.label} 배치 추론 {bs['batches']}회 (평균 {bs['items'] / bs['batches']:.1f}장)")
+        if isinstance(model, identifiers.HedgedIdentifier) and model.stats['calls']:
+            hs = model.stats
+            p95 = model.p95()
+            log(f"    · {model.label} 시한 초과 {hs['timeouts']}회, 중복 요청 {hs['hedged']}회 (중복 쪽 응답 {hs['hedge_wins']}회), "
+                f"버린 요청 {hs['abandoned']}회" + (f", p95 {p95:.1f}초" if p95 is not None else ""))
+    if run['quota'] is not None:
+        for key in dict.fromkeys(models):
+            log(f"  - 할당량 ({models[key].label}): {run['quota'].describe(key)}")
+    log(f"  - 총 처리: {processed}개")
+    if counts['unchanged']:
+        log(f"  - 변경 없어 건너뜀: {counts['unchanged']}개 (이전 실행 결과 사용)")
     log(f"  - CSV 활용: {csv_count}개") 
     log(f"  - 고유 종: {unique_species}종")
+    log(f"  - 출력 방식: {output_mode} (실제 기록 {format_bytes(bytes_written)})")
+    if fallback_count:
+        log(f"  - 출력 방식 대체: {fallback_count}개 파일은 복사로 처리됨")
+    if run['cropped_count']:
+        log(f"  - 피사체 크롭: {run['cropped_count']}개 (평균 원본 면적의 {run['cropped_area'] / run['cropped_count']:.0%} 전송)")
+    if len(tiers) > 1:
+        for dim, stats in zip(tiers, run['tier_stats']):
+            rate = stats['resolved'] / stats['attempts'] if stats['attempts'] else 0
+            log(f"  - 해상도 {tier_label(dim)}: 시도 {stats['attempts']}회, 확정 {stats['resolved']}회 ({rate:.0%})")
+    if fingerprints is not None and (fingerprints.stats['hits'] or fingerprints.stats['misses']):
+        fs = fingerprints.stats
+        log(f"  - 내용 지문: 캐시 적중 {fs['hits']}/{fs['hits'] + fs['misses']}개 ({fingerprints.hit_ratio():.0%}), "
+            f"해시한 데이터 {format_bytes(fs['bytes_hashed'])}")
+    if memory_monitor.supported:
+        peak = memory_monitor.stop()
+        log(f"  - 최대 메모리 (이번 실행): {format_bytes(peak['self'])}"
+            + (f" (디코딩 프로세스 합계 최대 {format_bytes(peak['children'])})" if use_pipeline and peak['children'] else ""))
+    else:
+        peak = peak_memory_bytes()
+        log(f"  - 프로세스 최대 메모리 (프로그램 시작 이후): {format_bytes(peak['self'])}"
+            + (f" (종료된 디코딩 프로세스 최대 {format_bytes(peak['children'])})" if use_pipeline and peak['children'] else ""))
+    profiler.finish()
     
-    if observations:
+    if processed or counts['unchanged']:
         log(f"\n📁 생성된 파일들:")
         log(f"  - 처리된 사진: {out_dir}")
         log(f"  - 탐조 기록: {log_dir}")
         
-        if report_options.get('format') != 'none':
+        if report_options.get('format') != 'none' and make_reports:
             thumbnail_dir = os.path.join(out_dir, 'thumbnail_images')
             log(f"  - 썸네일 이미지: {thumbnail_dir}")
             
@@ -462,4 +1977,81 @@ def process_all_images(cfg: Dict):
             
             log(f"\n💡 HTML 리포트는 웹 브라우저에서, Word 리포트는 Microsoft Word에서 열어보세요!")
     else:
-        log(f"\n⚠️  처리된 조류 사진이 없습니다.")
\ No newline at end of file
+        log(f"\n⚠️  처리된 조류 사진이 없습니다.")    
+    return {
+        'folder': src_dir,
+        'out_dir': out_dir,
+        'processed': processed,
+        'species': counts['species'],
+        'csv_count': csv_count,
+        'bytes_written': bytes_written,
+        'model_stats': run['model_stats'],
+        'quota_stopped': run['quota_stopped'],
+    }
+
+
+# ---------------------- 여러 폴더 일괄 처리 ----------------------
+def batch_folders(root: str) -> List[str]:
+    """날짜별 하위 폴더가 있는 루트 폴더에서 처리할 폴더 목록 (이름 순, 하위 폴더가 없으면 루트 자신)"""
+    folders = []
+    with os.scandir(root) as it:
+        for entry in it:
+            if entry.is_dir() and entry.name != OUTPUT_DIR_NAME and not entry.name.startswith('.'):
+                folders.append(entry.path)
+    return sorted(folders) or [root]
+
+
+def process_batch(cfg: Dict, folders: List[str]) -> Dict:
+    """여러 폴더를 차례로 처리 (모델·캐시·속도 제한·프로세스 풀은 공유, 출력과 리포트는 폴더별)
+
+    마지막에 전체 요약을 로그로 남기고 폴더별 요약 목록과 합계를 반환합니다.
+    """
+    log = cfg['log_callback']
+    started = time.monotonic()
+    shared = create_shared_resources(cfg)
+    summaries = []
+    try:
+        for i, folder in enumerate(folders, 1):
+            log(f"\n{'=' * 50}\n📂 [{i}/{len(folders)}] {folder}\n{'=' * 50}")
+            try:
+                summaries.append(process_all_images({**cfg, 'target_folder': folder}, shared))
+            except Exception as e:
+                log(f"  ! 폴더 처리 오류: {e}")
+                continue
+            if summaries[-1]['quota_stopped'] is not None:
+                # 다음 실행에서 이미 끝낸 폴더는 건너뛰도록 빈 대기열을 남김
+                for done in summaries[:-1]:
+                    quota.save_queue(os.path.join(done['out_dir'], quota.QUEUE_NAME), [], [])
+                if i < len(folders):
+                    log(f"\n⏸️  할당량 도달로 남은 폴더 {len(folders) - i}개는 다음 실행에서 처리합니다.")
+                break
+    finally:
+        close_shared_resources(shared)
+    
+    species = set().union(*(s['species'] for s in summaries))
+    processed = sum(s['processed'] for s in summaries)
+    model_totals: Dict[str, Dict] = {}
+    for s in summaries:
+        for key, stats in s['model_stats'].items():
+            total = model_totals.setdefault(key, dict.fromkeys(stats, 0))
+            for field, value in stats.items():
+                total[field] += value
+    
+    log(f"\n{'=' * 50}\n🗂️  일괄 처리 완료: {len(summaries)}/{len(folders)}개 폴더, "
+        f"{exif_scan.format_duration(time.monotonic() - started)}")
+    for s in summaries:
+        log(f"  - {os.path.basename(s['folder']) or s['folder']}: {s['processed']}개, {len(s['species'])}종, "
+            f"기록 {format_bytes(s['bytes_written'])}")
+    log(f"  - 총 처리: {processed}개")
+    log(f"  - 고유 종 (전체): {len(species)}종")
+    log(f"  - 실제 기록: {format_bytes(sum(s['bytes_written'] for s in summaries))}")
+    for key, stats in model_totals.items():
+        if stats.get('calls'):
+            log(f"  - {shared['models'][key].label}: {stats['calls']}회 호출, "
+                f"토큰 {stats['tokens_in']:,}/{stats['tokens_out']:,}, 예상 비용 ${stats['cost']:.4f}")
+    if shared['rate_limiter'] is not None:
+        log(f"  - 속도 제한 대기: 총 {shared['rate_limiter'].waited:.1f}초")
+    if shared['quota'] is not None:
+        for key in dict.fromkeys(shared['models']):
+            log(f"  - 할당량 ({shared['models'][key].label}): {shared['quota'].describe(key)}")
+    return {'folders': summaries, 'processed': processed, 'species': species, 'model_stats': model_totals}
\ No newline at end of file
@@ -0,0 +1,149 @@
+# 파일 이름: exif_scan.py
+"""
+JPEG의 APP1(Exif) 세그먼트만 읽어 촬영 시각과 회전 정보를 얻는 가벼운 스캐너입니다.
+
+이미지 디코딩 없이 파일 앞부분 몇 KB만 읽으므로, 무거운 작업을 시작하기 전에
+폴더 전체를 병렬로 미리 훑어 촬영 순 정렬, 연속 촬영 묶음, 예상 소요 시간을
+계산하는 데 씁니다.
+"""
+
+from __future__ import annotations
+
+import struct
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, NamedTuple
+
+# EXIF 태그 번호
+TAG_ORIENTATION = 0x0112
+TAG_DATETIME = 0x0132
+TAG_EXIF_IFD = 0x8769
+TAG_DATETIME_ORIGINAL = 0x9003
+
+# 타입별 값 크기 (BYTE, ASCII, SHORT, LONG, RATIONAL, ...)
+_TYPE_SIZES = {1: 1, 2: 1, 3: 2, 4: 4, 5: 8, 7: 1, 9: 4, 10: 8}
+
+
+class ExifHeader(NamedTuple):
+    datetime: datetime | None   # DateTimeOriginal (없으면 DateTime)
+    orientation: int | None     # EXIF orientation (태그가 없으면 1 = 정상, 헤더를 읽지 못했으면 None)
+
+
+# 헤더를 찾지 못했거나 파싱에 실패함: 처리할 때 PIL로 다시 읽도록 값을 비워 둠
+NO_EXIF = ExifHeader(None, None)
+
+
+def _read_app1(f) -> bytes | None:
+    """JPEG 마커를 따라가며 Exif APP1 세그먼트 본문을 반환 (SOS 전까지만 탐색)"""
+    if f.read(2) != b'\xff\xd8':
+        return None
+    while True:
+        marker = f.read(2)
+        if len(marker) < 2 or marker[0] != 0xFF:
+            return None
+        code = marker[1]
+        if code == 0xFF:  # 채움 바이트
+            f.seek(-1, 1)
+            continue
+        if code in (0xD9, 0xDA):  # EOI, SOS: 이후는 영상 데이터
+            return None
+        if 0xD0 <= code <= 0xD7 or code == 0x01:  # 길이 없는 마커
+            continue
+        raw = f.read(2)
+        if len(raw) < 2:
+            return None
+        length = struct.unpack('>H', raw)[0] - 2
+        if code == 0xE1:
+            data = f.read(length)
+            if data.startswith(b'Exif\x00\x00'):
+                return data[6:]
+        else:
+            f.seek(length, 1)
+
+
+def _read_ifd(tiff: bytes, offset: int, endian: str) -> Dict[int, object]:
+    """IFD 하나에서 필요한 태그 값만 읽음"""
+    entries = {}
+    count = struct.unpack_from(endian + 'H', tiff, offset)[0]
+    for i in range(count):
+        pos = offset + 2 + i * 12
+        tag, typ, num = struct.unpack_from(endian + 'HHI', tiff, pos)
+        if tag not in (TAG_ORIENTATION, TAG_DATETIME, TAG_EXIF_IFD, TAG_DATETIME_ORIGINAL):
+            continue
+        size = _TYPE_SIZES.get(typ, 1) * num
+        value_pos = pos + 8 if size <= 4 else struct.unpack_from(endian + 'I', tiff, pos + 8)[0]
+        if typ == 2:
+            entries[tag] = tiff[value_pos:value_pos + num].split(b'\x00', 1)[0].decode('ascii', 'ignore')
+        elif typ == 3:
+            entries[tag] = struct.unpack_from(endian + 'H', tiff, value_pos)[0]
+        elif typ == 4:
+            entries[tag] = struct.unpack_from(endian + 'I', tiff, value_pos)[0]
+    return entries
+
+
+def _parse_datetime(value) -> datetime | None:
+    try:
+        return datetime.strptime(value.strip(), "%Y:%m:%d %H:%M:%S") if value else None
+    except ValueError:
+        return None
+
+
+def parse_exif(tiff: bytes) -> ExifHeader:
+    """APP1 세그먼트의 TIFF 본문에서 촬영 시각과 orientation을 추출"""
+    endian = {b'II': '<', b'MM': '>'}.get(tiff[:2])
+    if endian is None:
+        return NO_EXIF
+    ifd0 = _read_ifd(tiff, struct.unpack_from(endian + 'I', tiff, 4)[0], endian)
+    exif_ifd = _read_ifd(tiff, ifd0[TAG_EXIF_IFD], endian) if TAG_EXIF_IFD in ifd0 else {}
+    dt = _parse_datetime(exif_ifd.get(TAG_DATETIME_ORIGINAL)) or _parse_datetime(ifd0.get(TAG_DATETIME))
+    return ExifHeader(dt, ifd0.get(TAG_ORIENTATION) or 1)
+
+
+def read_exif_header(path: str) -> ExifHeader:
+    """파일의 EXIF 헤더만 읽음 (읽을 수 없거나 EXIF가 없거나 형식이 깨졌으면 NO_EXIF)"""
+    try:
+        with open(path, 'rb') as f:
+            tiff = _read_app1(f)
+        return parse_exif(tiff) if tiff else NO_EXIF
+    except (OSError, struct.error, KeyError):
+        return NO_EXIF
+
+
+def prescan(paths: Iterable[str], workers: int = 8) -> Dict[str, ExifHeader]:
+    """여러 파일의 EXIF 헤더를 병렬로 읽어 경로별로 반환"""
+    paths = list(paths)
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as ex:
+        return dict(zip(paths, ex.map(read_exif_header, paths)))
+
+
+def group_bursts(items: List, key: Callable, gap_seconds: float = 2.0) -> List[List]:
+    """촬영 시각 순으로 정렬된 항목을 간격이 `gap_seconds` 이하인 연속 촬영 묶음으로 나눔
+
+    촬영 시각이 없는 항목은 각각 단독 묶음이 됩니다.
+    """
+    bursts: List[List] = []
+    prev = None
+    for item in items:
+        dt = key(item)
+        if bursts and dt and prev and (dt - prev).total_seconds() <= gap_seconds:
+            bursts[-1].append(item)
+        else:
+            bursts.append([item])
+        prev = dt
+    return bursts
+
+
+def estimate_seconds(count: int, seconds_per_photo: float, parallel: int = 1) -> float:
+    """사진 수와 장당 처리 시간으로 예상 소요 시간(초)을 계산"""
+    return count * seconds_per_photo / max(1, parallel)
+
+
+def format_duration(seconds: float) -> str:
+    seconds = int(round(seconds))
+    hours, rest = divmod(seconds, 3600)
+    minutes, secs = divmod(rest, 60)
+    if hours:
+        return f"{hours}시간 {minutes}분"
+    if minutes:
+        return f"{minutes}분 {secs}초"
+    return f"{secs}초"
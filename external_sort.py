@@ -0,0 +1,93 @@
+# 파일 이름: external_sort.py
+"""
+메모리에 한 번에 올리지 않고 기록을 정렬하는 외부 병합 정렬(external merge sort)입니다.
+
+`run_size`개씩 모아 메모리에서 정렬한 뒤 임시 파일(run)로 내보내고, 읽을 때는
+모든 run을 `heapq.merge`로 합쳐 차례로 내보내므로 기록 수가 늘어도 정렬에 쓰는
+메모리는 `run_size`와 run 개수만큼으로 일정합니다. 여러 해 분량의 아카이브를
+다시 만들 때 시간순 로그와 리포트에 씁니다.
+"""
+
+from __future__ import annotations
+
+import heapq
+import os
+import pickle
+import shutil
+import tempfile
+from typing import Callable, Iterator, List
+
+
+class ExternalSorter:
+    """`add`로 기록을 넣고 `for`로 정렬된 순서대로 꺼내는 정렬기
+
+    여러 번 순회할 수 있으며(순회할 때마다 run 파일을 다시 병합),
+    같은 키끼리는 넣은 순서를 유지합니다. 다 쓰면 `close()`로 임시 파일을 지웁니다.
+    """
+
+    def __init__(self, key: Callable, run_size: int = 5000, tmp_dir: str | None = None):
+        self.key = key
+        self.run_size = max(1, run_size)
+        self.tmp_dir = tmp_dir
+        self._buffer: List = []
+        self._runs: List[str] = []
+        self._work_dir: str | None = None
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def add(self, record):
+        self._buffer.append(record)
+        self._count += 1
+        if len(self._buffer) >= self.run_size:
+            self._spill()
+
+    def extend(self, records):
+        for record in records:
+            self.add(record)
+
+    def _spill(self):
+        """버퍼를 정렬해 run 파일 하나로 내보냄"""
+        if self._work_dir is None:
+            if self.tmp_dir:
+                os.makedirs(self.tmp_dir, exist_ok=True)
+            self._work_dir = tempfile.mkdtemp(prefix='sort_', dir=self.tmp_dir)
+        self._buffer.sort(key=self.key)
+        path = os.path.join(self._work_dir, f'run_{len(self._runs):05d}.pkl')
+        with open(path, 'wb') as f:
+            for record in self._buffer:
+                pickle.dump(record, f, protocol=pickle.HIGHEST_PROTOCOL)
+        self._runs.append(path)
+        self._buffer = []
+
+    @staticmethod
+    def _read_run(path: str) -> Iterator:
+        with open(path, 'rb') as f:
+            while True:
+                try:
+                    yield pickle.load(f)
+                except EOFError:
+                    return
+
+    def __iter__(self) -> Iterator:
+        self._buffer.sort(key=self.key)
+        if not self._runs:
+            return iter(list(self._buffer))
+        # run 순서대로 넣어 두면 heapq.merge가 같은 키에서 먼저 넣은 기록을 앞에 둠
+        streams = [self._read_run(path) for path in self._runs] + [iter(list(self._buffer))]
+        return heapq.merge(*streams, key=self.key)
+
+    def close(self):
+        if self._work_dir:
+            shutil.rmtree(self._work_dir, ignore_errors=True)
+        self._work_dir = None
+        self._runs = []
+        self._buffer = []
+        self._count = 0
@@ -0,0 +1,431 @@
+# 파일 이름: identifiers.py
+"""
+조류 식별 백엔드입니다.
+
+모든 백엔드는 `identify_batch(requests)`로 이미지 여러 장을 받아 같은 순서로
+`{common_name, scientific_name, order, family, confidence}` 결과를 돌려줍니다.
+(식별하지 못한 항목은 이름 값이 None)
+
+- `GeminiIdentifier`: Gemini 모델 (기본, `create_gemini_model`로 API 키마다 따로 만듦)
+- `FakeIdentifier`: 이미지 바이트로 결과가 정해지는 결정적 가짜 (테스트/데모용)
+- `OnnxIdentifier`: ONNX Runtime CPU 분류 모델 (네트워크 없이 로컬 추론)
+- `HedgedIdentifier`: 다른 백엔드를 감싸 요청 시한과 중복(hedged) 요청을 적용
+- `BatchingIdentifier`: 여러 스레드의 한 장짜리 요청을 모아 `identify_batch` 한 번으로 보냄
+"""
+
+from __future__ import annotations
+
+import functools
+import hashlib
+import io
+import json
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, NamedTuple, Sequence, Tuple
+
+from PIL import Image
+
+RESULT_FIELDS = ('common_name', 'scientific_name', 'order', 'family', 'confidence')
+FLASH_MODEL_NAME = 'models/gemini-2.5-flash-preview-05-20'
+PRO_MODEL_NAME = 'gemini-2.5-pro-preview-06-05'
+BACKENDS = ('gemini', 'onnx', 'fake')   # 명령줄/GUI에서 고를 수 있는 식별 백엔드
+
+
+class IdentifyRequest(NamedTuple):
+    image_data: bytes   # API 전송용 JPEG 바이트
+    prompt: str = ''    # 언어 모델용 프롬프트 (분류 모델은 사용하지 않음)
+
+
+class Identifier:
+    """식별 백엔드 기본 클래스
+
+    `name`은 통계/비용 집계 키이고 `label`은 로그에 표시할 이름입니다.
+    결과 dict에는 토큰 사용량 `usage` = (입력, 출력)을 넣을 수 있습니다.
+    `batched`인 백엔드는 `identify_batch` 한 번에 여러 장을 함께 처리하므로(로컬 추론)
+    파이프라인에서 요청을 모아 보내고, 아니면(원격 API) 한 장씩 보냅니다.
+    """
+
+    name = 'identifier'
+    label = '식별기'
+    batched = False
+
+    def identify_batch(self, requests: Sequence[IdentifyRequest]) -> List[Dict]:
+        raise NotImplementedError
+
+    def identify(self, request: IdentifyRequest) -> Dict:
+        return self.identify_batch([request])[0]
+
+    def close(self):
+        """백엔드가 가진 자원 정리 (필요한 백엔드만 구현)"""
+
+
+def parse_confidence(value) -> float | None:
+    """모델이 밝힌 확신도를 0~1 실수로 (문자열 "0.8", 백분율 85도 받음, 알 수 없으면 None)"""
+    if value is None or isinstance(value, bool):
+        return None
+    try:
+        confidence = float(str(value).strip().rstrip('%'))
+    except ValueError:
+        return None
+    if confidence != confidence:   # NaN
+        return None
+    if 1 < confidence <= 100:
+        confidence /= 100
+    return confidence if 0 <= confidence <= 1 else None
+
+
+def _result(**values) -> Dict:
+    result = {field: values.get(field) for field in RESULT_FIELDS}
+    result['confidence'] = parse_confidence(result['confidence'])
+    return result
+
+
+def _generativelanguage():
+    """Gemini API 클라이언트 라이브러리 (google-generativeai가 함께 설치하는 google-ai-generativelanguage)"""
+    from google.ai import generativelanguage
+    return generativelanguage
+
+
+class GeminiResponse(NamedTuple):
+    text: str              # 첫 후보의 텍스트
+    usage_metadata: object  # 토큰 사용량 (prompt_token_count, candidates_token_count, ...)
+
+
+class GeminiModel:
+    """API 키 하나로 만든 Gemini 모델
+
+    genai.configure 같은 전역 설정 대신 키마다 `GenerativeServiceClient`를 따로 만들므로
+    Flash/Pro 키가 다른 모델을 차례로 만들거나 동시에 써도 키가 섞이지 않습니다.
+    `generate_content`는 google.generativeai의 GenerativeModel처럼 텍스트, PIL 이미지,
+    `{'mime_type', 'data'}` 조각의 목록을 받습니다.
+    """
+
+    def __init__(self, api_key: str, model_name: str):
+        glm = _generativelanguage()
+        self.model_name = model_name if model_name.startswith('models/') else f"models/{model_name}"
+        self.client = glm.GenerativeServiceClient(client_options={'api_key': api_key})
+
+    @staticmethod
+    def _part(glm, content):
+        if isinstance(content, str):
+            return glm.Part(text=content)
+        if isinstance(content, dict):
+            return glm.Part(inline_data=glm.Blob(mime_type=content['mime_type'], data=content['data']))
+        buffer = io.BytesIO()
+        content.convert('RGB').save(buffer, format='JPEG', quality=95)
+        return glm.Part(inline_data=glm.Blob(mime_type='image/jpeg', data=buffer.getvalue()))
+
+    def generate_content(self, contents: Sequence, generation_config: Dict | None = None,
+                         request_options: Dict | None = None) -> GeminiResponse:
+        glm = _generativelanguage()
+        request = glm.GenerateContentRequest(
+            model=self.model_name,
+            contents=[glm.Content(role='user', parts=[self._part(glm, c) for c in contents])],
+            generation_config=glm.GenerationConfig(**(generation_config or {})),
+        )
+        response = self.client.generate_content(request=request, **(request_options or {}))
+        if not response.candidates:
+            raise ValueError(f"Gemini 응답에 후보가 없습니다 (차단 사유: {response.prompt_feedback})")
+        text = ''.join(part.text for part in response.candidates[0].content.parts)
+        return GeminiResponse(text, response.usage_metadata)
+
+
+def create_gemini_model(api_key: str, model_name: str) -> GeminiModel:
+    """API 키별 Gemini 모델 생성"""
+    return GeminiModel(api_key, model_name)
+
+
+class GeminiIdentifier(Identifier):
+    """Gemini 모델 어댑터 (JPEG 바이트를 그대로 보내고 JSON 응답을 결과로 변환)"""
+
+    LABELS = {'flash': 'Gemini 2.5 Flash', 'pro': 'Gemini 2.5 Pro'}
+
+    def __init__(self, model, name: str = 'flash', timeout: float | None = None):
+        self.model = model
+        self.name = name
+        self.label = self.LABELS.get(name, name)
+        self.timeout = timeout  # 요청 하나의 HTTP 시한 (초)
+
+    def identify_batch(self, requests: Sequence[IdentifyRequest]) -> List[Dict]:
+        results = []
+        extra = {'request_options': {'timeout': self.timeout}} if self.timeout else {}
+        for request in requests:
+            response = self.model.generate_content(
+                [request.prompt, {'mime_type': 'image/jpeg', 'data': request.image_data}],
+                generation_config={"response_mime_type": "application/json"},
+                **extra
+            )
+            result = _result(**json.loads(response.text))
+            usage = getattr(response, 'usage_metadata', None)
+            result['usage'] = (
+                getattr(usage, 'prompt_token_count', 0) or 0,
+                (getattr(usage, 'candidates_token_count', 0) or 0) + (getattr(usage, 'thoughts_token_count', 0) or 0),
+            )
+            results.append(result)
+        return results
+
+
+class FakeIdentifier(Identifier):
+    """네트워크 없이 항상 같은 입력에 같은 결과를 내는 가짜 식별기
+
+    `species`(결과 dict 목록) 중 하나를 이미지 바이트의 해시로 고릅니다.
+    """
+
+    name = 'fake'
+    label = '가짜 식별기'
+    batched = True
+    DEFAULT_SPECIES = (
+        {'common_name': 'Great Tit', 'scientific_name': 'Parus major', 'order': 'Passeriformes', 'family': 'Paridae'},
+        {'common_name': 'Eurasian Tree Sparrow', 'scientific_name': 'Passer montanus', 'order': 'Passeriformes', 'family': 'Passeridae'},
+        {'common_name': 'Oriental Magpie', 'scientific_name': 'Pica serica', 'order': 'Passeriformes', 'family': 'Corvidae'},
+    )
+
+    def __init__(self, species: Sequence[Dict] | None = None, confidence: float = 0.9):
+        self.species = list(species or self.DEFAULT_SPECIES)
+        self.confidence = confidence
+
+    def identify_batch(self, requests: Sequence[IdentifyRequest]) -> List[Dict]:
+        results = []
+        for request in requests:
+            digest = hashlib.blake2b(request.image_data, digest_size=8).digest()
+            chosen = self.species[int.from_bytes(digest, 'big') % len(self.species)]
+            results.append(_result(confidence=self.confidence, **chosen))
+        return results
+
+
+class OnnxIdentifier(Identifier):
+    """ONNX Runtime CPU 이미지 분류 모델 어댑터
+
+    - `model_path`: [N, 3, H, W] float32 입력, [N, 클래스 수] 출력(logit 또는 확률)인 모델
+    - `labels_path`: 클래스 순서대로 학명/영문명/목/과가 들어 있는 CSV 또는 JSON
+      (`taxonomy_pack.read_records`와 같은 컬럼 이름)
+    한 번의 `session.run`으로 배치 전체를 추론합니다.
+    """
+
+    name = 'onnx'
+    label = 'ONNX 로컬 분류기'
+    batched = True
+
+    def __init__(self, model_path: str, labels_path: str, input_size: int = 224,
+                 mean: Sequence[float] = (0.485, 0.456, 0.406), std: Sequence[float] = (0.229, 0.224, 0.225),
+                 threads: int | None = None):
+        try:
+            import onnxruntime as ort
+        except ImportError as e:
+            raise ImportError("ONNX 식별기를 사용하려면 onnxruntime 패키지를 설치하세요: pip install onnxruntime") from e
+        import numpy as np
+        from taxonomy_pack import read_records
+
+        options = ort.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(model_path, options, providers=['CPUExecutionProvider'])
+        self.input_name = self.session.get_inputs()[0].name
+        self.labels = read_records(labels_path)
+        self.input_size = input_size
+        self._np = np
+        self.mean = np.array(mean, dtype=np.float32).reshape(1, 3, 1, 1)
+        self.std = np.array(std, dtype=np.float32).reshape(1, 3, 1, 1)
+
+    def _preprocess(self, image_data: bytes):
+        with Image.open(io.BytesIO(image_data)) as img:
+            img = img.convert('RGB').resize((self.input_size, self.input_size), Image.Resampling.BILINEAR)
+            return self._np.asarray(img, dtype=self._np.float32).transpose(2, 0, 1) / 255.0
+
+    def identify_batch(self, requests: Sequence[IdentifyRequest]) -> List[Dict]:
+        np = self._np
+        if not requests:
+            return []
+        batch = (np.stack([self._preprocess(r.image_data) for r in requests]) - self.mean) / self.std
+        scores = self.session.run(None, {self.input_name: batch.astype(np.float32)})[0]
+        # 확률이 아니면 softmax
+        if not np.allclose(scores.sum(axis=1), 1.0, atol=1e-3) or scores.min() < 0:
+            scores = np.exp(scores - scores.max(axis=1, keepdims=True))
+            scores /= scores.sum(axis=1, keepdims=True)
+
+        results = []
+        for row in scores:
+            best = int(row.argmax())
+            label = self.labels[best] if best < len(self.labels) else {}
+            results.append(_result(confidence=float(row[best]), **{k: v for k, v in label.items() if k in RESULT_FIELDS}))
+        return results
+
+
+class HedgedIdentifier(Identifier):
+    """요청 시한(deadline)과 중복 요청(hedging)을 적용하는 감싸개
+
+    - `deadline`초 안에 응답이 없으면 TimeoutError를 냅니다.
+    - `hedge`이면 관측한 지연 시간의 `quantile`(기본 p95)을 넘도록 응답이 없을 때
+      같은 요청을 한 번 더 보내고 먼저 온 응답을 씁니다. 지연 표본이
+      `min_samples`개 모이기 전에는 중복 요청을 보내지 않습니다.
+    늦은 쪽 요청은 결과를 버리며(이미 실행 중이면 취소할 수 없음) `stats`에 집계합니다.
+    `hedge_call`을 주면 중복 요청을 그 함수로 감싸 보냅니다 (`hedge_call(send)`: 할당량을
+    허가받고 `send()`의 결과를 기록한 뒤 돌려줌). 감싼 함수가 예외를 내면(한도 도달 등)
+    중복 요청 없이 처음 요청의 응답을 기다립니다.
+    """
+
+    def __init__(self, inner: Identifier, deadline: float | None = None, hedge: bool = False,
+                 quantile: float = 0.95, min_samples: int = 20, max_workers: int = 8,
+                 hedge_call: Callable[[Callable[[], List[Dict]]], List[Dict]] | None = None):
+        self.inner = inner
+        self.name = inner.name
+        self.label = inner.label
+        self.deadline = deadline
+        self.hedge = hedge
+        self.quantile = quantile
+        self.min_samples = min_samples
+        self.hedge_call = hedge_call
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f'identify-{inner.name}')
+        self.latencies: deque = deque(maxlen=200)
+        self.stats = {'calls': 0, 'hedged': 0, 'hedge_wins': 0, 'timeouts': 0, 'abandoned': 0}
+        self._lock = threading.Lock()
+
+    def hedge_delay(self) -> float | None:
+        """중복 요청을 보낼 대기 시간 (관측 지연의 분위수, 표본이 부족하면 None)"""
+        with self._lock:
+            if not self.hedge or len(self.latencies) < self.min_samples:
+                return None
+            ordered = sorted(self.latencies)
+        return ordered[int(self.quantile * (len(ordered) - 1))]
+
+    def p95(self) -> float | None:
+        with self._lock:
+            ordered = sorted(self.latencies)
+        return ordered[int(0.95 * (len(ordered) - 1))] if ordered else None
+
+    def _abandon(self, pending):
+        for future in pending:
+            future.cancel()
+        with self._lock:
+            self.stats['abandoned'] += len(pending)
+
+    def identify_batch(self, requests: Sequence[IdentifyRequest]) -> List[Dict]:
+        requests = list(requests)
+        start = time.monotonic()
+        delay = self.hedge_delay()
+        hedge_at = start + delay if delay is not None else None
+        deadline_at = start + self.deadline if self.deadline else None
+        with self._lock:
+            self.stats['calls'] += 1
+
+        first = self.executor.submit(self.inner.identify_batch, requests)
+        pending = {first}
+        error = None
+        while pending:
+            wake = [t for t in (hedge_at, deadline_at) if t is not None]
+            timeout = max(0.0, min(wake) - time.monotonic()) if wake else None
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    with self._lock:
+                        self.latencies.append(time.monotonic() - start)
+                        if future is not first:
+                            self.stats['hedge_wins'] += 1
+                    self._abandon(pending)
+                    return future.result()
+                if future is first or error is None:  # 중복 요청의 실패(한도 등)보다 처음 요청의 오류를 알림
+                    error = future.exception()
+            now = time.monotonic()
+            if deadline_at is not None and now >= deadline_at:
+                break
+            if hedge_at is not None and now >= hedge_at and pending:
+                # p95를 넘긴 요청: 같은 요청을 한 번 더 보내고 먼저 온 응답을 씀
+                hedge_at = None
+                send = functools.partial(self.inner.identify_batch, requests)
+                pending.add(self.executor.submit(self.hedge_call, send) if self.hedge_call else self.executor.submit(send))
+                with self._lock:
+                    self.stats['hedged'] += 1
+
+        if pending or error is None:
+            self._abandon(pending)
+            with self._lock:
+                self.stats['timeouts'] += 1
+            raise TimeoutError(f"{self.label} 응답 시한 {self.deadline:g}초 초과")
+        raise error
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.inner.close()
+
+
+class BatchingIdentifier(Identifier):
+    """여러 스레드가 동시에 부르는 `identify`를 모아 `identify_batch` 한 번으로 보내는 감싸개
+
+    파이프라인의 식별 작업자들이 한 장씩 요청하면, 먼저 온 스레드가 `window`초 동안
+    기다렸다가 그 사이 들어온 요청을 `max_batch`장씩 묶어 보냅니다 (wiki_batch.WikiResolver와 같은 방식).
+    """
+
+    def __init__(self, inner: Identifier, max_batch: int = 16, window: float = 0.05):
+        self.inner = inner
+        self.name = inner.name
+        self.label = inner.label
+        self.batched = True
+        self.max_batch = max(1, max_batch)
+        self.window = window
+        self._queue: List[Tuple[IdentifyRequest, Future]] = []
+        self._flushing = False
+        self._lock = threading.Lock()
+        self.stats = {'batches': 0, 'items': 0}
+
+    def identify_batch(self, requests: Sequence[IdentifyRequest]) -> List[Dict]:
+        return self.inner.identify_batch(requests)
+
+    def identify(self, request: IdentifyRequest) -> Dict:
+        future: Future = Future()
+        with self._lock:
+            self._queue.append((request, future))
+            lead = not self._flushing
+            if lead:
+                self._flushing = True
+        if lead:
+            # 같은 창 안에 다른 스레드가 보낸 요청도 함께 처리
+            time.sleep(self.window)
+            self._flush()
+        return future.result()
+
+    def _flush(self):
+        """모인 요청을 `max_batch`장씩 처리 (실패한 묶음의 요청은 모두 그 예외를 받음)"""
+        try:
+            while True:
+                with self._lock:
+                    batch = self._queue[:self.max_batch]
+                    del self._queue[:self.max_batch]
+                    if not batch:
+                        self._flushing = False
+                        return
+                try:
+                    results = self.inner.identify_batch([request for request, _ in batch])
+                except Exception as e:
+                    for _, future in batch:
+                        future.set_exception(e)
+                    continue
+                with self._lock:
+                    self.stats['batches'] += 1
+                    self.stats['items'] += len(batch)
+                for (_, future), result in zip(batch, results):
+                    future.set_result(result)
+        except BaseException as e:
+            with self._lock:
+                waiting, self._queue = self._queue, []
+                self._flushing = False
+            for _, future in waiting:
+                future.set_exception(e)
+            raise
+
+    def close(self):
+        self.inner.close()
+
+
+def create_identifier(backend: str, model_path: str | None = None, labels_path: str | None = None) -> Identifier | None:
+    """명령줄/GUI에서 고른 식별 백엔드 생성 ('gemini'이면 None: Gemini 모델은 API 키로 따로 만듦)"""
+    if backend == 'onnx':
+        if not model_path or not labels_path:
+            raise ValueError("ONNX 백엔드에는 모델 파일(.onnx)과 클래스 목록 파일이 모두 필요합니다.")
+        return OnnxIdentifier(model_path, labels_path)
+    if backend == 'fake':
+        return FakeIdentifier()
+    if backend != 'gemini':
+        raise ValueError(f"알 수 없는 식별 백엔드: {backend}")
+    return None
@@ -0,0 +1,133 @@
+# 파일 이름: name_index.py
+"""
+CSV 학명 목록에 대한 근사 일치(퍼지) 색인입니다.
+
+Gemini가 아종 삼명(trinomial), 철자가 조금 틀린 속명 등을 돌려주면 CSV의
+정확 일치 조회가 실패합니다. 미리 만들어 둔 trigram 색인으로 후보를 좁힌 뒤
+편집 거리(Levenshtein)를 계산하여 가장 가까운 학명과 그 거리를 돌려줍니다.
+
+같은 속의 종은 한두 글자만 다른 경우가 많으므로(Parus major / minor,
+Emberiza rustica / rutila) 편집 거리는 최대 1까지만, 그리고 가장 가까운 학명이
+하나뿐일 때만 받아들입니다.
+"""
+
+from __future__ import annotations
+
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, NamedTuple, Set, Tuple
+
+MAX_FUZZY_DISTANCE = 1  # 지원하는 최대 편집 거리 (더 큰 값은 ValueError)
+
+
+class NameMatch(NamedTuple):
+    name: str        # CSV의 학명
+    korean: str      # CSV의 국명
+    distance: int    # 정규화한 질의와의 편집 거리 (0 = 정확 일치)
+    query: str       # 실제로 비교한 질의 (삼명이면 이명으로 줄인 값)
+
+
+def normalize_name(name: str) -> str:
+    """소문자, 공백 정리, 괄호·기호 제거"""
+    name = re.sub(r'\(.*?\)', ' ', name.lower())
+    name = re.sub(r'[^a-z\s-]', ' ', name)
+    return ' '.join(name.split())
+
+
+def binomial(name: str) -> str:
+    """삼명(아종)을 이명(속명 + 종소명)으로 줄임"""
+    return ' '.join(name.split()[:2])
+
+
+def trigrams(name: str) -> Set[str]:
+    padded = f"  {name} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a: str, b: str, limit: int | None = None) -> int:
+    """Levenshtein 거리 (`limit`를 넘는 것이 확실해지면 limit + 1 반환)"""
+    if limit is not None and abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        if limit is not None and min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+class NameIndex:
+    """학명 → 국명 근사 일치 색인"""
+
+    def __init__(self, entries: Iterable[Tuple[str, str]]):
+        self.names: List[str] = []
+        self.korean: List[str] = []
+        self.exact: Dict[str, int] = {}
+        self.grams: Dict[str, List[int]] = {}
+        for sci, korean in entries:
+            key = normalize_name(str(sci))
+            if not key or key in self.exact:
+                continue
+            idx = len(self.names)
+            self.names.append(str(sci).strip())
+            self.korean.append(str(korean).strip())
+            self.exact[key] = idx
+            for gram in trigrams(key):
+                self.grams.setdefault(gram, []).append(idx)
+        self.keys = list(self.exact)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @classmethod
+    def from_dataframe(cls, csv_df) -> 'NameIndex':
+        """`csv_lookup`과 같은 두 가지 CSV 형식(컬럼명 / 인덱스)을 모두 지원"""
+        if "학명" in csv_df.columns and "국명" in csv_df.columns:
+            pairs = zip(csv_df["학명"], csv_df["국명"])
+        else:
+            pairs = zip(csv_df.iloc[:, 2], csv_df.iloc[:, 1])
+        return cls((sci, ko) for sci, ko in pairs
+                   if isinstance(sci, str) and isinstance(ko, str) and sci.strip() != '학명')
+
+    def _match(self, idx: int, distance: int, query: str) -> NameMatch:
+        return NameMatch(self.names[idx], self.korean[idx], distance, query)
+
+    def lookup(self, name: str | None, max_distance: int = 1) -> NameMatch | None:
+        """가장 가까운 학명 (거리가 `max_distance`보다 크거나, 가장 가까운 학명이 둘 이상이면 None)
+
+        `max_distance`가 MAX_FUZZY_DISTANCE보다 크면 ValueError.
+        """
+        if max_distance > MAX_FUZZY_DISTANCE:
+            raise ValueError(f"max_distance는 {MAX_FUZZY_DISTANCE} 이하여야 합니다: {max_distance}")
+        if not name:
+            return None
+        query = normalize_name(name)
+        if query in self.exact:
+            return self._match(self.exact[query], 0, query)
+        query = binomial(query)
+        if query in self.exact:
+            return self._match(self.exact[query], 0, query)
+        if max_distance <= 0:
+            return None
+
+        # 한 번 고칠 때마다 trigram이 최대 3개 달라지므로, 그보다 적게 공유하는 후보는 볼 필요 없음
+        query_grams = trigrams(query)
+        votes = Counter()
+        for gram in query_grams:
+            votes.update(self.grams.get(gram, ()))
+        min_votes = len(query_grams) - 3 * max_distance
+        best, best_distance, ties = None, max_distance + 1, 0
+        for idx, count in votes.items():
+            if count < min_votes:
+                continue
+            distance = edit_distance(query, self.keys[idx], max_distance)
+            if distance < best_distance:
+                best, best_distance, ties = idx, distance, 1
+            elif distance == best_distance:
+                ties += 1
+        if best is None or ties > 1:
+            return None
+        return self._match(best, best_distance, query)
@@ -0,0 +1,241 @@
+# 파일 이름: pipeline.py
+"""
+사진 한 장의 처리 과정을 단계별로 나누어 동시에 실행하는 파이프라인입니다.
+
+디코딩/인코딩은 프로세스 풀, API·Wikipedia 호출은 I/O 스레드, 파일 저장은
+쓰기 스레드가 맡고, 단계 사이를 크기가 제한된 큐로 연결하여 메모리 사용량을
+일정하게 유지하면서 디스크·CPU·네트워크가 동시에 일하도록 합니다.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Iterable
+
+_DONE = object()
+
+
+def resolve_workers(overrides: Dict[str, int] | None = None) -> Dict[str, int]:
+    """단계별 작업자 수 (지정하지 않은 단계는 기본값)"""
+    cpu = os.cpu_count() or 2
+    workers = {'decode': max(1, cpu - 1), 'io': 4, 'write': 2}
+    workers.update({k: max(1, int(v)) for k, v in (overrides or {}).items() if k in workers})
+    return workers
+
+
+class MemoryBudget:
+    """동시에 디코딩 중인 사진들의 추정 메모리 합이 예산을 넘지 않도록 막는 가중 세마포어
+
+    예산보다 큰 사진 한 장은 다른 작업이 없을 때 단독으로 진행시킵니다.
+    """
+
+    def __init__(self, budget_bytes: int):
+        self.budget = max(1, int(budget_bytes))
+        self.in_use = 0
+        self.peak = 0
+        self._cond = threading.Condition()
+
+    def acquire(self, amount: int):
+        with self._cond:
+            while self.in_use and self.in_use + amount > self.budget:
+                self._cond.wait()
+            self.in_use += amount
+            self.peak = max(self.peak, self.in_use)
+
+    def release(self, amount: int):
+        with self._cond:
+            self.in_use -= amount
+            self._cond.notify_all()
+
+
+class RateLimiter:
+    """분당 요청 수 제한 (요청 사이 간격을 고르게 유지, 여러 스레드·폴더가 함께 사용)"""
+
+    def __init__(self, per_minute: float):
+        self.interval = 60.0 / per_minute
+        self.waited = 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+            self.waited += start - now
+        if start > now:
+            time.sleep(start - now)
+
+
+class StagedPipeline:
+    """디코딩 → 식별 → 저장 3단계 파이프라인
+
+    - `decode_fn(item)`: 프로세스 풀에서 실행되므로 모듈 최상위 함수여야 하고
+      인자와 반환값은 pickle 가능해야 합니다.
+    - `identify_fn(item, decoded)`: I/O 스레드에서 실행, None을 반환하면 저장 단계로 넘기지 않습니다.
+    - `write_fn(item, decoded, identified)`: 쓰기 스레드에서 실행됩니다.
+
+    각 함수에서 발생한 예외는 해당 항목만 실패로 기록하고 계속 진행합니다.
+    `items`를 읽다가 예외가 나면 `stop()`처럼 멈추고 저장 대기 항목까지 끝낸 뒤 `run()`에서 다시 던집니다.
+    `pool`을 주면 새로 만들지 않고 그 프로세스 풀을 쓰며 종료하지 않습니다 (여러 폴더 일괄 처리).
+    `stop()`을 부르면 새 항목 투입을 멈추고 아직 식별하지 않은 항목은 건너뜁니다 (저장 대기 항목은 저장).
+    식별 단계에서 같은 항목을 다시 디코딩해야 하면(해상도 올리기) `decode()`로 같은 풀과 예산을 씁니다.
+    """
+
+    def __init__(self, decode_fn: Callable, identify_fn: Callable, write_fn: Callable, log,
+                 workers: Dict[str, int] | None = None, queue_size: int = 8,
+                 monitor_interval: float = 5.0, label: Callable = str,
+                 budget: MemoryBudget | None = None, cost_fn: Callable | None = None,
+                 pool: ProcessPoolExecutor | None = None):
+        self.decode_fn = decode_fn
+        self.identify_fn = identify_fn
+        self.write_fn = write_fn
+        self.log = log
+        self.workers = resolve_workers(workers)
+        self.queue_size = max(1, queue_size)
+        self.monitor_interval = monitor_interval
+        self.label = label
+        self.budget = budget
+        self.cost_fn = cost_fn
+        self.pool = pool
+
+        # 디코딩 결과(future) 대기열과 저장 대기열: 크기 제한으로 메모리 상한 유지
+        self.decode_queue: queue.Queue = queue.Queue(self.queue_size)
+        self.write_queue: queue.Queue = queue.Queue(self.queue_size)
+        self.stats = {'submitted': 0, 'identified': 0, 'written': 0, 'failed': 0}
+        self._stats_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._feed_error: BaseException | None = None
+        self._pool: ProcessPoolExecutor | None = None
+
+    def _count(self, key: str):
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def _fail(self, item, stage: str, exc: Exception):
+        self._count('failed')
+        self.log(f"  ! [{self.label(item)}] {stage} 오류: {exc}")
+
+    def _feed(self, pool: ProcessPoolExecutor, items: Iterable):
+        try:
+            for item in items:
+                if self._stopped.is_set():
+                    break
+                # 메모리 예산이 있으면 추정 사용량만큼 확보한 뒤 디코딩 시작
+                cost = self.cost_fn(item) if self.budget and self.cost_fn else 0
+                if self.budget:
+                    self.budget.acquire(cost)
+                future = pool.submit(self.decode_fn, item)
+                if self.budget:
+                    future.add_done_callback(lambda _, cost=cost: self.budget.release(cost))
+                # 큐가 가득 차면 여기서 대기하므로 동시에 디코딩되는 사진 수가 제한됨
+                self.decode_queue.put((item, future))
+                self._count('submitted')
+        except BaseException as e:
+            # 항목 목록(스캔 등)이 실패: 새 항목 투입을 멈추고 run()에서 알림
+            self._feed_error = e
+            self._stopped.set()
+        finally:
+            for _ in range(self.workers['io']):
+                self.decode_queue.put(_DONE)
+
+    def _identify_worker(self):
+        while True:
+            task = self.decode_queue.get()
+            if task is _DONE:
+                return
+            item, future = task
+            if self._stopped.is_set():
+                future.cancel()
+                continue
+            try:
+                decoded = future.result()
+            except Exception as e:
+                self._fail(item, '디코딩', e)
+                continue
+            try:
+                identified = self.identify_fn(item, decoded)
+            except Exception as e:
+                self._fail(item, '분석', e)
+                continue
+            if identified is None:
+                continue
+            self._count('identified')
+            self.write_queue.put((item, decoded, identified))
+
+    def _write_worker(self):
+        while True:
+            task = self.write_queue.get()
+            if task is _DONE:
+                return
+            item, decoded, identified = task
+            try:
+                self.write_fn(item, decoded, identified)
+                self._count('written')
+            except Exception as e:
+                self._fail(item, '파일 처리', e)
+
+    def stop(self):
+        self._stopped.set()
+
+    def decode(self, fn: Callable, item, cost: int = 0):
+        """(식별 스레드에서) 실행 중인 프로세스 풀로 디코딩하고 결과를 기다림
+
+        메모리 예산이 있으면 `cost`만큼 확보한 뒤 시작하고 끝나면 돌려줍니다.
+        """
+        if self.budget:
+            self.budget.acquire(cost)
+        try:
+            return self._pool.submit(fn, item).result()
+        finally:
+            if self.budget:
+                self.budget.release(cost)
+
+    def log_depths(self):
+        """단계별 대기열 깊이와 진행 상황을 로그로 출력"""
+        with self._stats_lock:
+            stats = dict(self.stats)
+        memory = f", 디코딩 메모리 {self.budget.in_use // 2**20}/{self.budget.budget // 2**20}MB" if self.budget else ""
+        self.log(f"  [파이프라인] 식별 대기 {self.decode_queue.qsize()}/{self.queue_size}, "
+                 f"저장 대기 {self.write_queue.qsize()}/{self.queue_size}{memory} | "
+                 f"투입 {stats['submitted']}, 식별 {stats['identified']}, 저장 {stats['written']}, 실패 {stats['failed']}")
+
+    def run(self, items: Iterable) -> Dict[str, int]:
+        """모든 항목을 처리할 때까지 실행하고 단계별 처리 건수를 반환"""
+        w = self.workers
+        self.log(f"파이프라인 실행: 디코딩 {w['decode']}프로세스, 식별 {w['io']}스레드, "
+                 f"저장 {w['write']}스레드, 대기열 {self.queue_size}")
+
+        pool_context = contextlib.nullcontext(self.pool) if self.pool else ProcessPoolExecutor(max_workers=w['decode'])
+        with pool_context as pool:
+            self._pool = pool
+            feeder = threading.Thread(target=self._feed, args=(pool, items), daemon=True)
+            identifiers = [threading.Thread(target=self._identify_worker, daemon=True) for _ in range(w['io'])]
+            writers = [threading.Thread(target=self._write_worker, daemon=True) for _ in range(w['write'])]
+            for t in [feeder, *identifiers, *writers]:
+                t.start()
+
+            # 식별 단계가 모두 끝나면 저장 단계에 종료 신호 전달
+            last_report = time.monotonic()
+            for t in identifiers:
+                while t.is_alive():
+                    t.join(timeout=0.5)
+                    if time.monotonic() - last_report >= self.monitor_interval:
+                        self.log_depths()
+                        last_report = time.monotonic()
+            for _ in writers:
+                self.write_queue.put(_DONE)
+            for t in writers:
+                t.join()
+            feeder.join()
+            self._pool = None
+
+        self.log_depths()
+        if self._feed_error is not None:
+            raise self._feed_error
+        return dict(self.stats)
@@ -0,0 +1,126 @@
+# 파일 이름: profiling.py
+"""
+실행이 느리거나 메모리가 부족하다는 보고를 받았을 때 첨부할 자료를 만드는 프로파일러입니다.
+
+cfg['profile']을 켜면 처리 단계(스캔, 식별, 썸네일, 리포트, 로그)마다
+- cProfile 결과 `<단계>.pstats` (python -m pstats 또는 snakeviz 등으로 열기)와 상위 함수 목록
+- tracemalloc 스냅샷 `<단계>.tracemalloc`과 메모리를 많이 할당한 위치 상위 목록, 단계별 최대 메모리
+를 `탐조기록/profile_<시각>/`에 저장합니다. 표준 라이브러리만 사용합니다.
+
+cProfile은 호출한 스레드만 측정하므로 파이프라인 모드의 작업 스레드/디코딩 프로세스는
+pstats에 나오지 않습니다 (tracemalloc은 같은 프로세스의 모든 스레드를 측정).
+"""
+
+from __future__ import annotations
+
+import cProfile
+import io
+import os
+import pstats
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Dict, List
+
+TOP_FUNCTIONS = 40     # 단계별 상위 함수 수 (누적 시간 기준)
+TOP_ALLOCATIONS = 25   # 단계별 상위 할당 위치 수
+TRACE_FRAMES = 5       # 할당 위치마다 기록할 호출 스택 깊이
+
+
+def _format_size(size: float) -> str:
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if abs(size) < 1024 or unit == 'GB':
+            return f"{size:.1f}{unit}"
+        size /= 1024
+
+
+class RunProfiler:
+    """단계별 프로파일러 (`enabled`가 False이면 아무것도 하지 않음)
+
+    `start(단계)`는 진행 중인 단계를 끝내고 새 단계를 시작하며, `finish()`가 마지막
+    단계를 끝내고 요약(summary.txt)을 씁니다.
+    """
+
+    def __init__(self, log_dir: str, log=print, enabled: bool = True):
+        self.enabled = enabled
+        self.log = log
+        self.out_dir = os.path.join(log_dir, f"profile_{datetime.now():%Y%m%d_%H%M%S}")
+        self.stages: List[Dict] = []
+        self._current: Dict | None = None
+        self._started_tracemalloc = False
+        self._finished = False
+
+    def start(self, stage: str):
+        if not self.enabled:
+            return
+        self.stop()
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(TRACE_FRAMES)
+            self._started_tracemalloc = True
+        tracemalloc.reset_peak()
+        profile = cProfile.Profile()
+        self._current = {'name': f"{len(self.stages) + 1}_{stage}", 'profile': profile,
+                         'started': time.perf_counter()}
+        profile.enable()
+
+    def stop(self):
+        """진행 중인 단계를 끝내고 그 단계의 파일을 저장"""
+        if not self.enabled or self._current is None:
+            return
+        stage, self._current = self._current, None
+        stage['profile'].disable()
+        seconds = time.perf_counter() - stage['started']
+        current, peak = tracemalloc.get_traced_memory()
+        # 프로파일러 자신(이전 단계의 보고서 작성 등)이 할당한 메모리는 제외
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, __file__, all_frames=True),
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+        ))
+
+        os.makedirs(self.out_dir, exist_ok=True)
+        base = os.path.join(self.out_dir, stage['name'])
+        try:
+            stage['profile'].dump_stats(base + '.pstats')
+            snapshot.dump(base + '.tracemalloc')
+
+            text = io.StringIO()
+            pstats.Stats(stage['profile'], stream=text).sort_stats('cumulative').print_stats(TOP_FUNCTIONS)
+            with open(base + '_functions.txt', 'w', encoding='utf-8') as f:
+                f.write(text.getvalue())
+
+            with open(base + '_memory.txt', 'w', encoding='utf-8') as f:
+                f.write(f"단계 종료 시 사용 중: {_format_size(current)}, 단계 중 최대: {_format_size(peak)}\n\n")
+                f.write(f"할당 위치 상위 {TOP_ALLOCATIONS}개 (단계 종료 시점에 남아 있는 메모리 기준)\n")
+                for stat in snapshot.statistics('traceback')[:TOP_ALLOCATIONS]:
+                    f.write(f"\n{_format_size(stat.size)} ({stat.count}개 블록)\n")
+                    for line in stat.traceback.format():
+                        f.write(f"  {line}\n")
+        except OSError as e:
+            self.log(f"  - 프로파일 저장 실패 ({stage['name']}): {e}")
+
+        self.stages.append({'name': stage['name'], 'seconds': seconds, 'current': current, 'peak': peak})
+
+    def finish(self):
+        """마지막 단계를 끝내고 요약을 쓴 뒤 tracemalloc을 멈춤 (두 번째 호출부터는 아무것도 하지 않음)"""
+        if not self.enabled or self._finished:
+            return
+        self._finished = True
+        self.stop()
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+        if not self.stages:
+            return
+        try:
+            with open(os.path.join(self.out_dir, 'summary.txt'), 'w', encoding='utf-8') as f:
+                f.write(f"{'단계':<20}{'시간(초)':>10}{'최대 메모리':>14}{'종료 시 메모리':>16}\n")
+                for stage in self.stages:
+                    f.write(f"{stage['name']:<20}{stage['seconds']:>10.2f}"
+                            f"{_format_size(stage['peak']):>14}{_format_size(stage['current']):>16}\n")
+        except OSError as e:
+            self.log(f"  - 프로파일 요약 저장 실패: {e}")
+            return
+        slowest = max(self.stages, key=lambda s: s['seconds'])
+        self.log(f"  - 프로파일: {self.out_dir} (가장 오래 걸린 단계 {slowest['name']} {slowest['seconds']:.1f}초, "
+                 f"최대 메모리 {_format_size(max(s['peak'] for s in self.stages))})")
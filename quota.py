@@ -0,0 +1,185 @@
+# 파일 이름: quota.py
+"""
+API 키별 사용량 장부와 할당량 스케줄러입니다.
+
+무료 Flash 키에는 분당/하루 요청 수 제한이 있고 Pro 모드는 사진마다 비용이 듭니다.
+- `QuotaLedger`: 키별·날짜별 요청 수, 토큰, 예상 비용을 JSON 파일에 기록합니다.
+  (API 키 자체는 저장하지 않고 해시 앞부분만 씀)
+- `QuotaScheduler`: 요청 전에 분당 한도만큼 기다리고, 하루 요청 수나 하루 비용 한도에
+  닿으면 `QuotaExceeded`를 내어 처리를 깔끔하게 멈추게 합니다.
+- 처리 순서는 연속 촬영 묶음마다 한 장을 먼저(`prioritize_bursts`), 멈추면 남은 사진을
+  출력 폴더의 대기열 파일(`quota_queue.json`)에 저장하여 다음 날 이어서 처리합니다.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List
+
+from pipeline import RateLimiter
+
+LEDGER_NAME = 'quota_ledger.json'
+QUEUE_NAME = 'quota_queue.json'
+KEEP_DAYS = 31
+
+# 모델별 기본 한도 (None = 제한 없음). 무료 Flash 키 기준이며 cfg['quota']로 덮어씀
+DEFAULT_LIMITS = {
+    'flash': {'per_minute': 10, 'per_day': 250, 'daily_cost': None},
+    'pro': {'per_minute': 5, 'per_day': None, 'daily_cost': 1.0},
+}
+
+
+class QuotaExceeded(Exception):
+    """하루 요청 수 또는 비용 한도에 닿음"""
+
+
+def key_id(api_key: str | None) -> str | None:
+    """장부에 쓸 API 키 식별자 (키 원문 대신 해시 앞부분)"""
+    return hashlib.sha256(api_key.encode('utf-8')).hexdigest()[:12] if api_key else None
+
+
+def _empty_usage() -> Dict:
+    return {'requests': 0, 'tokens_in': 0, 'tokens_out': 0, 'cost': 0.0}
+
+
+class QuotaLedger:
+    """키별·날짜별 사용량 장부 (`path`가 None이면 메모리에서만)"""
+
+    def __init__(self, path: str | None = None):
+        self.path = path
+        self.days: Dict[str, Dict[str, Dict]] = {}
+        self._lock = threading.Lock()
+        if path:
+            try:
+                with open(path, encoding='utf-8') as f:
+                    self.days = json.load(f).get('days', {})
+            except (OSError, ValueError):
+                pass
+
+    def usage(self, key: str, day: date | None = None) -> Dict:
+        with self._lock:
+            return dict(self.days.get((day or date.today()).isoformat(), {}).get(key) or _empty_usage())
+
+    def record(self, key: str, tokens_in: int = 0, tokens_out: int = 0, cost: float = 0.0):
+        with self._lock:
+            usage = self.days.setdefault(date.today().isoformat(), {}).setdefault(key, _empty_usage())
+            usage['requests'] += 1
+            usage['tokens_in'] += tokens_in
+            usage['tokens_out'] += tokens_out
+            usage['cost'] += cost
+
+    def save(self):
+        if not self.path:
+            return
+        with self._lock:
+            oldest = (date.today() - timedelta(days=KEEP_DAYS)).isoformat()
+            self.days = {day: keys for day, keys in self.days.items() if day >= oldest}
+            data = json.dumps({'days': self.days}, ensure_ascii=False, indent=1)
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write(data)
+        os.replace(tmp, self.path)
+
+
+class QuotaScheduler:
+    """모델별 한도 적용
+
+    - `limits`: 모델 → {'per_minute', 'per_day', 'daily_cost'} (DEFAULT_LIMITS에 덮어씀)
+    - `keys`: 모델 → 장부 키 (같은 API 키를 쓰는 모델은 같은 키로 한도를 함께 셈)
+    """
+
+    def __init__(self, ledger: QuotaLedger, limits: Dict[str, Dict] | None = None,
+                 keys: Dict[str, str | None] | None = None):
+        self.ledger = ledger
+        self.limits = {model: dict(values) for model, values in DEFAULT_LIMITS.items()}
+        for model, values in (limits or {}).items():
+            self.limits.setdefault(model, {}).update(values)
+        self.keys = {model: key for model, key in (keys or {}).items() if key}
+        self._limiters = {model: RateLimiter(values['per_minute'])
+                          for model, values in self.limits.items() if values.get('per_minute')}
+        self._inflight: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def ledger_key(self, model: str) -> str:
+        return self.keys.get(model, model)
+
+    def acquire(self, model: str):
+        """요청 한 번을 허가받음 (분당 한도는 기다리고, 하루 한도에 닿으면 QuotaExceeded)"""
+        limits = self.limits.get(model, {})
+        key = self.ledger_key(model)
+        with self._lock:
+            usage = self.ledger.usage(key)
+            inflight = self._inflight.get(key, 0)
+            per_day = limits.get('per_day')
+            if per_day and usage['requests'] + inflight >= per_day:
+                raise QuotaExceeded(f"{model} 하루 요청 한도 {per_day}회 도달")
+            daily_cost = limits.get('daily_cost')
+            if daily_cost is not None and usage['requests']:
+                # 지금까지의 요청당 평균 비용으로 이번 요청까지 예산 안인지 판단
+                expected = usage['cost'] + usage['cost'] / usage['requests'] * (inflight + 1)
+                if expected > daily_cost:
+                    raise QuotaExceeded(f"{model} 하루 비용 한도 ${daily_cost:g} 도달 (오늘 ${usage['cost']:.4f})")
+            self._inflight[key] = inflight + 1
+        if model in self._limiters:
+            self._limiters[model].acquire()
+
+    def record(self, model: str, tokens_in: int = 0, tokens_out: int = 0, cost: float = 0.0):
+        """허가받은 요청이 끝나면 (실패해도) 사용량을 장부에 기록"""
+        key = self.ledger_key(model)
+        with self._lock:
+            self._inflight[key] = max(0, self._inflight.get(key, 0) - 1)
+        self.ledger.record(key, tokens_in, tokens_out, cost)
+        try:
+            self.ledger.save()
+        except OSError:
+            pass  # 장부 저장 실패로 처리를 멈추지 않음 (다음 기록 때 다시 저장)
+
+    def describe(self, model: str) -> str:
+        usage = self.ledger.usage(self.ledger_key(model))
+        limits = self.limits.get(model, {})
+        text = f"오늘 요청 {usage['requests']}" + (f"/{limits['per_day']}" if limits.get('per_day') else "") + "회"
+        if usage['cost'] or limits.get('daily_cost') is not None:
+            text += f", 비용 ${usage['cost']:.4f}" + (f"/${limits['daily_cost']:g}" if limits.get('daily_cost') is not None else "")
+        return text
+
+
+def prioritize_bursts(bursts: List[List]) -> List:
+    """연속 촬영 묶음마다 첫 장을 먼저(촬영 순), 나머지 장은 그 뒤에 촬영 순으로"""
+    firsts = [burst[0] for burst in bursts if burst]
+    rest = [item for burst in bursts for item in burst[1:]]
+    return firsts + rest
+
+
+# ---------------------- 남은 사진 대기열 ----------------------
+def load_queue(path: str) -> Dict | None:
+    """이전 실행이 한도로 멈추며 남긴 대기열 {'pending': [상대 경로], 'observations': [기록]}"""
+    try:
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return data if isinstance(data.get('pending'), list) else None
+
+
+def save_queue(path: str, pending: List[str], observations: Iterable[Dict]):
+    """대기열 저장 (`observations`는 한 건씩 흘려 쓰므로 정렬 스트림을 그대로 받을 수 있음)"""
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write('{"saved": ' + json.dumps(datetime.now().isoformat(timespec='seconds')))
+        f.write(',\n "pending": ' + json.dumps(pending, ensure_ascii=False))
+        f.write(',\n "observations": [')
+        for i, record in enumerate(observations):
+            f.write((',\n  ' if i else '\n  ') + json.dumps(record, ensure_ascii=False))
+        f.write('\n ]}\n')
+    os.replace(tmp, path)
+
+
+def clear_queue(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,115 @@
+# 파일 이름: subject_crop.py
+"""
+넓은 하늘이나 갈대밭 속 작은 새처럼 피사체가 작은 사진에서 피사체 영역만
+잘라 API로 보내기 위한 가벼운 CPU 전용 크롭 단계입니다.
+
+YOLO 같은 모델 대신 NumPy로 축소 이미지의 엣지 세기와 배경색 대비(saliency)를
+계산하고, 에너지가 모여 있는 영역을 여유 있게 감싼 상자를 구합니다.
+에너지가 충분히 한곳에 모여 있지 않으면(신뢰도 낮음) None을 반환하여
+호출하는 쪽이 전체 프레임을 그대로 보내게 합니다.
+"""
+
+from __future__ import annotations
+
+from typing import NamedTuple, Tuple
+
+import numpy as np
+from PIL import Image
+
+ANALYSIS_SIZE = 256        # 분석용 축소 이미지의 긴 변
+MASS_QUANTILES = (0.05, 0.95)  # 상자에 담을 에너지 분포 구간 (가로/세로 각각)
+PADDING = 0.35             # 상자 크기 대비 여백 비율
+MIN_CROP_PIXELS = 512      # 크롭 결과의 최소 변 길이 (원본이 이보다 작으면 크롭 안 함)
+MAX_AREA_RATIO = 0.6       # 크롭 면적이 이보다 크면 이득이 적으므로 전체 프레임 사용
+MIN_CONFIDENCE = 2.0       # 상자 안 에너지 밀도가 평균의 몇 배 이상이어야 하는지
+
+
+class SubjectCrop(NamedTuple):
+    box: Tuple[int, int, int, int]  # 원본 좌표 (left, top, right, bottom)
+    confidence: float               # 상자 안 에너지 밀도 / 전체 평균 밀도
+    area_ratio: float               # 크롭 면적 / 원본 면적
+
+
+def _box_blur(a: np.ndarray, radius: int) -> np.ndarray:
+    """적분 영상으로 계산하는 박스 블러"""
+    if radius < 1:
+        return a
+    k = 2 * radius + 1
+    padded = np.pad(a, radius + 1, mode='edge')
+    integral = padded.cumsum(0).cumsum(1)
+    total = integral[k:, k:] - integral[:-k, k:] - integral[k:, :-k] + integral[:-k, :-k]
+    return total[:a.shape[0], :a.shape[1]] / (k * k)
+
+
+def _normalize(a: np.ndarray) -> np.ndarray:
+    peak = a.max()
+    return a / peak if peak > 0 else a
+
+
+def subject_energy(rgb: np.ndarray) -> np.ndarray:
+    """픽셀별 '피사체일 가능성' 에너지 (엣지 세기 + 배경색과의 차이, 배경 수준은 0으로)"""
+    gray = rgb @ np.array([0.299, 0.587, 0.114], dtype=np.float32)
+    gx = np.abs(np.diff(gray, axis=1, append=gray[:, -1:]))
+    gy = np.abs(np.diff(gray, axis=0, append=gray[-1:, :]))
+    radius = max(1, min(gray.shape) // 64)
+    edges = _normalize(_box_blur(gx + gy, radius))
+
+    # 배경색은 가장 흔한 색(중앙값)으로 보고, 그와 얼마나 다른지를 대비로 사용
+    background = np.median(rgb.reshape(-1, 3), axis=0)
+    contrast = _normalize(_box_blur(np.linalg.norm(rgb - background, axis=2), radius))
+
+    energy = edges + contrast
+    energy = np.clip(energy - np.median(energy), 0, None)
+    return energy * energy  # 봉우리를 강조
+
+
+def _mass_range(profile: np.ndarray) -> Tuple[int, int]:
+    cumulative = profile.cumsum() / profile.sum()
+    low = int(np.searchsorted(cumulative, MASS_QUANTILES[0]))
+    high = int(np.searchsorted(cumulative, MASS_QUANTILES[1])) + 1
+    return low, min(high, len(profile))
+
+
+def _expand(start: float, end: float, minimum: float, limit: int) -> Tuple[int, int]:
+    """구간을 최소 길이 이상으로 넓히고 [0, limit] 안으로 옮김"""
+    if end - start < minimum:
+        center = (start + end) / 2
+        start, end = center - minimum / 2, center + minimum / 2
+    if start < 0:
+        start, end = 0, end - start
+    if end > limit:
+        start, end = start - (end - limit), limit
+    return max(0, int(start)), min(limit, int(round(end)))
+
+
+def find_subject(img: Image.Image) -> SubjectCrop | None:
+    """피사체를 감싸는 크롭 상자 (신뢰도가 낮거나 크롭 이득이 적으면 None)"""
+    width, height = img.size
+    if min(width, height) <= MIN_CROP_PIXELS:
+        return None
+
+    small = img.convert('RGB')
+    small.thumbnail((ANALYSIS_SIZE, ANALYSIS_SIZE), Image.Resampling.BILINEAR)
+    energy = subject_energy(np.asarray(small, dtype=np.float32))
+    total = energy.sum()
+    if total <= 0:
+        return None
+
+    left, right = _mass_range(energy.sum(axis=0))
+    top, bottom = _mass_range(energy.sum(axis=1))
+    box_ratio = (right - left) * (bottom - top) / energy.size
+    confidence = float(energy[top:bottom, left:right].sum() / total / max(box_ratio, 1e-6))
+    if confidence < MIN_CONFIDENCE:
+        return None
+
+    # 원본 좌표로 변환하고 여백과 최소 크기 적용
+    sx, sy = width / energy.shape[1], height / energy.shape[0]
+    pad_x = (right - left) * sx * PADDING
+    pad_y = (bottom - top) * sy * PADDING
+    x0, x1 = _expand(left * sx - pad_x, right * sx + pad_x, MIN_CROP_PIXELS, width)
+    y0, y1 = _expand(top * sy - pad_y, bottom * sy + pad_y, MIN_CROP_PIXELS, height)
+
+    area_ratio = (x1 - x0) * (y1 - y0) / (width * height)
+    if area_ratio > MAX_AREA_RATIO:
+        return None
+    return SubjectCrop((x0, y0, x1, y1), confidence, area_ratio)
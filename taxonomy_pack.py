@@ -0,0 +1,188 @@
+# 파일 이름: taxonomy_pack.py
+"""
+네트워크 없이 이름을 확정하기 위한 로컬 분류 자료(taxonomy pack)입니다.
+
+기본 자료는 함께 배포되는 `새와생명의터_조류목록_2022.csv`(학명, 국명)이고,
+영문명·목·과가 들어 있는 CSV/JSON을 추가 자료로 겹쳐 쓸 수 있습니다.
+만든 자료는 원본 파일들의 해시와 함께 JSON으로 저장되며, 원본이 바뀌면
+`load_or_build`가 자동으로 다시 만듭니다. 직접 다시 만들려면:
+
+    python taxonomy_pack.py [--extra 추가자료.csv ...] [--output 경로]
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import hashlib
+import json
+import os
+import sys
+from datetime import datetime
+from typing import Dict, Iterable, List
+
+from name_index import binomial, normalize_name
+
+PACK_NAME = 'taxonomy_pack.json'
+PACK_VERSION = 1
+DEFAULT_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'renamer_data', '새와생명의터_조류목록_2022.csv')
+
+# 자료 파일의 컬럼 이름 (영문/한글 모두 허용)
+FIELD_ALIASES = {
+    'scientific_name': ('scientific_name', '학명'),
+    'korean_name': ('korean_name', '국명'),
+    'common_name': ('common_name', '영문명', 'english_name'),
+    'order': ('order', '목'),
+    'family': ('family', '과'),
+}
+FIELDS = tuple(FIELD_ALIASES)
+
+
+def file_digest(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _species_key(sci: str) -> str:
+    return binomial(normalize_name(sci))
+
+
+def read_records(path: str) -> List[Dict[str, str]]:
+    """CSV(헤더 필수) 또는 JSON(객체 목록) 자료를 공통 필드 이름의 레코드로 읽음"""
+    if path.lower().endswith('.json'):
+        with open(path, encoding='utf-8') as f:
+            rows = json.load(f)
+    else:
+        with open(path, encoding='utf-8-sig', newline='') as f:
+            rows = list(csv.DictReader(f))
+    records = []
+    for row in rows:
+        record = {}
+        for field, aliases in FIELD_ALIASES.items():
+            value = next((row[a] for a in aliases if row.get(a)), None)
+            if isinstance(value, str) and value.strip():
+                record[field] = value.strip()
+        if record.get('scientific_name'):
+            records.append(record)
+    return records
+
+
+class TaxonomyPack:
+    """학명(이명) → {scientific_name, korean_name, common_name, order, family}"""
+
+    def __init__(self, species: Dict[str, Dict[str, str]] | None = None, sources: List[Dict] | None = None):
+        self.species = species or {}
+        self.sources = sources or []
+        self.by_common = {rec['common_name'].casefold(): key
+                          for key, rec in self.species.items() if rec.get('common_name')}
+
+    def __len__(self) -> int:
+        return len(self.species)
+
+    def merge(self, records: Iterable[Dict[str, str]]):
+        """레코드를 겹쳐 씀 (나중 자료의 값이 앞 자료의 빈 값을 채우거나 덮어씀)"""
+        for record in records:
+            key = _species_key(record['scientific_name'])
+            if key:
+                self.species.setdefault(key, {}).update(record)
+        self.by_common = {rec['common_name'].casefold(): key
+                          for key, rec in self.species.items() if rec.get('common_name')}
+
+    @classmethod
+    def build(cls, csv_path: str = DEFAULT_CSV, extra_paths: Iterable[str] = ()) -> 'TaxonomyPack':
+        pack = cls()
+        for path in [csv_path, *extra_paths]:
+            pack.merge(read_records(path))
+            pack.sources.append({'path': os.path.abspath(path), 'sha256': file_digest(path)})
+        return pack
+
+    @classmethod
+    def from_dataframe(cls, csv_df) -> 'TaxonomyPack':
+        """이미 읽어 둔 CSV DataFrame으로 메모리 안에서만 만듦 (저장/갱신 확인 없음)"""
+        if "학명" in csv_df.columns and "국명" in csv_df.columns:
+            pairs = zip(csv_df["학명"], csv_df["국명"])
+        else:
+            pairs = zip(csv_df.iloc[:, 2], csv_df.iloc[:, 1])
+        pack = cls()
+        pack.merge({'scientific_name': sci.strip(), 'korean_name': ko.strip()} for sci, ko in pairs
+                   if isinstance(sci, str) and isinstance(ko, str) and sci.strip() != '학명')
+        return pack
+
+    def lookup(self, sci: str | None, common: str | None = None) -> Dict[str, str] | None:
+        """학명(삼명이면 이명으로 줄여서), 없으면 영문명으로 조회"""
+        if sci:
+            record = self.species.get(_species_key(sci))
+            if record:
+                return record
+        if common:
+            key = self.by_common.get(common.strip().casefold())
+            if key:
+                return self.species[key]
+        return None
+
+    def is_current(self) -> bool:
+        """저장 당시의 원본 파일들이 바뀌지 않았는지"""
+        try:
+            return bool(self.sources) and all(file_digest(s['path']) == s['sha256'] for s in self.sources)
+        except OSError:
+            return False
+
+    def save(self, path: str):
+        data = {'version': PACK_VERSION, 'created': datetime.now().isoformat(timespec='seconds'),
+                'sources': self.sources, 'species': self.species}
+        tmp = path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=1)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'TaxonomyPack | None':
+        try:
+            with open(path, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if data.get('version') != PACK_VERSION:
+            return None
+        return cls(data.get('species', {}), data.get('sources', []))
+
+
+def load_or_build(csv_path: str = DEFAULT_CSV, pack_path: str | None = None,
+                  extra_paths: Iterable[str] = (), log=print) -> TaxonomyPack:
+    """저장된 자료를 읽고, 없거나 원본이 바뀌었으면 다시 만들어 저장"""
+    pack_path = pack_path or os.path.join(os.path.dirname(csv_path), PACK_NAME)
+    extra_paths = list(extra_paths)
+    pack = TaxonomyPack.load(pack_path)
+    expected = [os.path.abspath(p) for p in [csv_path, *extra_paths]]
+    if pack is not None and pack.is_current() and [s['path'] for s in pack.sources] == expected:
+        return pack
+    log("분류 자료 갱신 중...")
+    pack = TaxonomyPack.build(csv_path, extra_paths)
+    try:
+        pack.save(pack_path)
+    except OSError as e:
+        log(f"  - 분류 자료 저장 실패 (메모리에서만 사용): {e}")
+    return pack
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="오프라인 이름 확정용 분류 자료(taxonomy pack)를 다시 만듭니다.")
+    parser.add_argument('--csv', default=DEFAULT_CSV, help="기본 조류 목록 CSV (학명, 국명)")
+    parser.add_argument('--extra', nargs='*', default=[], help="영문명/목/과가 들어 있는 추가 CSV 또는 JSON")
+    parser.add_argument('--output', help=f"저장 경로 (기본: CSV와 같은 폴더의 {PACK_NAME})")
+    args = parser.parse_args(argv)
+
+    output = args.output or os.path.join(os.path.dirname(args.csv), PACK_NAME)
+    pack = TaxonomyPack.build(args.csv, args.extra)
+    pack.save(output)
+    with_common = sum(1 for r in pack.species.values() if r.get('common_name'))
+    with_family = sum(1 for r in pack.species.values() if r.get('family'))
+    print(f"{output}: {len(pack)}종 (영문명 {with_common}종, 과 정보 {with_family}종)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
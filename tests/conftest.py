@@ -0,0 +1,7 @@
+# 파일 이름: tests/conftest.py
+"""테스트에서 저장소 최상위 모듈(core_logic, visual_report 등)을 가져올 수 있도록 경로 추가"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,139 @@
+# 파일 이름: tests/test_escalation.py
+"""불확실한 사진의 재시도: 확신도 해석, 해상도 단계, 확신도 기준 Pro 재확인, 모델별 비용 계산"""
+
+import io
+import json
+import threading
+from types import SimpleNamespace
+
+import pytest
+from PIL import Image
+
+import core_logic
+import identifiers
+import taxonomy_pack
+
+TOKENS_IN, TOKENS_OUT = 1000, 200
+GREAT_TIT = {'common_name': 'Great Tit', 'scientific_name': 'Parus major',
+             'order': 'Passeriformes', 'family': 'Paridae'}
+
+
+class ScriptedModel:
+    """`generate_content`만 흉내 내는 Gemini 모델. 받은 이미지의 긴 변에 따라 확신도를 정함"""
+
+    def __init__(self, confidence_for):
+        self.confidence_for = confidence_for
+        self.sizes = []
+        self.lock = threading.Lock()
+
+    def generate_content(self, contents, generation_config=None, request_options=None):
+        prompt, image = contents
+        with Image.open(io.BytesIO(image['data'])) as im:
+            size = max(im.size)
+        with self.lock:
+            self.sizes.append(size)
+        body = dict(GREAT_TIT, confidence=self.confidence_for(size))
+        usage = SimpleNamespace(prompt_token_count=TOKENS_IN, candidates_token_count=TOKENS_OUT)
+        return identifiers.GeminiResponse(json.dumps(body), usage)
+
+
+@pytest.fixture
+def run_folder(tmp_path):
+    Image.new('RGB', (400, 300), (120, 90, 60)).save(tmp_path / "p0.jpg")
+    pack = taxonomy_pack.TaxonomyPack()
+    pack.merge([dict(GREAT_TIT, korean_name='박새')])
+
+    def run(flash, pro=None, **options):
+        logs = []
+        cfg = {
+            'log_callback': logs.append,
+            'gemini_model': flash,
+            'pro_model': pro,
+            'cascade': pro is not None,
+            'wiki_wiki': None,
+            'csv_db': None,
+            'offline': True,
+            'taxonomy_pack': pack,
+            'photo_location': 'South Korea',
+            'target_folder': str(tmp_path),
+            'report_options': {'format': 'none'},
+            **options,
+        }
+        return core_logic.process_all_images(cfg), logs
+    return run
+
+
+def flash_cost(calls):
+    price_in, price_out = core_logic.MODEL_PRICING['flash']
+    return calls * (TOKENS_IN * price_in + TOKENS_OUT * price_out) / 1_000_000
+
+
+@pytest.mark.parametrize('raw, expected', [
+    (0.42, 0.42), ("0.8", 0.8), (" 0.35 ", 0.35), (85, 0.85), ("85%", 0.85), (1, 1.0), (0, 0.0),
+    (None, None), ("high", None), (True, None), (-0.1, None), (250, None), (float('nan'), None),
+])
+def test_parse_confidence(raw, expected):
+    parsed = identifiers.parse_confidence(raw)
+    if expected is None:
+        assert parsed is None
+    else:
+        assert parsed == pytest.approx(expected)
+
+
+def test_gemini_confidence_string_is_parsed():
+    model = ScriptedModel(lambda size: "0.55")
+    image = io.BytesIO()
+    Image.new('RGB', (10, 10)).save(image, 'JPEG')
+    [result] = identifiers.GeminiIdentifier(model).identify_batch([identifiers.IdentifyRequest(image.getvalue())])
+    assert result['confidence'] == 0.55
+    assert result['usage'] == (TOKENS_IN, TOKENS_OUT)
+
+
+def test_low_confidence_steps_up_resolution_tiers(run_folder):
+    flash = ScriptedModel(lambda size: 0.3 if size <= 64 else 0.9)
+    summary, logs = run_folder(flash, progressive=True, resolution_tiers=(64, 128, None))
+
+    assert flash.sizes == [64, 128]   # 128px에서 확정되어 원본 해상도까지 가지 않음
+    assert any("128px 해상도로 재시도 (낮은 확신도 0.30)" in msg for msg in logs)
+    assert any("64px: 시도 1회, 확정 0회" in msg for msg in logs)
+    assert any("128px: 시도 1회, 확정 1회" in msg for msg in logs)
+    assert summary['model_stats']['flash']['calls'] == 2
+    assert summary['model_stats']['flash']['cost'] == pytest.approx(flash_cost(2))
+
+
+def test_uncertain_after_last_tier_goes_to_pro_once(run_folder):
+    flash = ScriptedModel(lambda size: 0.3)
+    pro = ScriptedModel(lambda size: 0.95)
+    summary, logs = run_folder(flash, pro, progressive=True, resolution_tiers=(64, 128, None))
+
+    assert flash.sizes == [64, 128, 400]
+    assert pro.sizes == [400]          # Pro는 마지막(원본) 해상도로 한 번만
+    assert summary['processed'] == 1
+    stats = summary['model_stats']
+    price_in, price_out = core_logic.MODEL_PRICING['pro']
+    assert (stats['flash']['calls'], stats['pro']['calls']) == (3, 1)
+    assert (stats['pro']['tokens_in'], stats['pro']['tokens_out']) == (TOKENS_IN, TOKENS_OUT)
+    assert stats['flash']['cost'] == pytest.approx(flash_cost(3))
+    assert stats['pro']['cost'] == pytest.approx((TOKENS_IN * price_in + TOKENS_OUT * price_out) / 1_000_000)
+
+
+@pytest.mark.parametrize('confidence, escalated', [
+    (0.59, True), ("0.4", True), (0.6, False), (0.95, False), (None, False),
+])
+def test_pro_only_below_confidence_threshold(run_folder, confidence, escalated):
+    flash = ScriptedModel(lambda size: confidence)
+    pro = ScriptedModel(lambda size: 0.99)
+    summary, logs = run_folder(flash, pro)
+
+    assert len(flash.sizes) == 1
+    assert len(pro.sizes) == (1 if escalated else 0)
+    assert ('pro' in summary['model_stats']) == escalated
+    assert any("Gemini 2.5 Pro로 재확인 (낮은 확신도" in msg for msg in logs) == escalated
+
+
+def test_cascade_confidence_is_configurable(run_folder):
+    flash = ScriptedModel(lambda size: 0.85)
+    pro = ScriptedModel(lambda size: 0.99)
+    summary, _ = run_folder(flash, pro, cascade_confidence=0.9)
+    assert pro.sizes == [400]
+    assert summary['model_stats']['pro']['calls'] == 1
@@ -0,0 +1,143 @@
+# 파일 이름: tests/test_exif_scan.py
+"""exif_scan: APP1 탐색, TIFF 파싱(II/MM), 연속 촬영 묶음, 예상 시간, 파싱 실패 시 PIL 대체 경로"""
+
+import io
+import struct
+from datetime import datetime, timedelta
+
+import pytest
+from PIL import Image
+
+import core_logic
+import exif_scan
+
+
+def build_tiff(byte_order: bytes, ifd0: dict, exif_ifd: dict | None = None) -> bytes:
+    """`{태그: (타입, 값)}`으로 TIFF 본문을 만듦 (`exif_ifd`를 주면 IFD0에 Exif IFD 포인터를 넣음)"""
+    e = '<' if byte_order == b'II' else '>'
+    ifds = [dict(ifd0)]
+    if exif_ifd is not None:
+        ifds[0][exif_scan.TAG_EXIF_IFD] = (4, 0)
+        ifds.append(dict(exif_ifd))
+    offsets, pos = [], 8
+    for ifd in ifds:
+        offsets.append(pos)
+        pos += 2 + 12 * len(ifd) + 4
+    if exif_ifd is not None:
+        ifds[0][exif_scan.TAG_EXIF_IFD] = (4, offsets[1])
+
+    out, data = bytearray(byte_order + struct.pack(e + 'HI', 42, 8)), b''
+    for ifd in ifds:
+        out += struct.pack(e + 'H', len(ifd))
+        for tag, (typ, value) in sorted(ifd.items()):
+            if typ == 2:
+                raw = value.encode('ascii') + b'\x00'
+            else:
+                raw = struct.pack(e + ('H' if typ == 3 else 'I'), value)
+            num = len(raw) if typ == 2 else 1
+            if len(raw) <= 4:
+                field = raw.ljust(4, b'\x00')
+            else:
+                field = struct.pack(e + 'I', pos + len(data))
+                data += raw
+            out += struct.pack(e + 'HHI', tag, typ, num) + field
+        out += struct.pack(e + 'I', 0)
+    return bytes(out) + data
+
+
+def wrap_jpeg(tiff: bytes, fill_bytes: int = 0) -> bytes:
+    """SOI, APP0(JFIF), 채움 바이트, APP1(Exif), SOS 순서의 JPEG 앞부분"""
+    app0 = b'JFIF\x00\x01\x01\x00\x00\x01\x00\x01\x00\x00'
+    app1 = b'Exif\x00\x00' + tiff
+    return (b'\xff\xd8'
+            + b'\xff\xe0' + struct.pack('>H', len(app0) + 2) + app0
+            + b'\xff' * fill_bytes
+            + b'\xff\xe1' + struct.pack('>H', len(app1) + 2) + app1
+            + b'\xff\xda\x00\x02')
+
+
+SHOT = datetime(2024, 5, 1, 7, 30, 15)
+MODIFIED = datetime(2024, 6, 2, 12, 0, 0)
+
+
+@pytest.mark.parametrize('byte_order', [b'II', b'MM'])
+def test_parse_exif_reads_orientation_and_original_datetime(byte_order):
+    tiff = build_tiff(byte_order,
+                      {exif_scan.TAG_ORIENTATION: (3, 6), exif_scan.TAG_DATETIME: (2, f"{MODIFIED:%Y:%m:%d %H:%M:%S}")},
+                      {exif_scan.TAG_DATETIME_ORIGINAL: (2, f"{SHOT:%Y:%m:%d %H:%M:%S}")})
+    assert exif_scan.parse_exif(tiff) == exif_scan.ExifHeader(SHOT, 6)
+
+
+def test_parse_exif_falls_back_to_ifd0_datetime_and_default_orientation():
+    tiff = build_tiff(b'MM', {exif_scan.TAG_DATETIME: (2, f"{MODIFIED:%Y:%m:%d %H:%M:%S}")})
+    assert exif_scan.parse_exif(tiff) == exif_scan.ExifHeader(MODIFIED, 1)
+
+
+def test_parse_exif_rejects_unknown_byte_order():
+    assert exif_scan.parse_exif(b'XX\x00\x2a\x00\x00\x00\x08') is exif_scan.NO_EXIF
+
+
+@pytest.mark.parametrize('byte_order', [b'II', b'MM'])
+@pytest.mark.parametrize('fill_bytes', [0, 3])
+def test_read_app1_follows_markers_to_exif(byte_order, fill_bytes):
+    tiff = build_tiff(byte_order, {exif_scan.TAG_ORIENTATION: (3, 8)},
+                      {exif_scan.TAG_DATETIME_ORIGINAL: (2, f"{SHOT:%Y:%m:%d %H:%M:%S}")})
+    found = exif_scan._read_app1(io.BytesIO(wrap_jpeg(tiff, fill_bytes)))
+    assert found == tiff
+    assert exif_scan.parse_exif(found) == exif_scan.ExifHeader(SHOT, 8)
+
+
+def test_read_app1_stops_at_scan_data_and_non_jpeg():
+    no_exif = b'\xff\xd8\xff\xda\x00\x02' + b'\xff\xe1' + b'\x00' * 20
+    assert exif_scan._read_app1(io.BytesIO(no_exif)) is None
+    assert exif_scan._read_app1(io.BytesIO(b'\x89PNG\r\n\x1a\n')) is None
+
+
+def test_read_exif_header_matches_pil_written_exif(tmp_path):
+    exif = Image.Exif()
+    exif[exif_scan.TAG_ORIENTATION] = 3
+    exif[exif_scan.TAG_DATETIME] = f"{SHOT:%Y:%m:%d %H:%M:%S}"
+    path = tmp_path / "pil.jpg"
+    Image.new('RGB', (40, 20)).save(path, exif=exif.tobytes())
+    assert exif_scan.read_exif_header(str(path)) == exif_scan.ExifHeader(SHOT, 3)
+
+
+def test_malformed_header_is_unknown_not_upright(tmp_path):
+    # IFD 항목 수가 실제보다 커서 struct.error가 나는 헤더
+    tiff = b'II' + struct.pack('<HIH', 42, 8, 500) + b'\x00' * 12
+    path = tmp_path / "broken.jpg"
+    path.write_bytes(wrap_jpeg(tiff))
+    header = exif_scan.read_exif_header(str(path))
+    assert header is exif_scan.NO_EXIF
+    assert header.orientation is None
+
+
+def test_unknown_header_falls_back_to_pil(tmp_path):
+    exif = Image.Exif()
+    exif[exif_scan.TAG_ORIENTATION] = 6
+    exif[exif_scan.TAG_DATETIME] = f"{SHOT:%Y:%m:%d %H:%M:%S}"
+    path = tmp_path / "rotated.jpg"
+    Image.new('RGB', (40, 20), (200, 30, 30)).save(path, exif=exif.tobytes())
+
+    source = core_logic.SourceImage(str(path), None, "rotated.jpg", exif=exif_scan.NO_EXIF)
+    prepared = core_logic.prepare_photo(source)
+    assert prepared['datetime'] == SHOT
+    with Image.open(io.BytesIO(prepared['image_data'])) as sent:
+        assert sent.size == (20, 40)   # orientation 6: 세로로 돌려서 보냄
+
+
+def test_group_bursts_splits_on_gap_and_isolates_undated():
+    t0 = datetime(2024, 5, 1, 7, 0, 0)
+    items = [t0, t0 + timedelta(seconds=1), t0 + timedelta(seconds=3), None, None,
+             t0 + timedelta(seconds=60), t0 + timedelta(seconds=61.5)]
+    bursts = exif_scan.group_bursts(items, lambda dt: dt, gap_seconds=2.0)
+    assert bursts == [[t0, t0 + timedelta(seconds=1), t0 + timedelta(seconds=3)], [None], [None],
+                      [t0 + timedelta(seconds=60), t0 + timedelta(seconds=61.5)]]
+    assert exif_scan.group_bursts([], lambda dt: dt) == []
+
+
+def test_estimate_seconds_divides_by_parallel_workers():
+    assert exif_scan.estimate_seconds(100, 4.0) == 400.0
+    assert exif_scan.estimate_seconds(100, 4.0, parallel=8) == 50.0
+    assert exif_scan.estimate_seconds(10, 4.0, parallel=0) == 40.0   # 0 이하는 1로 취급
+    assert exif_scan.format_duration(3725) == "1시간 2분"
@@ -0,0 +1,56 @@
+# 파일 이름: tests/test_fingerprint_index.py
+"""FingerprintIndex: stat이 그대로인 파일은 다시 읽지 않고, 처리 기록과 사라진 파일 정리"""
+
+import os
+
+import core_logic
+
+
+def _write(path, data):
+    with open(path, 'wb') as f:
+        f.write(data)
+    return str(path)
+
+
+def test_unchanged_files_are_not_hashed_again(tmp_path):
+    jpg = _write(tmp_path / 'p1.jpg', b'jpeg' * 1000)
+    raw = _write(tmp_path / 'p1.ORF', b'raw' * 1000)
+    source = core_logic.SourceImage(jpg, raw, 'p1.jpg')
+    index_path = str(tmp_path / core_logic.FINGERPRINT_INDEX_NAME)
+
+    first = core_logic.FingerprintIndex(index_path)
+    key = first.source_key(source)
+    assert first.stats['misses'] == 2 and first.stats['bytes_hashed'] == 7000
+    first.save()
+
+    again = core_logic.FingerprintIndex(index_path)
+    assert again.source_key(source) == key
+    assert again.stats == {'hits': 2, 'misses': 0, 'bytes_hashed': 0}
+
+    _write(raw, b'edited raw')   # RAW만 바뀌어도 다른 키
+    assert again.source_key(source) != key
+
+
+def test_done_records_survive_reload_and_prune(tmp_path):
+    out_dir = tmp_path / 'out'
+    out_dir.mkdir()
+    jpg = _write(tmp_path / 'p1.jpg', b'jpeg')
+    gone = _write(tmp_path / 'p2.jpg', b'gone')
+    output = _write(out_dir / 'bird.jpg', b'jpeg')
+    index_path = str(out_dir / core_logic.FINGERPRINT_INDEX_NAME)
+
+    index = core_logic.FingerprintIndex(index_path)
+    kept = index.source_key(core_logic.SourceImage(jpg, None, 'p1.jpg'))
+    lost = index.source_key(core_logic.SourceImage(gone, None, 'p2.jpg'))
+    index.mark_done(kept, {'new_filename': 'bird.jpg', 'rel_dir': ''})
+    index.mark_done(lost, {'new_filename': 'missing.jpg', 'rel_dir': ''})
+    assert index.previous_record(lost, str(out_dir)) is None   # 출력 파일이 없으면 다시 처리
+
+    os.remove(gone)
+    assert index.prune(str(out_dir)) == 2   # p2.jpg 지문 + 출력이 사라진 기록
+    index.save()
+
+    reloaded = core_logic.FingerprintIndex(index_path)
+    assert set(reloaded.entries) == {os.path.abspath(jpg)}
+    assert reloaded.previous_record(kept, str(out_dir)) == {'new_filename': 'bird.jpg', 'rel_dir': ''}
+    assert os.path.exists(output)
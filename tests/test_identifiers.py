@@ -0,0 +1,171 @@
+# 파일 이름: tests/test_identifiers.py
+"""식별 백엔드: FakeIdentifier, 요청을 모아 보내는 BatchingIdentifier, 파이프라인의 배치 식별, 키별 Gemini 모델"""
+
+import json
+import sys
+import threading
+import types
+from types import SimpleNamespace
+
+import pytest
+from PIL import Image
+
+import core_logic
+import identifiers
+
+
+def _request(i):
+    return identifiers.IdentifyRequest(f"photo {i}".encode())
+
+
+class RecordingIdentifier(identifiers.FakeIdentifier):
+    """identify_batch로 받은 묶음 크기를 기록하는 가짜 식별기"""
+
+    def __init__(self, fail=False):
+        super().__init__()
+        self.batches = []
+        self.fail = fail
+        self._lock = threading.Lock()
+
+    def identify_batch(self, requests):
+        with self._lock:
+            self.batches.append(len(requests))
+        if self.fail:
+            raise RuntimeError('model crashed')
+        return super().identify_batch(requests)
+
+
+def test_fake_identifier_is_deterministic():
+    fake = identifiers.FakeIdentifier()
+    first = fake.identify_batch([_request(i) for i in range(20)])
+    again = [fake.identify(_request(i)) for i in range(20)]
+    assert first == again
+    assert {r['scientific_name'] for r in first} <= {s['scientific_name'] for s in fake.DEFAULT_SPECIES}
+    assert all(r['confidence'] == 0.9 for r in first)
+
+
+def _identify_concurrently(batching, count):
+    results = [None] * count
+    errors = []
+
+    def work(i):
+        try:
+            results[i] = batching.identify(_request(i))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=work, args=(i,)) for i in range(count)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(5)
+    return results, errors
+
+
+def test_concurrent_identify_calls_share_batches():
+    inner = RecordingIdentifier()
+    batching = identifiers.BatchingIdentifier(inner, max_batch=4, window=0.2)
+    results, errors = _identify_concurrently(batching, 10)
+
+    assert not errors
+    assert results == identifiers.FakeIdentifier().identify_batch([_request(i) for i in range(10)])
+    assert sum(inner.batches) == 10 and max(inner.batches) <= 4
+    assert len(inner.batches) < 10
+    assert batching.stats == {'batches': len(inner.batches), 'items': 10}
+
+
+def test_batch_failure_reaches_every_waiting_caller():
+    batching = identifiers.BatchingIdentifier(RecordingIdentifier(fail=True), window=0.1)
+    results, errors = _identify_concurrently(batching, 5)
+    assert results == [None] * 5
+    assert len(errors) == 5 and all(str(e) == 'model crashed' for e in errors)
+    assert not batching._flushing
+
+
+def test_create_identifier():
+    assert identifiers.create_identifier('gemini') is None
+    assert isinstance(identifiers.create_identifier('fake'), identifiers.FakeIdentifier)
+    with pytest.raises(ValueError):
+        identifiers.create_identifier('onnx', 'model.onnx')   # 클래스 목록 없음
+    with pytest.raises(ValueError):
+        identifiers.create_identifier('tflite')
+
+
+@pytest.mark.parametrize('use_pipeline', [False, True])
+def test_local_backend_runs_through_identify_batch(tmp_path, use_pipeline):
+    for i in range(6):
+        Image.new('RGB', (320, 240), (i * 40, 90, 60)).save(tmp_path / f"p{i}.jpg")
+    fake = RecordingIdentifier()
+    logs = []
+    cfg = {
+        'log_callback': logs.append,
+        'identifier': fake,
+        'wiki_wiki': None,
+        'csv_db': None,
+        'offline': True,
+        'photo_location': 'South Korea',
+        'target_folder': str(tmp_path),
+        'report_options': {'format': 'none'},
+        'pipeline': use_pipeline,
+        'pipeline_workers': {'decode': 1},
+    }
+    summary = core_logic.process_all_images(cfg)
+
+    assert summary['processed'] == 6
+    assert summary['species'] <= {s['scientific_name'] for s in fake.DEFAULT_SPECIES}
+    assert sum(fake.batches) == 6
+    assert summary['model_stats']['fake']['calls'] == 6
+    # 파이프라인에서는 식별 작업자들의 요청을 모아 보냄 (BatchingIdentifier)
+    assert any('배치 추론' in msg for msg in logs) == use_pipeline
+
+
+class StandInServiceClient:
+    """GenerativeServiceClient 대역: 만들 때 받은 API 키와 받은 요청을 기록"""
+
+    def __init__(self, client_options):
+        self.api_key = client_options['api_key']
+        self.requests = []
+
+    def generate_content(self, request, timeout=None):
+        self.requests.append((request, timeout))
+        part = SimpleNamespace(text=json.dumps({'common_name': 'Great Tit', 'scientific_name': 'Parus major'}))
+        return SimpleNamespace(candidates=[SimpleNamespace(content=SimpleNamespace(parts=[part]))],
+                               usage_metadata=SimpleNamespace(prompt_token_count=10, candidates_token_count=5),
+                               prompt_feedback=None)
+
+
+@pytest.fixture
+def stand_in_generativelanguage(monkeypatch):
+    glm = types.ModuleType('google.ai.generativelanguage')
+    glm.GenerativeServiceClient = StandInServiceClient
+    for name in ('Part', 'Blob', 'Content', 'GenerateContentRequest', 'GenerationConfig'):
+        setattr(glm, name, SimpleNamespace)
+    google, google_ai = types.ModuleType('google'), types.ModuleType('google.ai')
+    google.ai, google_ai.generativelanguage = google_ai, glm
+    monkeypatch.setitem(sys.modules, 'google', google)
+    monkeypatch.setitem(sys.modules, 'google.ai', google_ai)
+    monkeypatch.setitem(sys.modules, 'google.ai.generativelanguage', glm)
+    return glm
+
+
+def test_gemini_models_keep_their_own_api_keys(stand_in_generativelanguage):
+    flash = identifiers.create_gemini_model('flash-key', identifiers.FLASH_MODEL_NAME)
+    pro = identifiers.create_gemini_model('pro-key', identifiers.PRO_MODEL_NAME)
+    # 두 번째 모델을 만든 뒤에도 첫 모델은 자기 키로 요청
+    results = {}
+    for name, model in (('flash', flash), ('pro', pro)):
+        identifier = identifiers.GeminiIdentifier(model, name, timeout=30)
+        results[name] = identifier.identify(identifiers.IdentifyRequest(b'jpeg bytes', 'prompt'))
+
+    assert (flash.client.api_key, pro.client.api_key) == ('flash-key', 'pro-key')
+    assert [len(flash.client.requests), len(pro.client.requests)] == [1, 1]
+    assert results['flash']['scientific_name'] == 'Parus major'
+    assert results['flash']['usage'] == (10, 5)
+
+    request, timeout = pro.client.requests[0]
+    assert request.model == 'models/' + identifiers.PRO_MODEL_NAME
+    assert timeout == 30
+    prompt, image = request.contents[0].parts
+    assert prompt.text == 'prompt'
+    assert (image.inline_data.mime_type, image.inline_data.data) == ('image/jpeg', b'jpeg bytes')
+    assert request.generation_config.response_mime_type == 'application/json'
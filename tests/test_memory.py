@@ -0,0 +1,93 @@
+# 파일 이름: tests/test_memory.py
+"""메모리 예산: MemoryBudget 가중 세마포어, 디코딩 메모리 추정, 디코딩 프로세스 RSS 측정"""
+
+import os
+import threading
+import time
+
+import pytest
+from PIL import Image
+
+import core_logic
+import pipeline
+
+
+def test_budget_blocks_until_enough_is_released():
+    budget = pipeline.MemoryBudget(100)
+    budget.acquire(60)
+    entered = threading.Event()
+
+    def second():
+        budget.acquire(60)
+        entered.set()
+
+    worker = threading.Thread(target=second)
+    worker.start()
+    assert not entered.wait(0.2)   # 60 + 60 > 100
+    budget.release(60)
+    assert entered.wait(2)
+    worker.join()
+    assert (budget.in_use, budget.peak) == (60, 60)
+
+
+def test_oversized_item_runs_alone():
+    budget = pipeline.MemoryBudget(100)
+    budget.acquire(250)            # 다른 작업이 없으면 예산보다 커도 진행
+    assert budget.in_use == 250
+    entered = threading.Event()
+    worker = threading.Thread(target=lambda: (budget.acquire(10), entered.set()))
+    worker.start()
+    assert not entered.wait(0.2)   # 큰 사진이 끝날 때까지 다른 작업은 대기
+    budget.release(250)
+    assert entered.wait(2)
+    worker.join()
+    assert budget.peak == 250
+
+
+def test_concurrent_use_never_exceeds_budget():
+    budget = pipeline.MemoryBudget(100)
+    observed = []
+    lock = threading.Lock()
+
+    def work(amount):
+        budget.acquire(amount)
+        with lock:
+            observed.append(budget.in_use)
+        time.sleep(0.01)
+        budget.release(amount)
+
+    threads = [threading.Thread(target=work, args=(amount,)) for amount in [30, 40, 50, 20, 60, 10] * 3]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert max(observed) <= 100
+    assert budget.in_use == 0
+
+
+def test_estimate_decode_bytes_follows_draft_scale(tmp_path):
+    path = tmp_path / "big.jpg"
+    Image.new('RGB', (4000, 3000)).save(path)
+    full = 4000 * 3000 * 3 * 2
+    assert core_logic.estimate_decode_bytes(str(path)) == full
+    # 긴 변 1000: 짧은 변도 1000 이상인 최대 배율 1/2 (1/4이면 750 < 1000)
+    assert core_logic.estimate_decode_bytes(str(path), 1000) == 2000 * 1500 * 3 * 2
+    assert core_logic.estimate_decode_bytes(str(path), 300) == 500 * 375 * 3 * 2   # 최대 1/8
+    assert core_logic.estimate_decode_bytes(str(tmp_path / "missing.jpg")) == 0
+
+
+def _hold_memory(size):
+    block = bytearray(size)
+    return os.getpid(), len(block)
+
+
+@pytest.mark.skipif(not os.path.exists('/proc/self/statm'), reason="/proc로 RSS를 읽을 수 있는 환경만")
+def test_monitor_measures_decode_workers():
+    with core_logic.DecodePool(max_workers=2) as pool:
+        pids = {pool.submit(_hold_memory, 1024).result()[0] for _ in range(4)}
+        assert pids <= set(pool.worker_pids())
+        monitor = core_logic.RunMemoryMonitor(pool, interval=0.05)
+        monitor.start()
+        peak = monitor.stop()
+    assert peak['self'] > 0
+    assert peak['children'] > 0
@@ -0,0 +1,81 @@
+# 파일 이름: tests/test_name_index.py
+"""NameIndex 근사 일치(하나뿐인 가장 가까운 학명만, 편집 거리 1까지만)와 csv_lookup의 삼명 → 이명 조회"""
+
+import pandas as pd
+import pytest
+
+import core_logic
+import name_index
+
+ENTRIES = [
+    ('Parus major', '박새'),
+    ('Parus minor', '작은박새'),
+    ('Emberiza rustica', '쇠붉은뺨멧새'),
+    ('Emberiza rutila', '꼬까참새'),
+    ('Pica serica', '까치'),
+    ('Ardea alba', '중대백로'),
+]
+
+
+def test_exact_and_trinomial_matches():
+    index = name_index.NameIndex(ENTRIES)
+    assert index.lookup('parus  major').distance == 0
+    match = index.lookup('Ardea alba modesta', max_distance=0)
+    assert (match.name, match.distance) == ('Ardea alba', 0)
+
+
+def test_disabled_by_default_in_core_logic():
+    assert core_logic.FUZZY_MAX_DISTANCE == 0
+    index = name_index.NameIndex(ENTRIES)
+    assert index.lookup('Pica sericca', max_distance=0) is None
+
+
+def test_unique_match_within_one_edit():
+    index = name_index.NameIndex(ENTRIES)
+    match = index.lookup('Pica sericca')
+    assert (match.name, match.korean, match.distance) == ('Pica serica', '까치', 1)
+
+
+def test_distance_above_one_is_rejected():
+    index = name_index.NameIndex(ENTRIES)
+    assert index.lookup('Pica sreica') is None   # 거리 2
+    with pytest.raises(ValueError):
+        index.lookup('Pica sreica', max_distance=2)
+    with pytest.raises(ValueError):
+        core_logic.create_shared_resources({'fuzzy_max_distance': 2, 'log_callback': print})
+
+
+def test_sibling_species_are_not_confused():
+    index = name_index.NameIndex(ENTRIES)
+    # 자매종은 서로 다른 정확 일치로만 찾음
+    assert index.lookup('Parus minor').korean == '작은박새'
+    assert index.lookup('Emberiza rutila').korean == '꼬까참새'
+    # 두 종에서 같은 거리인 질의는 받아들이지 않음
+    assert index.lookup('Parus mijor') is None     # major / minor 모두 거리 1
+    assert index.lookup('Emberiza rustila') is None  # rustica / rutila 모두 거리 1
+
+
+def _named_csv():
+    return pd.DataFrame({'국명': [ko for _, ko in ENTRIES], '학명': [sci for sci, _ in ENTRIES]})
+
+
+def _indexed_csv():
+    # 헤더 없는 원본 CSV 형식: 1열 국명, 2열 학명
+    return pd.DataFrame([[i, ko, sci] for i, (sci, ko) in enumerate(ENTRIES)])
+
+
+@pytest.mark.parametrize('make_csv', [_named_csv, _indexed_csv])
+def test_csv_lookup_truncates_trinomials_without_fuzzy_index(make_csv):
+    logs = []
+    found = core_logic.csv_lookup(make_csv(), 'Ardea alba modesta', logs.append)
+    assert found == {'korean_name': '중대백로', 'scientific_name': 'Ardea alba', 'distance': 0}
+    assert core_logic.csv_lookup(make_csv(), 'parus major', logs.append) == {'korean_name': '박새'}
+
+
+@pytest.mark.parametrize('make_csv', [_named_csv, _indexed_csv])
+def test_csv_lookup_fuzzy_only_when_enabled(make_csv):
+    csv_df = make_csv()
+    index = name_index.NameIndex.from_dataframe(csv_df)
+    assert core_logic.csv_lookup(csv_df, 'Pica sericca', print, index, max_distance=0) is None
+    found = core_logic.csv_lookup(csv_df, 'Pica sericca', print, index, max_distance=1)
+    assert found == {'korean_name': '까치', 'scientific_name': 'Pica serica', 'distance': 1}
@@ -0,0 +1,267 @@
+# 파일 이름: tests/test_output.py
+"""출력 파일 배치: place_file의 복사/하드링크/리플링크/이동과 대체 경로, OutputNameRegistry의 이름 발급, 출력 폴더 구성"""
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import shutil
+import sys
+import threading
+from datetime import datetime
+
+import pytest
+
+import core_logic
+import work_queue
+
+DATA = b'\xff\xd8 bird photo \xff\xd9'
+
+
+@pytest.fixture
+def src(tmp_path):
+    path = tmp_path / "src.jpg"
+    path.write_bytes(DATA)
+    os.utime(path, (1_700_000_000, 1_700_000_000))
+    return str(path)
+
+
+def refuse(err):
+    def call(*args, **kwargs):
+        raise OSError(err, os.strerror(err))
+    return call
+
+
+def test_copy_keeps_source_and_metadata(src, tmp_path):
+    dst = str(tmp_path / "out.jpg")
+    assert core_logic.place_file(src, dst) == ('copy', len(DATA))
+    assert open(dst, 'rb').read() == DATA
+    assert os.path.exists(src)
+    assert os.stat(dst).st_mtime == os.stat(src).st_mtime
+
+
+def test_hardlink_shares_the_inode_and_replaces_existing(src, tmp_path):
+    dst = tmp_path / "out.jpg"
+    dst.write_bytes(b'old')
+    assert core_logic.place_file(src, str(dst), 'hardlink') == ('hardlink', 0)
+    assert os.path.samefile(src, dst)
+    assert dst.read_bytes() == DATA
+
+
+def test_hardlink_falls_back_to_copy(src, tmp_path, monkeypatch):
+    monkeypatch.setattr(os, 'link', refuse(errno.EXDEV))
+    dst = str(tmp_path / "out.jpg")
+    assert core_logic.place_file(src, dst, 'hardlink') == ('copy', len(DATA))
+    assert not os.path.samefile(src, dst)
+    assert open(dst, 'rb').read() == DATA
+
+
+def test_reflink_or_copy_on_this_file_system(src, tmp_path):
+    dst = tmp_path / "out.jpg"
+    dst.write_bytes(b'old')
+    used, written = core_logic.place_file(src, str(dst), 'reflink')
+    # tmp 폴더가 Btrfs/XFS/APFS면 리플링크, 아니면 복사 (어느 쪽이든 내용은 같음)
+    assert (used, written) in {('reflink', 0), ('copy', len(DATA))}
+    assert dst.read_bytes() == DATA
+
+
+def test_reflink_falls_back_to_copy(src, tmp_path, monkeypatch):
+    monkeypatch.setattr(core_logic, '_reflink', refuse(errno.EOPNOTSUPP))
+    dst = str(tmp_path / "out.jpg")
+    assert core_logic.place_file(src, dst, 'reflink') == ('copy', len(DATA))
+    assert open(dst, 'rb').read() == DATA
+
+
+@pytest.mark.skipif(not sys.platform.startswith('linux'), reason="FICLONE ioctl은 Linux 전용")
+def test_ficlone_failure_removes_partial_file(src, tmp_path, monkeypatch):
+    import fcntl
+    calls = []
+
+    def ioctl(fd, request, arg):
+        calls.append(request)
+        raise OSError(errno.EXDEV, os.strerror(errno.EXDEV))
+
+    monkeypatch.setattr(fcntl, 'ioctl', ioctl)
+    dst = tmp_path / "out.jpg"
+    with pytest.raises(OSError):
+        core_logic._reflink(src, str(dst))
+    assert calls == [core_logic._FICLONE]
+    assert not dst.exists()
+
+
+@pytest.mark.skipif(not sys.platform.startswith('linux'), reason="FICLONE ioctl은 Linux 전용")
+def test_ficlone_success_copies_metadata(src, tmp_path, monkeypatch):
+    import fcntl
+
+    def ioctl(fd, request, arg):
+        os.write(fd, os.pread(arg, len(DATA), 0))   # 복제를 흉내 냄
+
+    monkeypatch.setattr(fcntl, 'ioctl', ioctl)
+    dst = str(tmp_path / "out.jpg")
+    assert core_logic.place_file(src, dst, 'reflink') == ('reflink', 0)
+    assert open(dst, 'rb').read() == DATA
+    assert os.stat(dst).st_mtime == os.stat(src).st_mtime
+
+
+class FakeLibc:
+    """macOS libc의 clonefile만 흉내 냄"""
+
+    def __init__(self, supported):
+        self.supported = supported
+
+    def clonefile(self, src, dst, flags):
+        if not self.supported:
+            ctypes.set_errno(errno.ENOTSUP)
+            return -1
+        shutil.copyfile(os.fsdecode(src), os.fsdecode(dst))
+        return 0
+
+
+@pytest.mark.parametrize('supported', [True, False])
+def test_clonefile_on_macos(src, tmp_path, monkeypatch, supported):
+    monkeypatch.setattr(sys, 'platform', 'darwin')
+    monkeypatch.setattr(ctypes.util, 'find_library', lambda name: name)
+    monkeypatch.setattr(ctypes, 'CDLL', lambda name, use_errno=False: FakeLibc(supported))
+    dst = str(tmp_path / "out.jpg")
+    used = core_logic.place_file(src, dst, 'reflink')
+    assert used == (('reflink', 0) if supported else ('copy', len(DATA)))
+    assert open(dst, 'rb').read() == DATA
+
+
+def test_reflink_unsupported_platform(src, tmp_path, monkeypatch):
+    monkeypatch.setattr(sys, 'platform', 'win32')
+    with pytest.raises(OSError) as raised:
+        core_logic._reflink(src, str(tmp_path / "out.jpg"))
+    assert raised.value.errno == errno.ENOTSUP
+
+
+def test_move_renames_on_the_same_device(src, tmp_path):
+    dst = str(tmp_path / "out.jpg")
+    assert core_logic.place_file(src, dst, 'move') == ('move', 0)
+    assert not os.path.exists(src)
+    assert open(dst, 'rb').read() == DATA
+
+
+def test_move_across_devices_copies_then_removes(src, tmp_path, monkeypatch):
+    monkeypatch.setattr(os, 'replace', refuse(errno.EXDEV))
+    dst = str(tmp_path / "out.jpg")
+    assert core_logic.place_file(src, dst, 'move') == ('move', len(DATA))
+    assert not os.path.exists(src)
+    assert open(dst, 'rb').read() == DATA
+    assert os.stat(dst).st_mtime == 1_700_000_000
+
+
+def test_move_other_errors_are_raised_and_source_kept(src, tmp_path, monkeypatch):
+    monkeypatch.setattr(os, 'replace', refuse(errno.EACCES))
+    dst = tmp_path / "out.jpg"
+    with pytest.raises(PermissionError):
+        core_logic.place_file(src, str(dst), 'move')
+    assert os.path.exists(src)
+    assert not dst.exists()
+
+
+def test_reserve_numbers_repeated_names(tmp_path):
+    registry = core_logic.OutputNameRegistry()
+    d = str(tmp_path)
+    assert [registry.reserve(d, '박새') for _ in range(3)] == ['박새.jpg', '박새_1.jpg', '박새_2.jpg']
+    assert registry.reserve(d, '박새', '.ORF') == '박새.ORF'   # 확장자마다 따로 번호
+    assert registry.reserve(str(tmp_path / 'other'), '박새') == '박새.jpg'
+    assert registry._next[(d, '박새', '.jpg')] == 3   # 다음 발급은 목록을 다시 훑지 않고 _3부터
+
+
+def test_reserve_treats_case_only_differences_as_collisions(tmp_path):
+    registry = core_logic.OutputNameRegistry()
+    d = str(tmp_path)
+    assert registry.reserve(d, 'Great Tit') == 'Great Tit.jpg'
+    assert registry.reserve(d, 'great tit') == 'great tit_1.jpg'
+    assert registry.reserve(d, 'GREAT TIT', '.JPG') == 'GREAT TIT_2.JPG'
+
+
+def test_reserve_skips_files_already_on_disk(tmp_path):
+    for name in ['박새.jpg', '박새_1.JPG', '박새_3.jpg']:
+        (tmp_path / name).write_bytes(b'')
+    registry = core_logic.OutputNameRegistry()
+    d = str(tmp_path)
+    assert [registry.reserve(d, '박새') for _ in range(3)] == ['박새_2.jpg', '박새_4.jpg', '박새_5.jpg']
+    registry.add(d, '참새.jpg')   # 직접 정한 이름도 피함
+    assert registry.reserve(d, '참새') == '참새_1.jpg'
+
+
+def test_reserve_reads_each_directory_once(tmp_path, monkeypatch):
+    registry = core_logic.OutputNameRegistry()
+    scanned = []
+    real_scandir = os.scandir
+    monkeypatch.setattr(os, 'scandir', lambda path: scanned.append(path) or real_scandir(path))
+    for _ in range(5):
+        registry.reserve(str(tmp_path), '박새')
+    assert scanned == [str(tmp_path)]
+
+
+def test_concurrent_reserve_never_repeats_a_name(tmp_path):
+    registry = core_logic.OutputNameRegistry()
+    names, lock = [], threading.Lock()
+
+    def work():
+        for _ in range(50):
+            name = registry.reserve(str(tmp_path), '박새')
+            with lock:
+                names.append(name)
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(names) == len(set(names)) == 400
+
+
+def test_claims_share_names_between_workers(tmp_path):
+    out = tmp_path / 'out'
+    claims_dir = str(tmp_path / 'queue' / 'names')
+    first = core_logic.OutputNameRegistry(work_queue.NameClaims(claims_dir, str(out)))
+    second = core_logic.OutputNameRegistry(work_queue.NameClaims(claims_dir, str(out)))
+    d = str(out / '2025')
+
+    assert first.reserve(d, '박새', owner='a.jpg') == '박새.jpg'
+    # 다른 작업자는 선점 파일을 보고 다음 번호를 받음 (대소문자만 달라도 같은 이름)
+    assert second.reserve(d, '박새', owner='b.jpg') == '박새_1.jpg'
+    assert second.reserve(d, '박새', '.JPG', owner='c.jpg') == '박새_2.JPG'
+    # 중단 후 다시 처리하는 사진은 자기가 선점한 이름을 다시 받음
+    assert core_logic.OutputNameRegistry(work_queue.NameClaims(claims_dir, str(out))).reserve(
+        d, '박새', owner='b.jpg') == '박새_1.jpg'
+
+
+SHOT = datetime(2025, 6, 19, 7, 30)
+TIT = ('Passeriformes', 'Paridae', '박새', 'Great Tit')
+
+
+@pytest.mark.parametrize('layout, dt, names, expected', [
+    ('flat', SHOT, TIT, ''),
+    ('unknown', SHOT, TIT, ''),
+    ('date', SHOT, TIT, '2025/06-19'),
+    ('date', None, TIT, '날짜미상'),
+    ('species', SHOT, TIT, 'Passeriformes/Paridae/박새'),
+    ('species', SHOT, ('N/A', 'N/A', '*Mystery Bird', 'Mystery Bird'), '미분류/미분류/Mystery_Bird'),
+    ('date_species', SHOT, TIT, '2025/06-19/박새'),
+    ('date_species', None, TIT, '날짜미상/박새'),
+])
+def test_output_subdir_layouts(layout, dt, names, expected):
+    assert core_logic.output_subdir(layout, dt, *names) == expected
+
+
+@pytest.mark.parametrize('layout, expected', [
+    ('species', '미확인/미확인/미확인'),
+    ('date_species', '2025/06-19/미확인'),
+])
+def test_names_without_usable_characters_get_a_named_bucket(layout, expected):
+    # 문장 부호뿐인 이름은 sanitize_filename이 ''을 돌려주므로 빈 폴더 단계가 생기지 않게 '미확인'으로
+    assert core_logic.output_subdir(layout, SHOT, '???', '<>', '*"?"', '"?"') == expected
+    assert core_logic.output_subdir(layout, SHOT, '..', '.', '..', 'x') == expected
+
+
+def test_observation_relpath():
+    assert core_logic.observation_relpath({'new_filename': 'a.jpg'}) == 'a.jpg'
+    assert core_logic.observation_relpath({'rel_dir': '', 'new_filename': 'a.jpg'}) == 'a.jpg'
+    assert core_logic.observation_relpath({'rel_dir': '2025/06-19', 'new_filename': 'a.jpg'}) == '2025/06-19/a.jpg'
+    # 이전 버전이 남긴 빈 폴더 단계는 건너뜀
+    assert core_logic.observation_relpath({'rel_dir': 'Passeriformes//', 'new_filename': 'a.jpg'}) == 'Passeriformes/a.jpg'
@@ -0,0 +1,167 @@
+# 파일 이름: tests/test_pipeline.py
+"""StagedPipeline: 완전성과 순서, 단계별 오류 처리, 대기열 크기 제한, 중단과 예외 시 종료, RateLimiter"""
+
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+import identifiers
+import pipeline
+
+
+def decode_item(item):
+    """(디코딩 프로세스) 항목 번호를 가짜 이미지 바이트로"""
+    if item == 'bad-decode':
+        raise ValueError('손상된 사진')
+    return f"image {item}".encode()
+
+
+@pytest.fixture(scope='module')
+def pool():
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        yield executor
+
+
+class Recorder:
+    """식별(FakeIdentifier)과 저장 단계에서 일어난 일을 기록"""
+
+    def __init__(self, fail_identify=(), fail_write=(), write_delay=0.0):
+        self.fake = identifiers.FakeIdentifier()
+        self.fail_identify = set(fail_identify)
+        self.fail_write = set(fail_write)
+        self.write_delay = write_delay
+        self.events = []
+        self.written = {}
+        self.lock = threading.Lock()
+
+    def identify(self, item, decoded):
+        with self.lock:
+            self.events.append(('identify', item))
+        if item in self.fail_identify:
+            raise RuntimeError('API 오류')
+        if item == 'skip':
+            return None
+        return self.fake.identify(identifiers.IdentifyRequest(decoded))
+
+    def write(self, item, decoded, identified):
+        time.sleep(self.write_delay)
+        if item in self.fail_write:
+            raise OSError('디스크 가득 참')
+        with self.lock:
+            self.events.append(('write', item))
+            self.written[item] = (decoded, identified['scientific_name'])
+
+
+def make_pipeline(recorder, pool, logs=None, **kwargs):
+    return pipeline.StagedPipeline(decode_item, recorder.identify, recorder.write,
+                                   (logs if logs is not None else []).append, pool=pool, **kwargs)
+
+
+def test_every_item_is_written_once_with_its_own_result(pool):
+    recorder = Recorder()
+    items = list(range(40))
+    stats = make_pipeline(recorder, pool, workers={'io': 4, 'write': 2}, queue_size=3).run(iter(items))
+
+    assert stats == {'submitted': 40, 'identified': 40, 'written': 40, 'failed': 0}
+    assert sorted(recorder.written) == items
+    fake = identifiers.FakeIdentifier()
+    for item, (decoded, name) in recorder.written.items():
+        assert decoded == f"image {item}".encode()
+        assert name == fake.identify(identifiers.IdentifyRequest(decoded))['scientific_name']
+    # 항목마다 식별 → 저장 순서
+    for item in items:
+        assert recorder.events.index(('identify', item)) < recorder.events.index(('write', item))
+
+
+def test_single_workers_keep_input_order(pool):
+    recorder = Recorder()
+    make_pipeline(recorder, pool, workers={'io': 1, 'write': 1}).run(range(15))
+    assert [item for stage, item in recorder.events if stage == 'write'] == list(range(15))
+
+
+def test_errors_in_each_stage_only_fail_that_item(pool):
+    recorder = Recorder(fail_identify={'bad-identify'}, fail_write={'bad-write'})
+    logs = []
+    items = [0, 'bad-decode', 1, 'bad-identify', 2, 'bad-write', 'skip', 3]
+    stats = make_pipeline(recorder, pool, logs).run(items)
+
+    assert stats == {'submitted': 8, 'identified': 5, 'written': 4, 'failed': 3}
+    assert sorted(recorder.written) == [0, 1, 2, 3]
+    assert ('identify', 'bad-decode') not in recorder.events   # 디코딩 실패는 식별로 넘기지 않음
+    assert any('[bad-decode] 디코딩 오류: 손상된 사진' in msg for msg in logs)
+    assert any('[bad-identify] 분석 오류: API 오류' in msg for msg in logs)
+    assert any('[bad-write] 파일 처리 오류: 디스크 가득 참' in msg for msg in logs)
+
+
+def test_bounded_queues_hold_back_the_feeder(pool):
+    recorder = Recorder(write_delay=0.02)
+    pulled = []
+
+    def items():
+        for i in range(30):
+            with recorder.lock:
+                pulled.append(len(recorder.written))
+            yield i
+
+    workers = {'io': 2, 'write': 1}
+    queue_size = 2
+    make_pipeline(recorder, pool, workers=workers, queue_size=queue_size).run(items())
+
+    assert len(recorder.written) == 30
+    # 아직 저장하지 않은 항목 수는 두 대기열 + 작업 중인 스레드 + 투입 대기 하나를 넘지 않음
+    in_flight_limit = 2 * queue_size + workers['io'] + workers['write'] + 1
+    assert max(i - written for i, written in enumerate(pulled)) <= in_flight_limit
+
+
+def test_failing_item_source_stops_the_pipeline_and_raises(pool):
+    recorder = Recorder()
+
+    def items():
+        yield from range(5)
+        raise OSError('폴더를 읽을 수 없음')
+
+    before = set(threading.enumerate())
+    with pytest.raises(OSError, match='폴더를 읽을 수 없음'):
+        make_pipeline(recorder, pool, workers={'io': 2, 'write': 1}).run(items())
+    # stop()처럼 멈추고 (아직 식별하지 않은 항목은 건너뜀), 작업 스레드가 모두 끝난 뒤 예외를 알림
+    assert set(recorder.written) <= {0, 1, 2, 3, 4}
+    leftover = [t for t in threading.enumerate()
+                if t not in before and t.is_alive() and type(t).__name__ != '_ExecutorManagerThread']
+    assert not leftover
+
+
+def test_stop_skips_items_not_yet_identified(pool):
+    recorder = Recorder()
+    staged = None
+
+    def identify(item, decoded):
+        result = recorder.identify(item, decoded)
+        if item == 2:
+            staged.stop()
+        return result
+
+    staged = pipeline.StagedPipeline(decode_item, identify, recorder.write, lambda msg: None,
+                                     workers={'io': 1, 'write': 1}, pool=pool)
+    stats = staged.run(range(100))
+    assert 3 <= len(recorder.written) < 100
+    assert stats['submitted'] < 100
+    assert {0, 1, 2} <= set(recorder.written)   # 멈추기 전에 식별한 항목은 저장
+
+
+def test_own_pool_is_created_and_closed():
+    recorder = Recorder()
+    staged = pipeline.StagedPipeline(decode_item, recorder.identify, recorder.write, lambda msg: None,
+                                     workers={'decode': 1, 'io': 1, 'write': 1})
+    assert staged.run(range(3))['written'] == 3
+    assert staged._pool is None
+
+
+def test_rate_limiter_spaces_requests():
+    limiter = pipeline.RateLimiter(per_minute=600)   # 0.1초 간격
+    started = time.monotonic()
+    for _ in range(4):
+        limiter.acquire()
+    assert time.monotonic() - started >= 0.29
+    assert limiter.waited >= 0.29
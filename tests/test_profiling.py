@@ -0,0 +1,58 @@
+# 파일 이름: tests/test_profiling.py
+"""RunProfiler: 처리 도중 실패해도 cProfile/tracemalloc을 끄고, 요약은 한 번만 씀"""
+
+import os
+import tracemalloc
+
+import pytest
+from PIL import Image
+
+import core_logic
+import identifiers
+import profiling
+
+
+def test_finish_is_idempotent(tmp_path):
+    logs = []
+    profiler = profiling.RunProfiler(str(tmp_path), logs.append)
+    profiler.start('scan')
+    sum(range(1000))
+    profiler.finish()
+    profiler.finish()
+
+    assert not tracemalloc.is_tracing()
+    assert len(profiler.stages) == 1
+    assert os.path.exists(os.path.join(profiler.out_dir, 'summary.txt'))
+    assert sum('프로파일:' in msg for msg in logs) == 1
+
+
+def test_failed_run_stops_profiling(tmp_path, monkeypatch):
+    Image.new('RGB', (320, 240), (90, 90, 60)).save(tmp_path / "p0.jpg")
+
+    def broken_prescan(*args, **kwargs):
+        raise RuntimeError("사전 스캔 실패")
+
+    monkeypatch.setattr(core_logic, 'prescan_sources', broken_prescan)
+    cfg = {
+        'log_callback': lambda msg: None,
+        'identifier': identifiers.FakeIdentifier(),
+        'wiki_wiki': None,
+        'csv_db': None,
+        'offline': True,
+        'photo_location': 'South Korea',
+        'target_folder': str(tmp_path),
+        'report_options': {'format': 'none'},
+        'prescan': True,
+        'profile': True,
+    }
+    with pytest.raises(RuntimeError):
+        core_logic.process_all_images(cfg)
+
+    assert not tracemalloc.is_tracing()
+    # 'scan' 단계의 cProfile이 꺼져 있지 않으면 새 프로파일러를 켤 수 없음
+    probe = profiling.RunProfiler(str(tmp_path))
+    probe.start('probe')
+    probe.finish()
+    log_dir = tmp_path / core_logic.OUTPUT_DIR_NAME / '탐조기록'
+    [profile_dir] = [p for p in log_dir.iterdir() if p.name.startswith('profile_')]
+    assert (profile_dir / '1_scan.pstats').exists()
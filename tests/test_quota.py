@@ -0,0 +1,70 @@
+# 파일 이름: tests/test_quota.py
+"""QuotaScheduler: 중복(hedged) 요청도 할당량에 포함"""
+
+import threading
+import time
+
+import core_logic
+import identifiers
+import quota
+
+
+class SlowFirstIdentifier(identifiers.FakeIdentifier):
+    """첫 요청만 느린 가짜 식별기 (보낸 요청 수를 셈)"""
+
+    def __init__(self, delay=0.5):
+        super().__init__()
+        self.delay = delay
+        self.sent = 0
+        self._lock = threading.Lock()
+
+    def identify_batch(self, requests):
+        with self._lock:
+            self.sent += 1
+            first = self.sent == 1
+        if first:
+            time.sleep(self.delay)
+        return super().identify_batch(requests)
+
+
+def _hedged(inner, scheduler):
+    hedged = identifiers.HedgedIdentifier(inner, hedge=True, min_samples=5,
+                                          hedge_call=core_logic._quota_hedge_call(scheduler, 'flash'))
+    hedged.latencies.extend([0.01] * 5)   # p95 = 0.01초 → 느린 요청이면 곧 중복 요청
+    return hedged
+
+
+def _identify(scheduler, hedged):
+    # _identify_once와 같이: 허가 → 요청 → 기록
+    scheduler.acquire('flash')
+    try:
+        return hedged.identify(identifiers.IdentifyRequest(b'photo'))
+    finally:
+        scheduler.record('flash')
+
+
+def test_hedged_request_is_counted():
+    scheduler = quota.QuotaScheduler(quota.QuotaLedger(), {'flash': {'per_minute': None, 'per_day': 10}})
+    inner = SlowFirstIdentifier()
+    hedged = _hedged(inner, scheduler)
+    try:
+        assert _identify(scheduler, hedged)['scientific_name']
+    finally:
+        hedged.close()
+
+    assert hedged.stats['hedged'] == 1 and hedged.stats['hedge_wins'] == 1
+    assert inner.sent == 2
+    assert scheduler.ledger.usage('flash')['requests'] == 2
+
+
+def test_no_hedge_when_quota_is_exhausted():
+    scheduler = quota.QuotaScheduler(quota.QuotaLedger(), {'flash': {'per_minute': None, 'per_day': 1}})
+    inner = SlowFirstIdentifier(delay=0.2)
+    hedged = _hedged(inner, scheduler)
+    try:
+        assert _identify(scheduler, hedged)['scientific_name']   # 중복 요청이 막혀도 처음 요청의 응답을 씀
+    finally:
+        hedged.close()
+
+    assert inner.sent == 1
+    assert scheduler.ledger.usage('flash')['requests'] == 1
@@ -0,0 +1,128 @@
+# 파일 이름: tests/test_scan.py
+"""scan_source_images: 하위 폴더 탐색, RAW 짝 찾기, 확장자 필터, 스캔과 처리를 함께 흘려 쓰기"""
+
+import itertools
+import os
+
+from PIL import Image
+
+import core_logic
+import identifiers
+
+
+def touch(path, data=b''):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def rel_paths(sources):
+    return [s.rel_path.replace(os.sep, '/') for s in sources]
+
+
+def make_tree(root):
+    for name in ['b.jpg', 'a.JPG', 'c.jpeg', 'notes.txt', 'raw_only.CR2', 'a.ORF', 'a.dng',
+                 'day1/x.jpg', 'day1/x.nef', 'day1/deep/y.jpg',
+                 f'{core_logic.OUTPUT_DIR_NAME}/old.jpg', '.cache/z.jpg']:
+        touch(os.path.join(root, name))
+
+
+def test_top_level_only_without_recursive(tmp_path):
+    make_tree(tmp_path)
+    sources = list(core_logic.scan_source_images(str(tmp_path)))
+    assert rel_paths(sources) == ['a.JPG', 'b.jpg', 'c.jpeg']
+
+
+def test_recursive_skips_output_and_hidden_folders(tmp_path):
+    make_tree(tmp_path)
+    sources = list(core_logic.scan_source_images(str(tmp_path), recursive=True))
+    assert rel_paths(sources) == ['a.JPG', 'b.jpg', 'c.jpeg', 'day1/x.jpg', 'day1/deep/y.jpg']
+
+
+def test_raw_pairs_come_from_the_stem_index(tmp_path):
+    make_tree(tmp_path)
+    by_rel = {s.rel_path.replace(os.sep, '/'): s for s in core_logic.scan_source_images(str(tmp_path), recursive=True)}
+    # 대소문자 구분 없이 같은 stem, 여러 RAW가 있으면 RAW_EXT 순서(.orf가 .dng보다 앞)
+    assert by_rel['a.JPG'].raw_path == os.path.join(str(tmp_path), 'a.ORF')
+    assert by_rel['day1/x.jpg'].raw_path == os.path.join(str(tmp_path), 'day1', 'x.nef')
+    assert by_rel['b.jpg'].raw_path is None
+    assert by_rel['day1/deep/y.jpg'].exif is None   # 사전 스캔 전에는 EXIF를 읽지 않음
+
+
+def test_scanner_is_lazy(tmp_path):
+    for i in range(3):
+        touch(os.path.join(tmp_path, f"d{i}", "p.jpg"))
+    scanned = []
+    real_scandir = os.scandir
+
+    def counting_scandir(path):
+        scanned.append(path)
+        return real_scandir(path)
+
+    sources = core_logic.scan_source_images(str(tmp_path), recursive=True)
+    os.scandir, saved = counting_scandir, os.scandir
+    try:
+        first = next(sources)
+    finally:
+        os.scandir = saved
+    assert first.rel_path == os.path.join('d0', 'p.jpg')
+    assert len(scanned) == 2   # 최상위 폴더와 첫 하위 폴더만 읽음
+
+
+def test_unchanged_check_reads_sources_in_chunks(tmp_path):
+    touch(os.path.join(tmp_path, 'p.jpg'), b'jpeg')
+    pulled = []
+
+    def endless():
+        for i in itertools.count():
+            pulled.append(i)
+            yield core_logic.SourceImage(str(tmp_path / 'p.jpg'), None, f"p{i}.jpg")
+
+    fingerprints = core_logic.FingerprintIndex()
+    keyed = core_logic.skip_unchanged_sources(endless(), fingerprints, str(tmp_path), lambda record: None,
+                                              workers=2, chunk_size=4)
+    first = [source.rel_path for source, _ in itertools.islice(keyed, 5)]
+    keyed.close()
+    assert first == ['p0.jpg', 'p1.jpg', 'p2.jpg', 'p3.jpg', 'p4.jpg']
+    assert len(pulled) == 8
+
+
+class OrderRecordingIdentifier(identifiers.FakeIdentifier):
+    def __init__(self, events):
+        super().__init__()
+        self.events = events
+
+    def identify_batch(self, requests):
+        self.events.append('identify')
+        return super().identify_batch(requests)
+
+
+def test_default_run_processes_photos_while_scanning(tmp_path, monkeypatch):
+    for i in range(6):
+        Image.new('RGB', (64, 48), (i * 40, 90, 60)).save(tmp_path / f"p{i}.jpg")
+    events = []
+    real_scan = core_logic.scan_source_images
+
+    def recording_scan(src_dir, recursive=False):
+        for source in real_scan(src_dir, recursive):
+            events.append('scan')
+            yield source
+
+    monkeypatch.setattr(core_logic, 'scan_source_images', recording_scan)
+    monkeypatch.setattr(core_logic, 'UNCHANGED_CHECK_CHUNK', 2)
+    cfg = {
+        'log_callback': lambda msg: None,
+        'identifier': OrderRecordingIdentifier(events),
+        'wiki_wiki': None,
+        'csv_db': None,
+        'offline': True,
+        'photo_location': 'South Korea',
+        'target_folder': str(tmp_path),
+        'report_options': {'format': 'none'},
+    }
+    summary = core_logic.process_all_images(cfg)
+
+    assert summary['processed'] == 6
+    assert events.count('scan') == 6
+    # 기본 설정(사전 스캔 없음)에서는 폴더 전체를 읽기 전에 첫 사진을 식별
+    assert events.index('identify') < len(events) - 1 - events[::-1].index('scan')
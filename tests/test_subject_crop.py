@@ -0,0 +1,69 @@
+# 파일 이름: tests/test_subject_crop.py
+"""find_subject: 배경과 대비가 큰 작은 피사체는 잘라 내고, 밋밋하거나 잡음뿐인 사진은 전체 프레임"""
+
+import numpy as np
+import pytest
+from PIL import Image
+
+import subject_crop
+
+WIDTH, HEIGHT = 3000, 2000
+SKY = (150, 190, 230)
+
+
+def frame_with_bird(center=(2100, 700), size=(160, 120)):
+    img = Image.new('RGB', (WIDTH, HEIGHT), SKY)
+    cx, cy = center
+    w, h = size
+    img.paste((40, 30, 20), (cx - w // 2, cy - h // 2, cx + w // 2, cy + h // 2))
+    return img
+
+
+def test_small_high_contrast_subject_is_cropped():
+    found = subject_crop.find_subject(frame_with_bird())
+    assert found is not None
+    left, top, right, bottom = found.box
+    # 피사체를 여유 있게 감싸고, 최소 크기를 지키며, 프레임 안에 있음
+    assert left <= 2100 - 80 and right >= 2100 + 80
+    assert top <= 700 - 60 and bottom >= 700 + 60
+    assert right - left >= subject_crop.MIN_CROP_PIXELS and bottom - top >= subject_crop.MIN_CROP_PIXELS
+    assert 0 <= left < right <= WIDTH and 0 <= top < bottom <= HEIGHT
+    assert found.confidence >= subject_crop.MIN_CONFIDENCE
+    assert found.area_ratio == pytest.approx((right - left) * (bottom - top) / (WIDTH * HEIGHT))
+    assert found.area_ratio <= subject_crop.MAX_AREA_RATIO
+
+
+def test_subject_at_the_edge_keeps_box_inside_frame():
+    found = subject_crop.find_subject(frame_with_bird(center=(80, 60)))
+    assert found is not None
+    left, top, right, bottom = found.box
+    assert (left, top) == (0, 0)
+    assert right >= subject_crop.MIN_CROP_PIXELS and bottom >= subject_crop.MIN_CROP_PIXELS
+
+
+def test_flat_frame_falls_back_to_full_frame():
+    assert subject_crop.find_subject(Image.new('RGB', (WIDTH, HEIGHT), SKY)) is None
+
+
+def test_uniform_noise_is_not_confident(monkeypatch):
+    rng = np.random.default_rng(7)
+    noise = Image.fromarray(rng.integers(0, 256, size=(HEIGHT, WIDTH, 3), dtype=np.uint8))
+    assert subject_crop.find_subject(noise) is None
+    # 에너지가 고르게 퍼져 있어 상자 안 밀도가 평균 수준
+    monkeypatch.setattr(subject_crop, 'MIN_CONFIDENCE', 0.0)
+    monkeypatch.setattr(subject_crop, 'MAX_AREA_RATIO', 1.0)
+    assert subject_crop.find_subject(noise).confidence < 2.0
+
+
+def test_large_subject_is_not_worth_cropping(monkeypatch):
+    large = frame_with_bird(center=(1500, 1000), size=(1600, 1100))
+    # 신뢰도는 충분하지만 여백을 더한 상자가 MAX_AREA_RATIO를 넘으므로 전체 프레임
+    assert subject_crop.find_subject(large) is None
+    monkeypatch.setattr(subject_crop, 'MAX_AREA_RATIO', 1.0)
+    found = subject_crop.find_subject(large)
+    assert found.confidence >= subject_crop.MIN_CONFIDENCE and found.area_ratio > 0.6
+
+
+def test_small_photo_is_left_alone():
+    small = frame_with_bird().resize((subject_crop.MIN_CROP_PIXELS, 400))
+    assert subject_crop.find_subject(small) is None
@@ -0,0 +1,207 @@
+# 파일 이름: tests/test_thumbnails.py
+"""썸네일: 한 번의 디코딩으로 만드는 크기별 썸네일(build_thumbnail_pyramid), 크기/수정 시각/내용 지문 인덱스와 정리"""
+
+import os
+import re
+
+import pytest
+from PIL import Image
+
+import core_logic
+
+
+def save_photo(path, size=(3000, 2000), color=(120, 90, 60), orientation=None):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    extra = {}
+    if orientation:
+        exif = Image.Exif()
+        exif[0x0112] = orientation
+        extra['exif'] = exif.tobytes()
+    Image.new('RGB', size, color).save(path, 'JPEG', **extra)
+
+
+def sizes(thumbnail_dir, variants):
+    result = {}
+    for variant, name in variants.items():
+        with Image.open(os.path.join(thumbnail_dir, name)) as im:
+            result[variant] = im.size
+    return result
+
+
+def test_pyramid_writes_every_variant(tmp_path):
+    src = str(tmp_path / "박새.jpg")
+    save_photo(src)
+    thumbs = str(tmp_path / "thumbs")
+    variants = core_logic.build_thumbnail_pyramid(src, thumbs, "박새")
+
+    assert variants == {v: core_logic.thumbnail_filename("박새", v) for v in core_logic.THUMBNAIL_VARIANTS}
+    assert variants['1024'] == "박새_thumb.jpg"
+    assert sizes(thumbs, variants) == {'1024': (1024, 683), '400': (400, 267), '250': (250, 167),
+                                       '150': (150, 100), 'word': (225, 150)}
+
+
+def test_pyramid_decodes_the_source_once(tmp_path, monkeypatch):
+    src = str(tmp_path / "p.jpg")
+    save_photo(src)
+    opened = []
+    real_open = Image.open
+    monkeypatch.setattr(Image, 'open', lambda fp, *args, **kwargs: opened.append(fp) or real_open(fp, *args, **kwargs))
+    core_logic.build_thumbnail_pyramid(src, str(tmp_path / "thumbs"), "p")
+    assert opened == [src]
+
+
+def test_pyramid_follows_exif_orientation_and_rel_dir(tmp_path):
+    src = str(tmp_path / "p.jpg")
+    save_photo(src, orientation=6)
+    thumbs = str(tmp_path / "thumbs")
+    variants = core_logic.build_thumbnail_pyramid(src, thumbs, "p", rel_dir="2025/06-19")
+
+    assert variants['400'] == "2025/06-19/p_thumb_400.jpg"
+    assert sizes(thumbs, variants)['1024'] == (683, 1024)   # 세로 사진으로 돌려서 저장
+
+
+def test_pyramid_webp_keeps_word_variant_as_jpeg(tmp_path):
+    src = str(tmp_path / "p.jpg")
+    save_photo(src)
+    thumbs = str(tmp_path / "thumbs")
+    variants = core_logic.build_thumbnail_pyramid(src, thumbs, "p", 'webp')
+
+    assert {v: os.path.splitext(name)[1] for v, name in variants.items()} == {
+        '1024': '.webp', '400': '.webp', '250': '.webp', '150': '.webp', 'word': '.jpg'}
+    with Image.open(os.path.join(thumbs, variants['250'])) as im:
+        assert im.format == 'WEBP'
+
+
+def test_small_source_is_not_enlarged(tmp_path):
+    src = str(tmp_path / "p.jpg")
+    save_photo(src, size=(200, 120))
+    thumbs = str(tmp_path / "thumbs")
+    variants = core_logic.build_thumbnail_pyramid(src, thumbs, "p")
+    assert sizes(thumbs, variants) == {'1024': (200, 120), '400': (200, 120), '250': (200, 120),
+                                       '150': (150, 90), 'word': (200, 120)}
+
+
+class ThumbnailRun:
+    """출력 폴더에 원본 세 장을 두고 create_thumbnail_images를 반복 실행"""
+
+    def __init__(self, root):
+        self.out_dir = str(root / "out")
+        self.thumbs = os.path.join(self.out_dir, "thumbnail_images")
+        self.observations = [
+            {'new_filename': "박새.jpg", 'rel_dir': ''},
+            {'new_filename': "참새.jpg", 'rel_dir': '2025/06-19'},
+            {'new_filename': "까치.jpg", 'rel_dir': '2025/06-19'},
+        ]
+        for i, obs in enumerate(self.observations):
+            save_photo(self.source(obs), size=(800, 600), color=(40 * i, 90, 60))
+
+    def source(self, obs):
+        return os.path.join(self.out_dir, core_logic.observation_relpath(obs))
+
+    def run(self, observations=None, image_format='jpeg', fingerprints=None):
+        logs = []
+        core_logic.create_thumbnail_images(self.observations if observations is None else observations,
+                                           self.out_dir, self.thumbs, logs.append, image_format,
+                                           fingerprints=fingerprints)
+        done = next(msg for msg in logs if '썸네일 이미지 생성 완료' in msg)
+        saved, reused, removed = map(int, re.search(r'(\d+)개 \(재사용 (\d+)개, 정리 (\d+)개\)', done).groups())
+        return {'saved': saved, 'reused': reused, 'removed': removed}
+
+    def index(self):
+        return core_logic._load_thumbnail_index(self.thumbs)
+
+    def stamps(self):
+        """썸네일 파일별 (수정 시각, inode): 다시 만들면 바뀜"""
+        result = {}
+        for dirpath, _, names in os.walk(self.thumbs):
+            for name in names:
+                if name != core_logic.THUMBNAIL_INDEX_NAME:
+                    st = os.stat(os.path.join(dirpath, name))
+                    result[os.path.relpath(os.path.join(dirpath, name), self.thumbs)] = (st.st_mtime_ns, st.st_ino)
+        return result
+
+
+@pytest.fixture
+def thumbs(tmp_path):
+    return ThumbnailRun(tmp_path)
+
+
+def test_second_run_regenerates_nothing(thumbs):
+    assert thumbs.run() == {'saved': 3, 'reused': 0, 'removed': 0}
+    before = thumbs.stamps()
+    assert len(before) == 3 * len(core_logic.THUMBNAIL_VARIANTS)
+    assert thumbs.run() == {'saved': 0, 'reused': 3, 'removed': 0}
+    assert thumbs.stamps() == before
+
+
+def test_touched_source_is_reused_and_restamped(thumbs):
+    thumbs.run()
+    before = thumbs.stamps()
+    touched = thumbs.observations[1]
+    os.utime(thumbs.source(touched), ns=(1_700_000_000_000_000_000, 1_700_000_000_000_000_000))
+
+    # 수정 시각만 바뀌고 내용 지문이 같으면 다시 만들지 않고 인덱스의 stat만 갱신
+    assert thumbs.run() == {'saved': 0, 'reused': 3, 'removed': 0}
+    assert thumbs.stamps() == before
+    assert thumbs.index()["2025/06-19/참새.jpg"]['mtime_ns'] == 1_700_000_000_000_000_000
+
+
+def test_replaced_source_invalidates_exactly_its_entry(thumbs):
+    thumbs.run()
+    before = thumbs.stamps()
+    old_content = thumbs.index()["2025/06-19/까치.jpg"]['content']
+    save_photo(thumbs.source(thumbs.observations[2]), size=(800, 600), color=(255, 255, 255))
+
+    assert thumbs.run() == {'saved': 1, 'reused': 2, 'removed': 0}
+    after = thumbs.stamps()
+    changed = {name for name in before if before[name] != after[name]}
+    assert changed == {os.path.join("2025", "06-19", core_logic.thumbnail_filename("까치", v))
+                       for v in core_logic.THUMBNAIL_VARIANTS}
+    assert thumbs.index()["2025/06-19/까치.jpg"]['content'] != old_content
+
+
+def test_missing_thumbnail_file_is_rebuilt(thumbs):
+    thumbs.run()
+    os.remove(os.path.join(thumbs.thumbs, core_logic.thumbnail_filename("박새", '150')))
+    assert thumbs.run() == {'saved': 1, 'reused': 2, 'removed': 0}
+
+
+def test_removed_source_is_garbage_collected(thumbs):
+    thumbs.run()
+    gone = thumbs.observations[0]
+    os.remove(thumbs.source(gone))
+    result = thumbs.run(thumbs.observations[1:])
+
+    assert result == {'saved': 0, 'reused': 2, 'removed': len(core_logic.THUMBNAIL_VARIANTS)}
+    assert "박새.jpg" not in thumbs.index()
+    assert not any(name.startswith("박새_thumb") for name in thumbs.stamps())
+
+
+def test_unindexed_orphans_from_older_versions_are_removed(thumbs):
+    thumbs.run()
+    stray = os.path.join(thumbs.thumbs, "2025", "06-19", "사라진새_thumb_400.jpg")
+    kept = os.path.join(thumbs.thumbs, "2025", "06-19", "참새_thumb_legacy.jpg")
+    for path in (stray, kept):
+        save_photo(path, size=(10, 10))
+    assert thumbs.run()['removed'] == 1
+    assert not os.path.exists(stray)
+    assert os.path.exists(kept)   # 원본(참새.jpg)이 남아 있으면 인덱스에 없어도 둠
+
+
+def test_format_change_rebuilds_and_drops_old_files(thumbs):
+    thumbs.run()
+    assert thumbs.run(image_format='webp') == {'saved': 3, 'reused': 0, 'removed': 0}
+    names = set(thumbs.stamps())
+    assert core_logic.thumbnail_filename("박새", '1024', 'webp') in names
+    assert core_logic.thumbnail_filename("박새", '1024') not in names
+    assert core_logic.thumbnail_filename("박새", 'word', 'webp') in names   # Word용은 계속 JPEG
+    assert all(entry['format'] == 'webp' for entry in thumbs.index().values())
+
+
+def test_fingerprint_cache_is_used_for_touched_sources(thumbs):
+    fingerprints = core_logic.FingerprintIndex()
+    thumbs.run(fingerprints=fingerprints)
+    assert fingerprints.stats['misses'] == 3
+    os.utime(thumbs.source(thumbs.observations[0]), ns=(1_700_000_000_000_000_000, 1_700_000_000_000_000_000))
+    assert thumbs.run(fingerprints=fingerprints)['reused'] == 3
+    assert fingerprints.stats['misses'] == 4   # stat이 바뀐 원본 하나만 다시 해시
@@ -0,0 +1,133 @@
+# 파일 이름: tests/test_visual_report.py
+"""리포트 집계(aggregate_observations)의 결과와 규모에 따른 소요 시간, 리포트 파일 쓰기"""
+
+import os
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+import visual_report
+
+SPECIES = [
+    ('Parus major', '박새', 'Passeriformes', 'Paridae'),
+    ('Pica serica', '까치', 'Passeriformes', 'Corvidae'),
+    ('Ardea alba', '중대백로', 'Pelecaniformes', 'Ardeidae'),
+    ('Anas platyrhynchos', '청둥오리', 'Anseriformes', 'Anatidae'),
+]
+
+
+def make_observations(count, species=SPECIES, start=datetime(2024, 5, 1, 6, 0)):
+    """`count`개의 관찰 기록 (종은 차례로 돌아가며, 10분 간격, 20개마다 시각 없음)"""
+    observations = []
+    for i in range(count):
+        sci, korean, order, family = species[i % len(species)]
+        observations.append({
+            'datetime': None if i % 20 == 19 else start + timedelta(minutes=10 * i),
+            'new_filename': f"{i:06d}.jpg",
+            'scientific_name': sci,
+            'korean_name': korean,
+            'common_name': sci,
+            'taxonomy': {'order': order, 'family': family},
+        })
+    return observations
+
+
+def test_groups_counts_and_date_spans():
+    observations = make_observations(200)
+    # 작은 run으로 임시 파일 분할/병합 경로까지 확인
+    summary = visual_report.aggregate_observations(observations, run_size=16)
+
+    assert summary['observation_count'] == 200
+    assert summary['species_count'] == 4
+    assert summary['family_count'] == 4
+    assert summary['order_count'] == 3
+
+    # 목 → 과 순서, 종 안에서는 넣은 순서 유지
+    assert [g['sci_name'] for g in summary['species']] == \
+        ['Anas platyrhynchos', 'Pica serica', 'Parus major', 'Ardea alba']
+    for group, group_observations in visual_report.iter_species(summary):
+        expected = [o for o in observations if o['scientific_name'] == group['sci_name']]
+        assert list(group_observations) == expected
+        assert group['count'] == len(expected)
+        assert group['first'] is expected[0]
+        dated = [o['datetime'] for o in expected if o['datetime']]
+        assert group['first_date'] == min(dated).date()
+        assert group['last_date'] == max(dated).date()
+        assert group['multi_day']  # 200 × 10분은 하루를 넘김
+
+    assert summary['time_info']['date'] == '2024년 05월 01일 ~ 2024년 05월 02일'
+
+
+def test_single_day_species_is_not_multi_day():
+    summary = visual_report.aggregate_observations(make_observations(8))
+    assert not any(g['multi_day'] for g in summary['species'])
+    assert summary['time_info']['time_range'] == '06:00 - 07:10'
+
+
+def test_empty_input():
+    summary = visual_report.aggregate_observations([])
+    assert summary['observation_count'] == 0
+    assert summary['species'] == []
+    assert summary['time_info']['date'] == '관찰 시간 정보 없음'
+
+
+def _best_time(observations, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        summary = visual_report.aggregate_observations(observations)
+        sum(1 for _ in summary['grouped'])
+        best = min(best, time.perf_counter() - started)
+        summary['grouped'].close()
+    return best
+
+
+def test_scales_linearly_up_to_100k_observations():
+    # 종이 많고 종마다 기록이 많아야 종 안에서의 반복 계산(O(n²))이 드러남
+    species = [(f"Genus{i} species{i}", f"새{i}", f"Order{i % 7}", f"Family{i % 31}") for i in range(50)]
+    small = make_observations(10_000, species)
+    large = make_observations(100_000, species)
+
+    summary = visual_report.aggregate_observations(large)
+    assert summary['observation_count'] == 100_000
+    assert summary['species_count'] == 50
+    assert sum(g['count'] for g in summary['species']) == 100_000
+    summary['grouped'].close()
+
+    # 10배 많은 기록에 10배 남짓 (O(n²)이면 100배); 측정 잡음을 감안해 넉넉한 상한
+    ratio = _best_time(large) / _best_time(small)
+    assert ratio < 30, f"10배 입력에 {ratio:.1f}배 시간"
+
+
+def test_word_report_splits_by_observation_count(tmp_path):
+    logs = []
+    visual_report.create_word_report(str(tmp_path), make_observations(25), '테스트', str(tmp_path), logs.append, 10)
+    assert sorted(os.listdir(tmp_path)) == ['visual_report.docx', 'visual_report_part2.docx', 'visual_report_part3.docx']
+
+    # 더 작은 재실행은 이전 실행의 분할 문서를 남기지 않음
+    visual_report.create_word_report(str(tmp_path), make_observations(12), '테스트', str(tmp_path), logs.append, 10)
+    assert sorted(os.listdir(tmp_path)) == ['visual_report.docx', 'visual_report_part2.docx']
+
+
+def test_html_report_lists_every_observation(tmp_path):
+    visual_report.create_html_report(str(tmp_path), make_observations(40), '테스트', str(tmp_path), 'medium', lambda msg: None)
+    with open(tmp_path / 'visual_report.html', encoding='utf-8') as f:
+        html = f.read()
+    assert html.count('class="observation-card"') == 40
+    assert html.count('class="species-section"') == 4
+    assert html.index('청둥오리') < html.index('까치') < html.index('박새') < html.index('중대백로')
+
+
+def test_failed_html_report_leaves_no_temp_file(tmp_path, monkeypatch):
+    (tmp_path / 'visual_report.html').write_text('이전 리포트', encoding='utf-8')
+
+    def broken_species(f, *args):
+        f.write('<div>')
+        raise OSError('썸네일을 읽을 수 없음')
+
+    monkeypatch.setattr(visual_report, '_write_html_species', broken_species)
+    with pytest.raises(OSError, match='썸네일을 읽을 수 없음'):
+        visual_report.create_html_report(str(tmp_path), make_observations(5), '테스트', str(tmp_path), 'medium', lambda msg: None)
+    assert os.listdir(tmp_path) == ['visual_report.html']
+    assert (tmp_path / 'visual_report.html').read_text(encoding='utf-8') == '이전 리포트'
@@ -0,0 +1,120 @@
+# 파일 이름: tests/test_wiki_batch.py
+"""WikiResolver: 일괄 조회, 이어받기, 리다이렉트, 오류 뒤 복구 (로컬 대역 서버 사용)"""
+
+import threading
+import time
+
+import pytest
+
+import wiki_batch
+from wiki_server import StandInWiki
+
+PAGES = {
+    'Great tit': '박새',
+    'Oriental magpie': '까치',
+    'Great egret': '중대백로',
+    'Eurasian tree sparrow': '참새',
+    'Varied tit': None,   # 한국어 문서 없음
+}
+REDIRECTS = {
+    'Parus major': 'Great tit',
+    'Pica serica': 'Oriental magpie',
+    'Ardea alba': 'Great egret',
+    'Common egret': 'Ardea alba',   # 이중 리다이렉트
+}
+
+
+@pytest.fixture
+def wiki():
+    with StandInWiki(PAGES, REDIRECTS) as server:
+        yield server
+
+
+def make_resolver(server, **kwargs):
+    return wiki_batch.WikiResolver(endpoint=server.url, timeout=2.0, **kwargs)
+
+
+def test_names_resolve_with_redirects_and_missing_pages(wiki):
+    resolver = make_resolver(wiki)
+    found = resolver.resolve(['great_tit', 'parus major', 'Common egret', 'Varied tit', 'Nonexistent bird'])
+
+    assert found['great_tit'] == {'korean_name': '박새', 'common_name': 'Great tit'}
+    assert found['parus major'] == {'korean_name': '박새', 'common_name': 'Great tit'}   # 정규화 → 리다이렉트
+    assert found['Common egret'] == {'korean_name': '중대백로', 'common_name': 'Great egret'}
+    assert found['Varied tit'] == {'korean_name': '*Varied tit', 'common_name': 'Varied tit'}
+    assert found['Nonexistent bird'] is None
+    assert len(wiki.requests) == 1
+    assert resolver.stats['round_trips'] == 1
+
+
+def test_cached_names_are_not_requested_again(wiki):
+    resolver = make_resolver(wiki)
+    resolver.resolve(['Great tit', 'Parus major'])
+    again = resolver.resolve(['Parus major', 'Great tit'])
+
+    assert again['Parus major']['korean_name'] == '박새'
+    assert len(wiki.requests) == 1
+    assert resolver.stats['cache_hits'] == 2
+
+
+def test_concurrent_lookups_share_one_request(wiki):
+    resolver = make_resolver(wiki, window=0.3)
+    names = ['Parus major', 'Pica serica', 'Ardea alba', 'Eurasian tree sparrow']
+    results = {}
+
+    def lookup(name):
+        results[name] = resolver.resolve([name])[name]
+
+    threads = [threading.Thread(target=lookup, args=(name,)) for name in names]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert [results[name]['korean_name'] for name in names] == ['박새', '까치', '중대백로', '참새']
+    assert len(wiki.requests) == 1
+    assert sorted(wiki.requests[0]) == sorted(names)
+
+
+def test_more_than_max_titles_are_split_into_batches(wiki):
+    resolver = make_resolver(wiki)
+    names = [f"Bird {i}" for i in range(wiki_batch.MAX_TITLES + 10)]
+    found = resolver.resolve(names)
+
+    assert all(found[name] is None for name in names)
+    assert [len(titles) for titles in wiki.requests] == [wiki_batch.MAX_TITLES, 10]
+
+
+def test_langlinks_continuation_is_merged():
+    with StandInWiki(PAGES, REDIRECTS, langlinks_per_response=1) as server:
+        resolver = make_resolver(server)
+        found = resolver.resolve(['Parus major', 'Pica serica', 'Great egret', 'Varied tit'])
+
+    assert found['Parus major']['korean_name'] == '박새'
+    assert found['Pica serica']['korean_name'] == '까치'
+    assert found['Great egret']['korean_name'] == '중대백로'
+    assert found['Varied tit']['korean_name'] == '*Varied tit'
+    assert len(server.requests) == 3   # 한국어 링크 3개를 1개씩 이어받음
+    assert resolver.stats['round_trips'] == 3
+
+
+def test_unexpected_response_does_not_block_later_lookups(wiki):
+    resolver = make_resolver(wiki)
+    wiki.malformed = True   # 문서에 title이 없는 응답 → query에서 KeyError
+    assert resolver.resolve(['Parus major']) == {'Parus major': None}
+    assert resolver.stats['errors'] == 1
+    assert not resolver._flushing
+
+    wiki.malformed = False
+    started = time.monotonic()
+    found = resolver.resolve(['Parus major', 'Pica serica'])
+    assert time.monotonic() - started < 1.0
+    assert found['Parus major']['korean_name'] == '박새'   # 실패한 이름은 캐시하지 않고 다시 조회
+    assert found['Pica serica']['korean_name'] == '까치'
+
+
+def test_unreachable_server_counts_an_error():
+    resolver = wiki_batch.WikiResolver(endpoint='http://127.0.0.1:9/w/api.php', timeout=0.5)
+    assert resolver.resolve(['Parus major']) == {'Parus major': None}
+    assert resolver.stats['errors'] == 1
+    assert not resolver._flushing
@@ -0,0 +1,79 @@
+# 파일 이름: tests/test_work_queue.py
+"""LeaseQueue: 만료된 임대 넘겨받기와 두 작업자가 동시에 넘겨받으려 할 때"""
+
+import json
+import os
+import time
+
+import pytest
+
+import work_queue
+
+
+@pytest.fixture
+def queues(tmp_path):
+    made = []
+
+    def make(worker_id):
+        queue = work_queue.LeaseQueue(str(tmp_path), worker_id, lease_seconds=60, log=lambda msg: None)
+        made.append(queue)
+        return queue
+
+    yield make
+    for queue in made:
+        queue.close()
+
+
+def _leave_expired_lease(queue, task, worker='crashed'):
+    path = queue._lease_path(task)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'task': task, 'worker': worker, 'attempts': 1}, f)
+    old = time.time() - 3600
+    os.utime(path, (old, old))
+    return path
+
+
+def _lease_owner(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)['worker']
+
+
+def test_fresh_lease_is_not_taken(queues):
+    a, b = queues('A'), queues('B')
+    assert a.claim('p1.jpg')
+    assert not b.claim('p1.jpg')
+    assert b.stats['skipped_busy'] == 1
+
+
+def test_expired_lease_is_taken_over(queues):
+    a = queues('A')
+    path = _leave_expired_lease(a, 'p1.jpg')
+    assert a.claim('p1.jpg')
+    assert a.stats['taken_over'] == 1
+    assert _lease_owner(path) == 'A'
+    with open(path, encoding='utf-8') as f:
+        assert json.load(f)['attempts'] == 2
+
+
+def test_concurrent_takeover_keeps_the_winners_fresh_lease(queues, monkeypatch):
+    a, b = queues('A'), queues('B')
+    path = _leave_expired_lease(a, 'p1.jpg')
+    real_rename = os.rename
+    interleaved = []
+
+    def rename_after_b(src, dst):
+        # A가 만료를 확인한 뒤 이름을 바꾸기 직전에 B가 먼저 넘겨받음
+        if not interleaved:
+            interleaved.append(True)
+            monkeypatch.setattr(work_queue.os, 'rename', real_rename)
+            assert b.claim('p1.jpg')
+        return real_rename(src, dst)
+
+    monkeypatch.setattr(work_queue.os, 'rename', rename_after_b)
+    assert not a.claim('p1.jpg')
+
+    assert interleaved
+    assert a.stats['skipped_busy'] == 1 and a.stats['taken_over'] == 0
+    assert b.stats['taken_over'] == 1
+    assert _lease_owner(path) == 'B'   # B의 새 임대가 제자리에 남음
+    assert not [name for name in os.listdir(a.lease_dir) if name.endswith('.stale')]
@@ -0,0 +1,105 @@
+# 파일 이름: tests/wiki_server.py
+"""
+테스트용 MediaWiki API 대역 서버입니다 (`action=query`의 여러 제목 조회만 흉내 냄).
+
+- 제목 정규화(첫 글자 대문자, 밑줄 → 공백)와 `normalized` 응답
+- `redirects` 응답 (이중 리다이렉트까지)
+- 한국어 `langlinks`와, `langlinks_per_response`를 주면 `continue`/`llcontinue`로 나눠 보내기
+- `malformed`이면 문서에 title이 없는 응답 (예상하지 못한 응답 형식)
+
+    with StandInWiki({'Great tit': '박새'}, {'Parus major': 'Great tit'}) as wiki:
+        resolver = WikiResolver(endpoint=wiki.url)
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+from urllib.parse import parse_qs, urlparse
+
+
+def normalize_title(title: str) -> str:
+    title = ' '.join(title.replace('_', ' ').split())
+    return title[:1].upper() + title[1:]
+
+
+class StandInWiki:
+    """`pages`: 문서 제목 → 한국어 문서 제목(없으면 None), `redirects`: 제목 → 대상 제목"""
+
+    def __init__(self, pages: Dict[str, str | None], redirects: Dict[str, str] | None = None,
+                 langlinks_per_response: int | None = None):
+        self.pages = pages
+        self.redirects = redirects or {}
+        self.langlinks_per_response = langlinks_per_response
+        self.malformed = False
+        self.requests: List[List[str]] = []   # 요청마다 받은 제목 목록 (이어받기 요청 포함)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}/w/api.php"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def respond(self, params: Dict[str, str]) -> Dict:
+        titles = params['titles'].split('|')
+        with self._lock:
+            self.requests.append(titles)
+        if self.malformed:
+            return {'query': {'pages': [{'pageid': 1}]}}
+
+        normalized, redirects, pages = [], [], {}
+        for title in titles:
+            name = normalize_title(title)
+            if name != title:
+                normalized.append({'from': title, 'to': name})
+            for _ in range(2):
+                if name in self.redirects:
+                    redirects.append({'from': name, 'to': self.redirects[name]})
+                    name = self.redirects[name]
+            if name in self.pages:
+                pages.setdefault(name, {'pageid': len(pages) + 1, 'ns': 0, 'title': name})
+            else:
+                pages.setdefault(name, {'ns': 0, 'title': name, 'missing': True})
+
+        # 한국어 langlinks: 한 응답에 일부만 넣고 나머지는 이어받기로
+        linked = [name for name in pages if self.pages.get(name)]
+        offset = int(params.get('llcontinue', 0))
+        limit = self.langlinks_per_response or len(linked)
+        for name in linked[offset:offset + limit]:
+            pages[name]['langlinks'] = [{'lang': 'ko', 'title': self.pages[name]}]
+        data = {'batchcomplete': True,
+                'query': {'normalized': normalized, 'redirects': redirects, 'pages': list(pages.values())}}
+        if offset + limit < len(linked):
+            data = {'continue': {'llcontinue': str(offset + limit), 'continue': '||'}, **data}
+            del data['batchcomplete']
+        return data
+
+    def _handler(self):
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                params = {key: values[0] for key, values in parse_qs(urlparse(self.path).query).items()}
+                body = json.dumps(stand_in.respond(params), ensure_ascii=False).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
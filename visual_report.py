@@ -6,14 +6,15 @@
 from __future__ import annotations
 
 import base64
-import io
+import contextlib
+import itertools
 import os
 import re
 import shutil
 from datetime import datetime
-from typing import Dict, List
+from typing import Dict, Iterable, Iterator, List, Tuple
 
-from PIL import Image
+from external_sort import ExternalSorter
 
 # ---------------------- 유틸리티 ----------------------
 
@@ -26,42 +27,47 @@ def sanitize_filename(name: str) -> str:
     return re.sub(r"\s+", "_", name)
 
 
-def image_to_base64(image_path: str, max_size: tuple = (800, 600)) -> str:
-    """이미지를 base64로 인코딩 (HTML 임베딩용)"""
+# HTML 썸네일 크기 옵션 → 미리 만들어진 썸네일 크기 (core_logic.THUMBNAIL_VARIANTS)
+HTML_THUMBNAIL_VARIANTS = {
+    'small': '150',
+    'medium': '250',
+    'large': '400'
+}
+
+
+def find_thumbnail(obs_data: Dict, thumbnail_dir: str, variant: str) -> str | None:
+    """관찰 기록에 대해 미리 만들어진 썸네일 경로 찾기 (없으면 None)
+
+    기록에 `obs['thumbnails']`(크기 → 경로)가 있으면 우선 사용하고, 없으면 썸네일 폴더에서
+    출력 폴더 구성(`rel_dir`)과 파일명 규칙(`core_logic.thumbnail_filename`)으로 찾습니다.
+    """
+    path = obs_data.get('thumbnails', {}).get(variant)
+    if path and os.path.exists(path):
+        return path
+    base_thumb_name = os.path.splitext(obs_data['new_filename'])[0]
+    suffix = '' if variant == '1024' else f"_{variant}"
+    for ext in ('jpg', 'webp'):
+        potential_path = os.path.join(thumbnail_dir, obs_data.get('rel_dir', ''), f"{base_thumb_name}_thumb{suffix}.{ext}")
+        if os.path.exists(potential_path):
+            return potential_path
+    return None
+
+
+def image_to_base64(image_path: str) -> str:
+    """미리 만들어진 썸네일 파일을 그대로 base64 data URI로 변환 (디코딩 없음)"""
+    ext = os.path.splitext(image_path)[1].lower()
+    mime_type = {'.webp': 'image/webp', '.png': 'image/png'}.get(ext, 'image/jpeg')
     try:
-        with Image.open(image_path) as img:
-            # EXIF orientation 처리
-            if hasattr(img, '_getexif'):
-                exif = img._getexif()
-                if exif and 274 in exif:
-                    orientation = exif[274]
-                    if orientation == 3:
-                        img = img.rotate(180, expand=True)
-                    elif orientation == 6:
-                        img = img.rotate(270, expand=True)
-                    elif orientation == 8:
-                        img = img.rotate(90, expand=True)
-            
-            # 리사이즈
-            img.thumbnail(max_size, Image.Resampling.LANCZOS)
-            
-            # base64 인코딩
-            buffer = io.BytesIO()
-            img_format = 'JPEG' if img.mode == 'RGB' else 'PNG'
-            img.save(buffer, format=img_format, quality=85, optimize=True)
-            img_data = buffer.getvalue()
-            
-            mime_type = f"image/{img_format.lower()}"
-            return f"data:{mime_type};base64,{base64.b64encode(img_data).decode()}"
+        with open(image_path, 'rb') as f:
+            return f"data:{mime_type};base64,{base64.b64encode(f.read()).decode()}"
     except Exception as e:
         print(f"이미지 base64 변환 실패 ({image_path}): {e}")
         return ""
 
 
-def get_observation_time_info(observations: List[Dict]) -> Dict[str, str]:
-    """관찰 시간 정보 계산 (여러 날 지원)"""
-    dates_with_time = [o['datetime'] for o in observations if o['datetime']]
-    if not dates_with_time:
+def _format_time_info(start_time: datetime | None, end_time: datetime | None) -> Dict[str, str]:
+    """관찰 시작/종료 시각으로 표시용 시간 정보 생성"""
+    if start_time is None or end_time is None:
         return {
             'date': '관찰 시간 정보 없음',
             'start_time': '',
@@ -70,9 +76,6 @@ def get_observation_time_info(observations: List[Dict]) -> Dict[str, str]:
             'date_range': ''
         }
     
-    start_time = min(dates_with_time)
-    end_time = max(dates_with_time)
-    
     # 같은 날인지 확인
     if start_time.date() == end_time.date():
         # 하루 관찰
@@ -100,10 +103,97 @@ def get_observation_time_info(observations: List[Dict]) -> Dict[str, str]:
             'date_range': f"{start_date_str} ~ {end_date_str}"
         }
 
+
+def get_observation_time_info(observations: List[Dict]) -> Dict[str, str]:
+    """관찰 시간 정보 계산 (여러 날 지원)"""
+    dates_with_time = [o['datetime'] for o in observations if o['datetime']]
+    if not dates_with_time:
+        return _format_time_info(None, None)
+    return _format_time_info(min(dates_with_time), max(dates_with_time))
+
+
+def aggregate_observations(observations: Iterable[Dict], run_size: int = 5000, tmp_dir: str | None = None) -> Dict:
+    """리포트에 필요한 집계를 한 번의 순회로 계산
+
+    종별 요약(첫 기록, 건수, 날짜 범위와 여러 날 여부), 과/목 수, 전체 시간 범위를 구하고,
+    기록은 종의 분류학적 순서로 다시 정렬하는 외부 정렬기(`'grouped'`)에 흘려 넣습니다.
+    메모리에는 종마다 요약 하나만 남으며, 기록은 `iter_species`로 종별로 차례로 읽습니다.
+    다 쓰면 `summary['grouped'].close()`로 임시 파일을 지웁니다.
+    """
+    groups: Dict[str, Dict] = {}
+    families = set()
+    orders = set()
+    start_time = end_time = None
+    count = 0
+    # (종 정렬 키, 종 번호)로 정렬 (같은 종 안에서는 넣은 순서 유지, 입력이 시간순이면 관찰 시각 순)
+    grouped = ExternalSorter(lambda record: record[0], run_size, tmp_dir)
+    
+    for o in observations:
+        count += 1
+        taxonomy = o['taxonomy']
+        families.add(taxonomy.get('family', 'N/A'))
+        orders.add(taxonomy.get('order', 'N/A'))
+        
+        group = groups.get(o['scientific_name'])
+        if group is None:
+            group = groups[o['scientific_name']] = {
+                'sci_name': o['scientific_name'],
+                'first': o,
+                'count': 0,
+                'first_date': None,
+                'last_date': None,
+                'sort_key': (taxonomy.get('order', 'zzz'), taxonomy.get('family', 'zzz'), len(groups)),
+            }
+        group['count'] += 1
+        grouped.add((group['sort_key'], o))
+        
+        dt = o['datetime']
+        if dt:
+            d = dt.date()
+            if group['first_date'] is None or d < group['first_date']:
+                group['first_date'] = d
+            if group['last_date'] is None or d > group['last_date']:
+                group['last_date'] = d
+            if start_time is None or dt < start_time:
+                start_time = dt
+            if end_time is None or dt > end_time:
+                end_time = dt
+    
+    # 분류학적 순서로 정렬 (같은 분류 안에서는 처음 관찰된 순서)
+    species = sorted(groups.values(), key=lambda g: g['sort_key'])
+    for group in species:
+        group['multi_day'] = group['first_date'] is not None and group['first_date'] != group['last_date']
+    
+    return {
+        'species': species,
+        'grouped': grouped,
+        'observation_count': count,
+        'species_count': len(groups),
+        'family_count': len(families),
+        'order_count': len(orders),
+        'time_info': _format_time_info(start_time, end_time),
+    }
+
+
+def iter_species(summary: Dict) -> Iterator[Tuple[Dict, Iterator[Dict]]]:
+    """(종 요약, 그 종의 기록 반복자)를 분류학적 순서로 내보냄 (반복자는 차례로 끝까지 읽어야 함)"""
+    records = iter(summary['grouped'])
+    for group in summary['species']:
+        yield group, (record[1] for record in itertools.islice(records, group['count']))
+
+
+def format_observation_time(obs_data: Dict, multi_day: bool) -> str:
+    """관찰 시각 문자열 (종의 관찰이 여러 날에 걸쳐 있으면 날짜도 표시)"""
+    if not obs_data['datetime']:
+        return '시간 정보 없음'
+    if multi_day:
+        return obs_data['datetime'].strftime('%m/%d %H:%M:%S')
+    return obs_data['datetime'].strftime('%H:%M:%S')
+
 # --------------------- HTML 리포트 생성 ---------------------
 
-def create_html_report(log_dir: str, observations: List[Dict], location: str, thumbnail_dir: str, thumbnail_size: str, log):
-    """HTML 형식의 시각적 리포트 생성"""
+def create_html_report(log_dir: str, observations: Iterable[Dict], location: str, thumbnail_dir: str, thumbnail_size: str, log):
+    """HTML 형식의 시각적 리포트 생성 (종별 기록을 읽는 대로 파일에 바로 씀)"""
     if not observations:
         log("- HTML 리포트를 생성할 기록이 없습니다.")
         return
@@ -117,25 +207,40 @@ def create_html_report(log_dir: str, observations: List[Dict], location: str, th
         'large': (400, 400)
     }
     thumb_size_px = thumb_sizes.get(thumbnail_size, (250, 250))
+    thumb_variant = HTML_THUMBNAIL_VARIANTS.get(thumbnail_size, '250')
     
-    # 관찰 시간 정보
-    time_info = get_observation_time_info(observations)
-    
-    # 종별로 그룹화
-    species_groups = {}
-    for o in observations:
-        key = o['scientific_name']
-        if key not in species_groups:
-            species_groups[key] = []
-        species_groups[key].append(o)
-    
-    # 분류학적 순서로 정렬
-    sorted_species = sorted(species_groups.items(), 
-                          key=lambda x: (x[1][0]['taxonomy'].get('order', 'zzz'),
-                                       x[1][0]['taxonomy'].get('family', 'zzz')))
+    # 종별 그룹, 시간 정보, 요약 수치를 한 번에 집계
+    summary = aggregate_observations(observations)
+    try:
+        _write_html_report(log_dir, summary, location, thumbnail_dir, thumb_size_px, thumb_variant, log)
+    finally:
+        summary['grouped'].close()
+
+
+@contextlib.contextmanager
+def _removed_on_error(path: str):
+    """블록에서 예외가 나면 쓰다 만 파일을 지우고 예외를 그대로 다시 발생"""
+    try:
+        yield
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(path)
+        raise
+
+
+def _write_html_report(log_dir: str, summary: Dict, location: str, thumbnail_dir: str, thumb_size_px, thumb_variant: str, log):
+    time_info = summary['time_info']
+    html_path = os.path.join(log_dir, 'visual_report.html')
+    tmp_path = html_path + '.tmp'
+    try:
+        f = open(tmp_path, 'w', encoding='utf-8')
+    except Exception as e:
+        log(f"  - HTML 리포트 생성 실패: {e}")
+        return
     
-    # HTML 내용 생성
-    html_content = f"""<!DOCTYPE html>
+    # HTML 내용을 만드는 대로 기록 (썸네일은 한 번에 하나만 메모리에, 실패하면 임시 파일 삭제)
+    with _removed_on_error(tmp_path), f:
+        f.write(f"""<!DOCTYPE html>
 <html lang="ko">
 <head>
     <meta charset="UTF-8">
@@ -275,34 +380,59 @@ def create_html_report(log_dir: str, observations: List[Dict], location: str, th
             <h2>📊 관찰 요약</h2>
             <div class="summary-grid">
                 <div class="summary-item">
-                    <div class="summary-number">{len(observations)}</div>
+                    <div class="summary-number">{summary['observation_count']}</div>
                     <div>관찰 건수</div>
                 </div>
                 <div class="summary-item">
-                    <div class="summary-number">{len(species_groups)}</div>
+                    <div class="summary-number">{summary['species_count']}</div>
                     <div>관찰 종수</div>
                 </div>
                 <div class="summary-item">
-                    <div class="summary-number">{len(set(o['taxonomy'].get('family', 'N/A') for o in observations))}</div>
+                    <div class="summary-number">{summary['family_count']}</div>
                     <div>관찰 과수</div>
                 </div>
                 <div class="summary-item">
-                    <div class="summary-number">{len(set(o['taxonomy'].get('order', 'N/A') for o in observations))}</div>
+                    <div class="summary-number">{summary['order_count']}</div>
                     <div>관찰 목수</div>
                 </div>
             </div>
         </div>
-"""
+""")
     
-    # 각 종별 섹션 생성
-    for sci_name, species_observations in sorted_species:
-        first_obs = species_observations[0]
-        korean_name = first_obs['korean_name']
-        common_name = first_obs['common_name']
-        order = first_obs['taxonomy'].get('order', 'N/A')
-        family = first_obs['taxonomy'].get('family', 'N/A')
+        # 각 종별 섹션 생성
+        for group, group_observations in iter_species(summary):
+            _write_html_species(f, group, group_observations, thumbnail_dir, thumb_variant)
         
-        html_content += f"""
+        f.write("""
+        <div class="footer">
+            <p>본 보고서는 AI 조류 사진 자동 분류 프로그램 v2.1로 생성되었습니다.</p>
+            <p>Powered by Google Gemini + Wikipedia</p>
+        </div>
+    </div>
+</body>
+</html>
+""")
+    
+    # HTML 파일 저장 (다 쓴 뒤에 바꿔치기하므로 중간에 실패해도 이전 리포트는 남음)
+    try:
+        os.replace(tmp_path, html_path)
+        log(f"  - HTML 리포트 생성 완료: {os.path.basename(html_path)}")
+    except Exception as e:
+        with contextlib.suppress(OSError):
+            os.remove(tmp_path)
+        log(f"  - HTML 리포트 생성 실패: {e}")
+
+
+def _write_html_species(f, group: Dict, group_observations: Iterable[Dict], thumbnail_dir: str, thumb_variant: str):
+    """종 하나의 섹션을 HTML 파일에 기록"""
+    sci_name = group['sci_name']
+    first_obs = group['first']
+    korean_name = first_obs['korean_name']
+    common_name = first_obs['common_name']
+    order = first_obs['taxonomy'].get('order', 'N/A')
+    family = first_obs['taxonomy'].get('family', 'N/A')
+    
+    f.write(f"""
         <div class="species-section">
             <div class="species-header">
                 <h2 class="species-title">{korean_name}</h2>
@@ -313,33 +443,17 @@ def create_html_report(log_dir: str, observations: List[Dict], location: str, th
             </div>
             <div class="species-content">
                 <div class="observation-grid">
-"""
+""")
+    
+    for obs_data in group_observations:
+        # 날짜 정보가 여러 날에 걸쳐 있으면 날짜도 함께 표시
+        time_str = format_observation_time(obs_data, group['multi_day'])
         
-        for obs_data in species_observations:
-            # 날짜 정보가 여러 날에 걸쳐 있으면 날짜도 함께 표시
-            if obs_data['datetime']:
-                dates_in_species = [o['datetime'] for o in species_observations if o['datetime']]
-                if dates_in_species and min(dates_in_species).date() != max(dates_in_species).date():
-                    time_str = obs_data['datetime'].strftime('%m/%d %H:%M:%S')
-                else:
-                    time_str = obs_data['datetime'].strftime('%H:%M:%S')
-            else:
-                time_str = '시간 정보 없음'
-            
-            # 각 관찰 기록의 고유한 썸네일 이미지를 찾습니다.
-            thumb_img_path = None
-            base_thumb_name = os.path.splitext(obs_data['new_filename'])[0]
-            thumb_filename = f"{base_thumb_name}_thumb.jpg"
-            potential_path = os.path.join(thumbnail_dir, thumb_filename)
-            if os.path.exists(potential_path):
-                thumb_img_path = potential_path
-            
-            # 이미지를 base64로 인코딩
-            img_data = ""
-            if thumb_img_path:
-                img_data = image_to_base64(thumb_img_path, thumb_size_px)
-            
-            html_content += f"""
+        # 각 관찰 기록의 고유한 썸네일 이미지를 찾아 그대로 임베딩합니다.
+        thumb_img_path = find_thumbnail(obs_data, thumbnail_dir, thumb_variant)
+        img_data = image_to_base64(thumb_img_path) if thumb_img_path else ""
+        
+        f.write(f"""
                     <div class="observation-card">
                         {f'<img src="{img_data}" alt="{korean_name}" class="thumb-image">' if img_data else '<div class="thumb-image" style="display:flex;align-items:center;justify-content:center;color:#999;">이미지 없음</div>'}
                         <div class="observation-info">
@@ -354,38 +468,50 @@ def create_html_report(log_dir: str, observations: List[Dict], location: str, th
                             </div>
                         </div>
                     </div>
-"""
-        
-        html_content += """
+""")
+    
+    f.write("""
                 </div>
             </div>
         </div>
-"""
-    
-    html_content += """
-        <div class="footer">
-            <p>본 보고서는 AI 조류 사진 자동 분류 프로그램 v2.1로 생성되었습니다.</p>
-            <p>Powered by Google Gemini + Wikipedia</p>
-        </div>
-    </div>
-</body>
-</html>
-"""
-    
-    # HTML 파일 저장
-    html_path = os.path.join(log_dir, 'visual_report.html')
-    try:
-        with open(html_path, 'w', encoding='utf-8') as f:
-            f.write(html_content)
-        log(f"  - HTML 리포트 생성 완료: {os.path.basename(html_path)}")
-    except Exception as e:
-        log(f"  - HTML 리포트 생성 실패: {e}")
+""")
 
 
 # --------------------- Word 리포트 생성 ---------------------
 
-def create_word_report(log_dir: str, observations: List[Dict], location: str, thumbnail_dir: str, log):
-    """Word 형식의 시각적 리포트 생성"""
+# Word 문서 한글 폰트 (첫 번째 후보를 스타일에 지정, 나머지는 Word의 대체 글꼴에 맡김)
+WORD_FONT_CANDIDATES = ["맑은 고딕", "Apple SD Gothic Neo", "Noto Sans CJK KR", "Arial Unicode MS", "DejaVu Sans"]
+WORD_FONT_STYLES = ('Normal', 'Title', 'Heading 1', 'Heading 2', 'Table Grid')
+
+# 썸네일 셀 표시 크기 (이미지는 core_logic이 150dpi 기준 가로 225px로 미리 만든 'word' 썸네일)
+WORD_IMAGE_WIDTH_INCH = 1.5
+
+# 문서 하나에 넣을 최대 관찰 건수 (초과하면 여러 문서로 분할)
+WORD_MAX_OBSERVATIONS_PER_DOC = 1000
+
+
+def _apply_korean_font_styles(doc, qn, font_name: str = WORD_FONT_CANDIDATES[0]):
+    """문서 스타일에 한글 폰트를 한 번만 지정 (run마다 폰트를 설정하지 않음)"""
+    for style_name in WORD_FONT_STYLES:
+        try:
+            style = doc.styles[style_name]
+        except KeyError:
+            continue
+        style.font.name = font_name
+        rfonts = style.element.get_or_add_rPr().get_or_add_rFonts()
+        rfonts.set(qn('w:eastAsia'), font_name)
+        # 테마 글꼴 지정이 남아 있으면 ascii/eastAsia 지정보다 우선하므로 제거
+        for attr in ('w:asciiTheme', 'w:hAnsiTheme', 'w:eastAsiaTheme', 'w:cstheme'):
+            rfonts.attrib.pop(qn(attr), None)
+
+
+def create_word_report(log_dir: str, observations: Iterable[Dict], location: str, thumbnail_dir: str, log,
+                       max_observations_per_doc: int = WORD_MAX_OBSERVATIONS_PER_DOC):
+    """Word 형식의 시각적 리포트 생성 (관찰 건수가 많으면 여러 문서로 분할)
+
+    종별 기록을 읽는 대로 문서에 넣고, 문서 하나가 상한에 차면 저장한 뒤 다음 문서를
+    시작하므로 메모리에는 문서 하나만 있습니다. 큰 종은 여러 문서에 걸쳐 나뉩니다.
+    """
     try:
         from docx import Document
         from docx.shared import Inches
@@ -402,88 +528,77 @@ def create_word_report(log_dir: str, observations: List[Dict], location: str, th
     
     os.makedirs(log_dir, exist_ok=True)
     
-    # 새 문서 생성
-    doc = Document()
-    
-    # 한글 폰트 설정 함수 (폴백 지원)
-    def set_korean_font(run, font_name=None):
-        """한글 텍스트에 적절한 폰트 설정 (폰트 폴백 지원)"""
-        font_candidates = [
-            "맑은 고딕", "Apple SD Gothic Neo", "Noto Sans CJK KR",
-            "Arial Unicode MS", "DejaVu Sans"
-        ]
-        if font_name:
-            font_candidates.insert(0, font_name)
-        for font in font_candidates:
+    # 이전 실행이 더 많이 나눠 만든 분할 문서가 새 문서와 섞이지 않도록 먼저 삭제
+    for name in os.listdir(log_dir):
+        if re.fullmatch(r'visual_report_part\d+\.docx', name):
             try:
-                run.font.name = font
-                run._element.rPr.rFonts.set(qn('w:eastAsia'), font)
-                break
-            except:
-                continue
-    
-    # 관찰 시간 정보
-    time_info = get_observation_time_info(observations)
-    
-    # 문서 제목
-    title = doc.add_heading('🐦 조류 관찰 보고서', 0)
-    title.alignment = WD_ALIGN_PARAGRAPH.CENTER
-    for run in title.runs: set_korean_font(run)
-    
-    # 기본 정보
-    info_para = doc.add_paragraph()
-    run1 = info_para.add_run(f"관찰일: {time_info['date']}\n"); run1.bold = True; set_korean_font(run1)
-    run2 = info_para.add_run(f"관찰시간: {time_info['time_range']}\n"); run2.bold = True; set_korean_font(run2)
-    run3 = info_para.add_run(f"관찰 장소: {location}"); run3.bold = True; set_korean_font(run3)
-    info_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
-    
-    # 요약 테이블
-    summary_heading = doc.add_heading('📊 관찰 요약', level=1)
-    for run in summary_heading.runs: set_korean_font(run)
-    
-    summary_table = doc.add_table(rows=2, cols=4); summary_table.alignment = WD_TABLE_ALIGNMENT.CENTER
-    headers = ['관찰 건수', '관찰 종수', '관찰 과수', '관찰 목수']
-    values = [
-        str(len(observations)),
-        str(len(set(o['scientific_name'] for o in observations))),
-        str(len(set(o['taxonomy'].get('family', 'N/A') for o in observations))),
-        str(len(set(o['taxonomy'].get('order', 'N/A') for o in observations)))
-    ]
+                os.remove(os.path.join(log_dir, name))
+            except OSError as e:
+                log(f"  - 이전 분할 문서 삭제 실패 ({name}): {e}")
     
-    for i, header in enumerate(headers):
-        cell_h = summary_table.cell(0, i); cell_h.text = header
-        for p in cell_h.paragraphs:
-            for r in p.runs: r.bold = True; set_korean_font(r)
-            p.alignment = WD_ALIGN_PARAGRAPH.CENTER
-        cell_v = summary_table.cell(1, i); cell_v.text = values[i]
-        for p in cell_v.paragraphs:
-            for r in p.runs: set_korean_font(r)
-            p.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    # 종별 그룹, 시간 정보, 요약 수치를 한 번에 집계
+    summary = aggregate_observations(observations)
+    time_info = summary['time_info']
+    max_observations_per_doc = max(1, max_observations_per_doc)
+    # 문서마다 상한까지 채우므로 문서 수는 관찰 건수로 정해짐
+    part_count = max(1, -(-summary['observation_count'] // max_observations_per_doc))
     
-    # 종별 섹션
-    species_groups = {}
-    for o in observations:
-        key = o['scientific_name']; species_groups.setdefault(key, []).append(o)
-    
-    sorted_species = sorted(species_groups.items(), key=lambda x: (x[1][0]['taxonomy'].get('order', 'zzz'), x[1][0]['taxonomy'].get('family', 'zzz')))
-    
-    record_heading = doc.add_heading('🔍 종별 관찰 기록', level=1)
-    for run in record_heading.runs: set_korean_font(run)
+    def new_document(part_no):
+        # 새 문서 생성 (폰트는 스타일로 한 번만 지정)
+        doc = Document()
+        _apply_korean_font_styles(doc, qn)
+        
+        # 문서 제목
+        title_text = '🐦 조류 관찰 보고서'
+        if part_count > 1:
+            title_text += f" ({part_no}/{part_count})"
+        title = doc.add_heading(title_text, 0)
+        title.alignment = WD_ALIGN_PARAGRAPH.CENTER
+        
+        # 기본 정보
+        info_para = doc.add_paragraph()
+        info_para.add_run(f"관찰일: {time_info['date']}\n").bold = True
+        info_para.add_run(f"관찰시간: {time_info['time_range']}\n").bold = True
+        info_para.add_run(f"관찰 장소: {location}").bold = True
+        info_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
+        
+        # 요약 테이블 (분할된 경우에도 전체 세션 기준)
+        doc.add_heading('📊 관찰 요약', level=1)
+        
+        summary_table = doc.add_table(rows=2, cols=4); summary_table.alignment = WD_TABLE_ALIGNMENT.CENTER
+        headers = ['관찰 건수', '관찰 종수', '관찰 과수', '관찰 목수']
+        values = [
+            str(summary['observation_count']),
+            str(summary['species_count']),
+            str(summary['family_count']),
+            str(summary['order_count'])
+        ]
+        
+        for i, header in enumerate(headers):
+            cell_h = summary_table.cell(0, i); cell_h.text = header
+            for p in cell_h.paragraphs:
+                for r in p.runs: r.bold = True
+                p.alignment = WD_ALIGN_PARAGRAPH.CENTER
+            cell_v = summary_table.cell(1, i); cell_v.text = values[i]
+            for p in cell_v.paragraphs:
+                p.alignment = WD_ALIGN_PARAGRAPH.CENTER
+        
+        # 종별 섹션
+        doc.add_heading('🔍 종별 관찰 기록', level=1)
+        return doc
     
-    for sci_name, species_observations in sorted_species:
-        first_obs = species_observations[0]
-        korean_name = first_obs['korean_name']
-        common_name = first_obs['common_name']
+    def add_species_table(doc, group):
+        sci_name = group['sci_name']
+        first_obs = group['first']
         order = first_obs['taxonomy'].get('order', 'N/A')
         family = first_obs['taxonomy'].get('family', 'N/A')
         
-        species_title = doc.add_heading(f"{korean_name}", level=2)
-        for run in species_title.runs: set_korean_font(run)
+        doc.add_heading(f"{first_obs['korean_name']}", level=2)
         
         species_info = doc.add_paragraph()
-        run1 = species_info.add_run(f"{common_name} | "); run1.italic = True; set_korean_font(run1)
-        run2 = species_info.add_run(f"{sci_name}\n"); run2.italic = True
-        run3 = species_info.add_run(f"목: {order} | 과: {family}"); set_korean_font(run3)
+        species_info.add_run(f"{first_obs['common_name']} | ").italic = True
+        species_info.add_run(f"{sci_name}\n").italic = True
+        species_info.add_run(f"목: {order} | 과: {family}")
         
         table = doc.add_table(rows=1, cols=3); table.style = 'Table Grid'
         header_cells = table.rows[0].cells
@@ -491,64 +606,82 @@ def create_word_report(log_dir: str, observations: List[Dict], location: str, th
         for i, text in enumerate(header_texts):
             cell = header_cells[i]; cell.text = text
             for p in cell.paragraphs:
-                for r in p.runs: r.bold = True; set_korean_font(r)
+                for r in p.runs: r.bold = True
                 p.alignment = WD_ALIGN_PARAGRAPH.CENTER
+        return table
+    
+    def add_observation_row(table, group, obs_data):
+        order = group['first']['taxonomy'].get('order', 'N/A')
+        family = group['first']['taxonomy'].get('family', 'N/A')
+        row_cells = table.add_row().cells
         
-        for obs_data in species_observations:
-            row_cells = table.add_row().cells
-            
-            # 각 관찰 기록의 고유한 썸네일 이미지를 찾습니다.
-            thumb_img_path = None
-            base_thumb_name = os.path.splitext(obs_data['new_filename'])[0]
-            thumb_filename = f"{base_thumb_name}_thumb.jpg"
-            potential_path = os.path.join(thumbnail_dir, thumb_filename)
-            if os.path.exists(potential_path):
-                thumb_img_path = potential_path
-            
-            if thumb_img_path:
-                try:
-                    p = row_cells[0].paragraphs[0]
-                    r = p.runs[0] if p.runs else p.add_run()
-                    r.add_picture(thumb_img_path, width=Inches(1.5))
-                    p.alignment = WD_ALIGN_PARAGRAPH.CENTER
-                except Exception as e:
-                    row_cells[0].text = "이미지 로드 실패"; log(f"  - Word 이미지 삽입 실패: {e}")
-            else:
-                row_cells[0].text = "이미지 없음"
-            
-            # 모든 텍스트 셀에 폰트 적용
-            for p in row_cells[0].paragraphs:
-                for r in p.runs: set_korean_font(r)
-
-            if obs_data['datetime']:
-                dates_in_species = [o['datetime'] for o in species_observations if o['datetime']]
-                if dates_in_species and min(dates_in_species).date() != max(dates_in_species).date():
-                    time_str = obs_data['datetime'].strftime('%m/%d %H:%M:%S')
-                else:
-                    time_str = obs_data['datetime'].strftime('%H:%M:%S')
-            else:
-                time_str = '시간 정보 없음'
-            
-            row_cells[1].text = time_str;
-            for p in row_cells[1].paragraphs: p.alignment = WD_ALIGN_PARAGRAPH.CENTER; [set_korean_font(r) for r in p.runs]
-            
-            row_cells[2].text = f"목: {order}\n과: {family}"
-            for p in row_cells[2].paragraphs: [set_korean_font(r) for r in p.runs]
-
-        doc.add_paragraph()
+        # 각 관찰 기록의 Word용 썸네일을 그대로 삽입합니다.
+        thumb_img_path = find_thumbnail(obs_data, thumbnail_dir, 'word')
+        
+        if thumb_img_path:
+            try:
+                p = row_cells[0].paragraphs[0]
+                r = p.runs[0] if p.runs else p.add_run()
+                r.add_picture(thumb_img_path, width=Inches(WORD_IMAGE_WIDTH_INCH))
+                p.alignment = WD_ALIGN_PARAGRAPH.CENTER
+            except Exception as e:
+                row_cells[0].text = "이미지 로드 실패"; log(f"  - Word 이미지 삽입 실패: {e}")
+        else:
+            row_cells[0].text = "이미지 없음"
+        
+        time_str = format_observation_time(obs_data, group['multi_day'])
+        
+        row_cells[1].text = time_str
+        for p in row_cells[1].paragraphs: p.alignment = WD_ALIGN_PARAGRAPH.CENTER
+        
+        row_cells[2].text = f"목: {order}\n과: {family}"
     
-    word_path = os.path.join(log_dir, 'visual_report.docx')
+    def save_document(doc, part_no):
+        word_filename = 'visual_report.docx' if part_no == 1 else f'visual_report_part{part_no}.docx'
+        word_path = os.path.join(log_dir, word_filename)
+        try:
+            doc.save(word_path)
+            log(f"  - Word 리포트 생성 완료: {os.path.basename(word_path)}")
+        except Exception as e:
+            log(f"  - Word 리포트 생성 실패: {e}")
+    
+    doc = None
+    part_no = 0
+    filled = 0
     try:
-        doc.save(word_path)
-        log(f"  - Word 리포트 생성 완료: {os.path.basename(word_path)}")
-    except Exception as e:
-        log(f"  - Word 리포트 생성 실패: {e}")
+        for group, group_observations in iter_species(summary):
+            table = None
+            for obs_data in group_observations:
+                if doc is None or filled >= max_observations_per_doc:
+                    # 문서가 상한에 차면 저장하고 다음 문서 시작 (종 제목과 표는 새 문서에 다시)
+                    if doc is not None:
+                        if table is not None:
+                            doc.add_paragraph()
+                        save_document(doc, part_no)
+                    part_no += 1
+                    doc = new_document(part_no)
+                    filled = 0
+                    table = None
+                if table is None:
+                    table = add_species_table(doc, group)
+                add_observation_row(table, group, obs_data)
+                filled += 1
+            if table is not None:
+                doc.add_paragraph()
+        if doc is not None:
+            save_document(doc, part_no)
+    finally:
+        summary['grouped'].close()
 
 
 # --------------------- 메인 인터페이스 ---------------------
 
 def create_visual_reports(observations: List[Dict], out_dir: str, src_dir: str, report_options: Dict, location: str, log):
-    """시각적 리포트 생성 메인 함수"""
+    """시각적 리포트 생성 메인 함수
+
+    `observations`는 시간순으로 정렬된 기록이며 리스트 대신 여러 번 순회할 수 있는
+    정렬 스트림(`external_sort.ExternalSorter`)을 받아도 됩니다.
+    """
     log_dir = os.path.join(out_dir, '탐조기록')
     thumbnail_dir = os.path.join(out_dir, 'thumbnail_images')
     
@@ -561,4 +694,5 @@ def create_visual_reports(observations: List[Dict], out_dir: str, src_dir: str,
     
     if report_format in ['docx', 'both']:
         log("- Word 시각적 리포트 생성 중...")
-        create_word_report(log_dir, observations, location, thumbnail_dir, log)
\ No newline at end of file
+        max_per_doc = report_options.get('docx_max_observations', WORD_MAX_OBSERVATIONS_PER_DOC)
+        create_word_report(log_dir, observations, location, thumbnail_dir, log, max_per_doc)
\ No newline at end of file
@@ -0,0 +1,155 @@
+# 파일 이름: wiki_batch.py
+"""
+여러 이름을 MediaWiki API 한 번의 요청으로 확인하는 Wikipedia 조회기입니다.
+
+`wikipediaapi`로 사진마다 페이지 조회 → (학명 재조회) → langlinks 조회를 하던 것을
+`action=query`의 여러 제목 조회(최대 50개)로 바꾸고, 리다이렉트와 한국어 langlinks를
+같은 요청에서 함께 받습니다. 짧은 대기 창(window) 동안 여러 스레드에서 들어온 이름을
+모아 한 번에 보내며, 결과는 실행 동안 캐시하므로 요청 수가 사진 수가 아니라
+새로 나온 종 이름 수에 비례합니다. 연결은 keep-alive 세션으로 재사용합니다.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Dict, Iterable, List
+
+import requests
+from requests.adapters import HTTPAdapter
+
+WIKI_ENDPOINT = 'https://en.wikipedia.org/w/api.php'
+USER_AGENT = 'BirdPhotoOrganizer/2.1'
+MAX_TITLES = 50  # MediaWiki 한 요청당 제목 수 제한 (일반 사용자)
+
+
+class WikiResolver:
+    """이름 → {'korean_name', 'common_name'} (없으면 None) 일괄 조회기
+
+    한국어 문서가 없으면 korean_name은 `*영문 제목` 형식으로, 기존 `wiki_lookup`과 같습니다.
+    """
+
+    def __init__(self, endpoint: str = WIKI_ENDPOINT, lang: str = 'ko', window: float = 0.05,
+                 timeout: float = 10.0, session: requests.Session | None = None):
+        self.endpoint = endpoint
+        self.lang = lang
+        self.window = window
+        self.timeout = timeout
+        if session is None:
+            session = requests.Session()
+            session.mount('https://', HTTPAdapter(pool_connections=2, pool_maxsize=8))
+            session.mount('http://', HTTPAdapter(pool_connections=2, pool_maxsize=8))
+            session.headers['User-Agent'] = USER_AGENT
+        self.session = session
+
+        self._cache: Dict[str, Dict | None] = {}
+        self._pending: Dict[str, threading.Event] = {}
+        self._queue: List[str] = []
+        self._flushing = False
+        self._lock = threading.Lock()
+        self.stats = {'round_trips': 0, 'titles': 0, 'cache_hits': 0, 'errors': 0}
+
+    def resolve(self, names: Iterable[str | None]) -> Dict[str, Dict | None]:
+        """이름들을 조회 (캐시에 없으면 대기 창 동안 모아 일괄 요청)"""
+        names = [n for n in dict.fromkeys(names) if n]
+        waits = []
+        with self._lock:
+            for name in names:
+                if name in self._cache:
+                    self.stats['cache_hits'] += 1
+                    continue
+                event = self._pending.get(name)
+                if event is None:
+                    event = self._pending[name] = threading.Event()
+                    self._queue.append(name)
+                waits.append(event)
+            lead = bool(self._queue) and not self._flushing
+            if lead:
+                self._flushing = True
+
+        if lead:
+            # 같은 창 안에 다른 스레드가 요청한 이름도 함께 보냄
+            time.sleep(self.window)
+            self._flush()
+        for event in waits:
+            event.wait(self.timeout * 2 + self.window)
+        with self._lock:
+            return {name: self._cache.get(name) for name in names}
+
+    def _flush(self):
+        """대기 중인 이름을 MAX_TITLES개씩 조회
+
+        조회 중 어떤 오류가 나도 그 이름들은 결과 없음(None)으로 끝내고 계속 진행하며,
+        실패한 이름은 캐시하지 않으므로 다음에 다시 조회합니다. 그 밖의 예상하지 못한
+        오류에도 기다리는 스레드를 모두 깨우고 `_flushing`을 되돌려 이후 조회가 막히지 않게 합니다.
+        """
+        try:
+            while True:
+                with self._lock:
+                    batch = self._queue[:MAX_TITLES]
+                    del self._queue[:MAX_TITLES]
+                    if not batch:
+                        self._flushing = False
+                        return
+                try:
+                    results = self.query(batch)
+                except Exception:  # 네트워크 오류, 예상하지 못한 응답 형식 등
+                    results = None
+                with self._lock:
+                    if results is None:
+                        self.stats['errors'] += 1
+                    else:
+                        self._cache.update(results)
+                    for name in batch:
+                        self._pending.pop(name).set()
+        except BaseException:
+            with self._lock:
+                self._queue.clear()
+                for event in self._pending.values():
+                    event.set()
+                self._pending.clear()
+                self._flushing = False
+            raise
+
+    def query(self, titles: List[str]) -> Dict[str, Dict | None]:
+        """제목 목록을 한 번(이어받기가 있으면 몇 번)의 요청으로 조회"""
+        params = {
+            'action': 'query', 'format': 'json', 'formatversion': 2,
+            'redirects': 1, 'prop': 'langlinks', 'lllang': self.lang, 'lllimit': 'max',
+            'titles': '|'.join(titles),
+        }
+        aliases: Dict[str, str] = {}
+        pages: Dict[str, Dict] = {}
+        cont: Dict = {}
+        while True:
+            response = self.session.get(self.endpoint, params={**params, **cont}, timeout=self.timeout)
+            response.raise_for_status()
+            data = response.json()
+            with self._lock:
+                self.stats['round_trips'] += 1
+            query = data.get('query', {})
+            for item in query.get('normalized', []) + query.get('redirects', []):
+                aliases[item['from']] = item['to']
+            for page in query.get('pages', []):
+                merged = pages.setdefault(page['title'], page)
+                if merged is not page:
+                    merged.setdefault('langlinks', []).extend(page.get('langlinks', []))
+            if 'continue' not in data:
+                break
+            cont = data['continue']
+
+        results = {}
+        for title in titles:
+            name = title
+            for _ in range(3):  # 정규화 → 리다이렉트 (이중 리다이렉트까지)
+                name = aliases.get(name, name)
+            page = pages.get(name)
+            if page is None or page.get('missing') or page.get('invalid'):
+                results[title] = None
+                continue
+            links = page.get('langlinks') or []
+            korean = links[0]['title'] if links else f"*{page['title']}"
+            results[title] = {'korean_name': korean, 'common_name': page['title']}
+        with self._lock:
+            self.stats['titles'] += len(titles)
+        return results
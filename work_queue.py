@@ -0,0 +1,275 @@
+# 파일 이름: work_queue.py
+"""
+여러 컴퓨터가 같은 NAS 폴더를 나눠 처리하기 위한 잠금 파일(lease) 작업 대기열입니다.
+
+SQLite는 네트워크 파일 시스템(SMB/NFS)에서 잠금이 믿을 만하지 않으므로, 원자적으로
+동작하는 파일 생성(O_CREAT | O_EXCL)과 이름 바꾸기만으로 조정합니다.
+대기열 폴더(기본: 출력 폴더의 `.work_queue`) 구성:
+
+- `leases/<키>`: 처리 중인 사진의 임대. 작업자가 주기적으로 수정 시각을 갱신하며,
+  `lease_seconds` 동안 갱신이 없으면(작업자 중단) 다른 작업자가 넘겨받습니다.
+- `done/<키>.json`: 끝난 사진의 관찰 기록 (식별하지 못한 사진은 기록 없이 표시만)
+- `names/<키>`: 출력 파일명 선점. 내용은 그 이름을 가진 사진이며, 같은 사진을
+  다시 처리하면 같은 이름을 다시 쓰므로 사진 한 장이 두 이름으로 저장되지 않습니다.
+
+작업자 수에 비례해 처리량이 늘고, 그 다음에는 API 속도 제한이 병목이 됩니다.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import socket
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Iterator, List
+
+QUEUE_DIR_NAME = '.work_queue'
+LEASE_SECONDS = 600
+MAX_ATTEMPTS = 3  # 이 횟수만큼 임대가 만료된 사진(작업자를 계속 멈추게 하는 사진)은 실패로 끝냄
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+def _key(text: str) -> str:
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+def _create_exclusive(path: str, content: str) -> bool:
+    """파일이 없을 때만 만들고 내용을 씀 (이미 있으면 False)"""
+    try:
+        fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+    except FileExistsError:
+        return False
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        f.write(content)
+    return True
+
+
+def _read(path: str) -> str | None:
+    try:
+        with open(path, encoding='utf-8') as f:
+            return f.read()
+    except (FileNotFoundError, UnicodeDecodeError):
+        return None
+
+
+class NameClaims:
+    """출력 폴더 기준 상대 경로로 파일명을 선점 (호스트마다 마운트 경로가 달라도 같은 키)"""
+
+    def __init__(self, claims_dir: str, base_dir: str):
+        self.claims_dir = claims_dir
+        self.base_dir = base_dir
+        os.makedirs(claims_dir, exist_ok=True)
+
+    def _path(self, directory: str, filename: str) -> str:
+        rel = os.path.relpath(os.path.join(directory, filename), self.base_dir).replace(os.sep, '/')
+        return os.path.join(self.claims_dir, _key(rel.casefold()))
+
+    def owner(self, directory: str, filename: str) -> str | None:
+        return _read(self._path(directory, filename))
+
+    def claim(self, directory: str, filename: str, owner: str) -> bool:
+        path = self._path(directory, filename)
+        return _create_exclusive(path, owner) or _read(path) == owner
+
+
+class LeaseQueue:
+    """사진(상대 경로 키) 단위 임대 대기열"""
+
+    def __init__(self, queue_dir: str, worker_id: str | None = None, lease_seconds: float = LEASE_SECONDS,
+                 log: Callable = print):
+        self.queue_dir = queue_dir
+        self.worker_id = worker_id or default_worker_id()
+        self.lease_seconds = lease_seconds
+        self.log = log
+        self.lease_dir = os.path.join(queue_dir, 'leases')
+        self.done_dir = os.path.join(queue_dir, 'done')
+        for d in (self.lease_dir, self.done_dir):
+            os.makedirs(d, exist_ok=True)
+
+        self.held: Dict[str, str] = {}   # 키 → 임대 파일 경로
+        self.seen: List[str] = []        # 이번 실행에서 대기열에 넣은 사진 (다른 작업자 몫 포함)
+        self.stats = {'claimed': 0, 'taken_over': 0, 'completed': 0, 'released': 0, 'skipped_done': 0, 'skipped_busy': 0}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._heartbeat = threading.Thread(target=self._renew_loop, daemon=True)
+        self._heartbeat.start()
+
+    # ---------------------- 임대 ----------------------
+    def _lease_path(self, task: str) -> str:
+        return os.path.join(self.lease_dir, _key(task))
+
+    def _done_path(self, task: str) -> str:
+        return os.path.join(self.done_dir, _key(task) + '.json')
+
+    def is_done(self, task: str) -> bool:
+        return os.path.exists(self._done_path(task))
+
+    def claim(self, task: str) -> bool:
+        """사진 하나를 임대 (끝났거나 다른 작업자가 유효한 임대를 가지고 있으면 False)"""
+        if self.is_done(task):
+            self.stats['skipped_done'] += 1
+            return False
+        path = self._lease_path(task)
+        attempts = 1
+        if not _create_exclusive(path, json.dumps({'task': task, 'worker': self.worker_id, 'attempts': attempts})):
+            try:
+                before = os.stat(path)
+            except FileNotFoundError:
+                before = None  # 방금 반납됨
+            if before is not None and not self._expired(before):
+                self.stats['skipped_busy'] += 1
+                return False
+            # 만료된 임대 넘겨받기: 이름 바꾸기는 한 작업자만 성공
+            stale = f"{path}.{_key(self.worker_id)[:8]}.stale"
+            try:
+                os.rename(path, stale)
+                renamed = os.stat(stale)
+            except FileNotFoundError:
+                renamed = None
+            previous = {}
+            if renamed is not None:
+                # 확인한 뒤 이름을 바꾸기 전에 다른 작업자가 먼저 넘겨받아 새 임대를 만들었을 수 있음:
+                # 바꾼 파일이 확인한 그 파일이 아니거나 아직 유효하면 되돌려 놓고 건너뜀
+                if (before is None or (renamed.st_ino, renamed.st_mtime_ns) != (before.st_ino, before.st_mtime_ns)
+                        or not self._expired(renamed)):
+                    self._restore(stale, path)
+                    self.stats['skipped_busy'] += 1
+                    return False
+                try:
+                    previous = json.loads(_read(stale) or '{}')
+                except ValueError:
+                    pass
+                os.remove(stale)
+            attempts = previous.get('attempts', 0) + 1
+            if attempts > MAX_ATTEMPTS:
+                self.log(f"  ! [{task}] 임대가 {MAX_ATTEMPTS}회 만료되어 실패로 처리합니다.")
+                self._write_done(task, {'failed': True})
+                return False
+            if not _create_exclusive(path, json.dumps({'task': task, 'worker': self.worker_id, 'attempts': attempts})):
+                self.stats['skipped_busy'] += 1
+                return False
+            self.stats['taken_over'] += 1
+            self.log(f"  - [{task}] 만료된 임대 넘겨받음 (이전 작업자: {previous.get('worker', '?')})")
+        if self.is_done(task):  # 임대하는 사이에 다른 작업자가 끝냄
+            os.remove(path)
+            self.stats['skipped_done'] += 1
+            return False
+        with self._lock:
+            self.held[task] = path
+        self.stats['claimed'] += 1
+        return True
+
+    def _expired(self, st: os.stat_result) -> bool:
+        return time.time() - st.st_mtime > self.lease_seconds
+
+    @staticmethod
+    def _restore(stale: str, path: str):
+        """이름을 바꿔 가져온 유효한 임대를 제자리로 (그 사이 새 임대가 생겼으면 그것을 유지)"""
+        try:
+            os.link(stale, path)
+        except FileExistsError:
+            pass
+        except OSError:
+            if not os.path.exists(path):  # 하드링크를 지원하지 않는 공유 폴더
+                os.rename(stale, path)
+                return
+        os.remove(stale)
+
+    def take(self, items: Iterable, key: Callable = str) -> Iterator:
+        """임대에 성공한 항목만 내보냄 (파이프라인이 당겨 갈 때 하나씩 임대하므로 미리 쌓아 두지 않음)"""
+        for item in items:
+            task = key(item)
+            self.seen.append(task)
+            if self.claim(task):
+                yield item
+
+    def _write_done(self, task: str, record: Dict | None):
+        data = json.dumps({'task': task, 'worker': self.worker_id, 'record': record}, ensure_ascii=False)
+        # 끝 표시는 한 번만 (다른 작업자가 먼저 끝냈으면 그 기록을 유지)
+        tmp = f"{self._done_path(task)}.{_key(self.worker_id)[:8]}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write(data)
+        try:
+            os.link(tmp, self._done_path(task))
+        except FileExistsError:
+            pass
+        except OSError:
+            _create_exclusive(self._done_path(task), data)  # 하드링크를 지원하지 않는 공유 폴더
+        finally:
+            os.remove(tmp)
+
+    def _drop(self, task: str):
+        with self._lock:
+            path = self.held.pop(task, None)
+        if path:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def complete(self, task: str, record: Dict | None = None):
+        """처리 완료 (`record`: 관찰 기록, 식별하지 못한 사진은 None)"""
+        self._write_done(task, record)
+        self._drop(task)
+        with self._lock:
+            self.stats['completed'] += 1
+
+    def release(self, task: str):
+        """오류 등으로 처리하지 못한 사진을 반납 (다음 실행 또는 다른 작업자가 다시 시도)"""
+        self._drop(task)
+        with self._lock:
+            self.stats['released'] += 1
+
+    def _renew_loop(self):
+        while not self._stop.wait(self.lease_seconds / 3):
+            with self._lock:
+                paths = list(self.held.values())
+            for path in paths:
+                try:
+                    os.utime(path)
+                except FileNotFoundError:
+                    pass
+
+    def close(self):
+        """갱신을 멈추고 아직 가지고 있는 임대를 반납"""
+        self._stop.set()
+        for task in list(self.held):
+            self.release(task)
+
+    # ---------------------- 결과 모으기 ----------------------
+    def pending(self) -> List[str]:
+        """이번 실행에서 본 사진 중 아직 끝나지 않은 것"""
+        return [task for task in self.seen if not self.is_done(task)]
+
+    def records(self) -> Iterator[Dict]:
+        """모든 작업자가 남긴 관찰 기록 (파일을 하나씩 읽어 차례로 내보냄)"""
+        with os.scandir(self.done_dir) as it:
+            for entry in it:
+                if not entry.name.endswith('.json'):
+                    continue
+                try:
+                    record = json.loads(_read(entry.path) or 'null')['record']
+                except (TypeError, ValueError, KeyError):
+                    continue
+                if record and not record.get('failed'):
+                    yield record
+
+    def claim_report(self) -> bool:
+        """모든 사진이 끝났을 때 리포트를 만들 작업자 하나를 정함 (끝난 사진 목록이 같으면 한 번만)"""
+        done = sorted(entry.name for entry in os.scandir(self.done_dir) if entry.name.endswith('.json'))
+        marker = os.path.join(self.queue_dir, f"report-{_key('|'.join(done))}")
+        return _create_exclusive(marker, self.worker_id)
+
+
+def encode_record(obs: Dict) -> Dict:
+    return {**obs, 'datetime': obs['datetime'].isoformat() if obs.get('datetime') else None}
+
+
+def decode_record(record: Dict) -> Dict:
+    return {**record, 'datetime': datetime.fromisoformat(record['datetime']) if record.get('datetime') else None}